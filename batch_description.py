@@ -0,0 +1,184 @@
+import json
+import os
+import time
+
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+# Batch API 입력 파일 제한 (200MB / 50,000 요청)보다 조금 작게 분할
+MAX_BATCH_FILE_BYTES = 190 * 1024 * 1024
+MAX_BATCH_REQUESTS = 50000
+POLL_INTERVAL = 30
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def batch_request_line(custom_id, model, messages, max_tokens):
+    # Batch 입력 파일 한 줄 (custom_id로 결과를 다시 원래 행에 매칭)
+    return json.dumps({
+        "custom_id": str(custom_id),
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {"model": model, "messages": messages, "max_tokens": max_tokens},
+    }, ensure_ascii=False)
+
+
+class BatchFileWriter:
+    """
+    요청 줄을 JSONL 파일로 기록하고 크기/개수 제한을 넘으면 다음 파일로 분할.
+    인코딩된 이미지를 메모리에 모아두지 않도록 한 줄씩 바로 씀
+    """
+
+    def __init__(self, out_dir, prefix="batch_input", max_bytes=MAX_BATCH_FILE_BYTES,
+                 max_requests=MAX_BATCH_REQUESTS):
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_requests = max_requests
+        self.paths = []
+        self._file = None
+        self._bytes = 0
+        self._count = 0
+
+    def _open_next(self):
+        self.close()
+        path = os.path.join(self.out_dir, f"{self.prefix}_{len(self.paths):03d}.jsonl")
+        self._file = open(path, "w", encoding="utf-8")
+        self.paths.append(path)
+        self._bytes = 0
+        self._count = 0
+
+    def write(self, line):
+        size = len(line.encode("utf-8")) + 1
+        if (self._file is None or self._count >= self.max_requests
+                or (self._count and self._bytes + size > self.max_bytes)):
+            self._open_next()
+        self._file.write(line + "\n")
+        self._bytes += size
+        self._count += 1
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def load_jobs(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_jobs(path, jobs):
+    # 제출한 batch id를 남겨두면 중단 후 다시 실행해도 제출 없이 폴링부터 이어감
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(jobs, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def pending_jobs(jobs):
+    # 아직 결과를 병합하지 않은 batch
+    return [job for job in jobs if not job.get("merged")]
+
+
+def archive_jobs(path):
+    """
+    모든 batch를 병합한 제출 기록을 batch_jobs_<시각>.json으로 옮겨 둠 (다음 실행은 새로 제출).
+    옮긴 경로 반환 (기록이 없으면 None)
+    """
+    if not os.path.exists(path):
+        return None
+    root, ext = os.path.splitext(path)
+    archived = f"{root}_{time.strftime('%Y%m%d_%H%M%S')}{ext}"
+    suffix = 1
+    while os.path.exists(archived):
+        archived = f"{root}_{time.strftime('%Y%m%d_%H%M%S')}_{suffix}{ext}"
+        suffix += 1
+    os.replace(path, archived)
+    return archived
+
+
+def submit_batch(client, input_path):
+    with open(input_path, "rb") as f:
+        uploaded = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=uploaded.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window=COMPLETION_WINDOW,
+    )
+    print(f"[INFO] batch 제출: {os.path.basename(input_path)} -> {batch.id} "
+          f"({os.path.getsize(input_path) / (1024 * 1024):.1f} MB)")
+    return batch.id
+
+
+def wait_for_batch(client, batch_id, poll_interval=POLL_INTERVAL):
+    last_status = None
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        counts = getattr(batch, "request_counts", None)
+        progress = f" ({counts.completed + counts.failed}/{counts.total})" if counts else ""
+        if batch.status != last_status or progress:
+            print(f"[INFO] batch {batch_id}: {batch.status}{progress}")
+            last_status = batch.status
+        if batch.status in TERMINAL_STATUSES:
+            return batch
+        time.sleep(poll_interval)
+
+
+def _read_file_text(client, file_id):
+    if not file_id:
+        return ""
+    return client.files.content(file_id).text
+
+
+def read_batch_results(client, batch):
+    """
+    완료된 batch의 출력/오류 파일을 읽어 {custom_id: 생성 텍스트} 반환.
+    실패한 요청은 빈 문자열
+    """
+    results = {}
+    for line in _read_file_text(client, getattr(batch, "output_file_id", None)).splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        custom_id = record.get("custom_id")
+        response = record.get("response") or {}
+        try:
+            if response.get("status_code") != 200:
+                raise ValueError(response.get("status_code"))
+            results[custom_id] = response["body"]["choices"][0]["message"]["content"].strip()
+        except (KeyError, IndexError, TypeError, ValueError):
+            print(f"[WARNING] batch 응답 오류: {custom_id}")
+            results[custom_id] = ""
+
+    for line in _read_file_text(client, getattr(batch, "error_file_id", None)).splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        error = record.get("error") or (record.get("response") or {}).get("body", {}).get("error")
+        print(f"[WARNING] batch 요청 실패: {record.get('custom_id')} {error}")
+        results.setdefault(record.get("custom_id"), "")
+    return results
+
+
+def merge_batch_results(df_output, results, on_merged=None):
+    """
+    {custom_id(product_id): 생성 텍스트}를 df_output의 description에 product_id 기준으로 채움.
+    df_output에 없는 product_id는 무시. 실패한 요청(빈 문자열)도 채워서 다음 실행의 재시도 대상으로 남김.
+    on_merged(product_id, description)는 병합한 행마다 호출. 반환: (병합 건수, 성공 건수)
+    """
+    row_index = {str(pid): idx for idx, pid in df_output["product_id"].items()}
+    merged = success = 0
+    for product_id, description in results.items():
+        idx = row_index.get(str(product_id))
+        if idx is None:
+            continue
+        df_output.at[idx, "description"] = description
+        merged += 1
+        if description:
+            success += 1
+        if on_merged:
+            on_merged(str(product_id), description)
+    return merged, success
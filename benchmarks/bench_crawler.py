@@ -0,0 +1,187 @@
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import resource
+import shlex
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixture_site import FixtureSite  # noqa: E402
+from driver_profile import PageNetworkStats  # noqa: E402
+from stats_util import percentile  # noqa: E402
+
+
+def configure_crawler(crawler, site, out_dir, products, keep_delays):
+    # 크롤러 모듈 상수를 픽스처 사이트와 임시 출력 폴더로 교체
+    crawler.OUT_DIR = out_dir
+    crawler.IMG_DIR = os.path.join(out_dir, "images")
+    crawler.CSV_PATH = os.path.join(out_dir, "products.csv")
+    crawler.STATE_PATH = os.path.join(out_dir, "crawl_state.sqlite3")
+    crawler.IMAGE_CACHE_PATH = os.path.join(out_dir, "image_cache.sqlite3")
+    if hasattr(crawler, "START_URLS"):
+        crawler.START_URLS = [site.url("/list")]
+        crawler.MAX_PRODUCTS_PER_LIST = products
+    if hasattr(crawler, "CATEGORY_BASE_URL"):
+        crawler.CATEGORY_BASE_URL = site.url("/home")
+        crawler.MAX_PRODUCTS_PER_CATEGORY = products
+    if not keep_delays:
+        crawler.MIN_DELAY, crawler.MAX_DELAY = 0.0, 0.0
+    crawler.PAGE_STATS = PageNetworkStats()
+
+
+def use_local_browser(crawler, chrome_binary=None, chromedriver=None):
+    # 설치된 크롬/chromedriver 경로 지정 (기본은 시스템 크롬 + webdriver_manager 설치본)
+    if chromedriver:
+        crawler._chromedriver_path = chromedriver
+    if chrome_binary:
+        base_options = crawler.Options
+
+        class LocalOptions(base_options):
+            def __init__(self):
+                super().__init__()
+                self.binary_location = chrome_binary
+
+        crawler.Options = LocalOptions
+
+
+def peak_rss_kb():
+    # Linux 기준 ru_maxrss 단위는 KB (children은 종료되어 회수된 크롬/드라이버 프로세스)
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    }
+
+
+def bench_list_and_detail(crawler, site, lean, detail_pages):
+    driver = crawler.build_driver(lean=lean)
+    try:
+        browser = {
+            "chrome": driver.capabilities.get("browserVersion", ""),
+            "chromedriver": driver.capabilities.get("chrome", {}).get("chromedriverVersion", "").split(" ")[0],
+        }
+        driver.get(site.url("/list"))
+        started = time.monotonic()
+        links = crawler.extract_product_links_from_list(driver)
+        list_sec = time.monotonic() - started
+
+        page_secs = []
+        rows = []
+        for link in links[:detail_pages]:
+            started = time.monotonic()
+            rows.append(crawler.parse_product_detail(driver, link))
+            page_secs.append(time.monotonic() - started)
+    finally:
+        driver.quit()
+
+    total = sum(page_secs)
+    images = sum(1 for row in rows if row["image_path"]) + sum(
+        len([f for f in str(row["features"]).split(";") if f.strip()]) for row in rows)
+    return browser, {
+        "extract_product_links_from_list": {
+            "wall_sec": round(list_sec, 4),
+            "links": len(links),
+        },
+        "parse_product_detail": {
+            "wall_sec": round(total, 3),
+            "pages": len(page_secs),
+            "pages_per_min": round(len(page_secs) / total * 60, 2) if total else 0.0,
+            "sec_per_page_p50": round(percentile(page_secs, 50), 3),
+            "sec_per_page_p95": round(percentile(page_secs, 95), 3),
+            "detail_load_sec_avg": round(
+                sum(row["detail_load_sec"] or 0 for row in rows) / len(rows), 3) if rows else 0.0,
+            "images": images,
+            "images_per_sec": round(images / total, 2) if total else 0.0,
+        },
+    }
+
+
+def bench_crawl(crawler, lean, workers):
+    started = time.monotonic()
+    summary = crawler.crawl(num_workers=workers, lean=lean)
+    wall = time.monotonic() - started
+    downloads = summary["downloads"] or {}
+    images = downloads.get("downloaded", 0)
+    return {
+        "wall_sec": round(wall, 3),
+        "workers": workers,
+        "rows": summary["rows"],
+        "failures": summary["failures"],
+        "pages_per_min": round(summary["rows"] / wall * 60, 2) if wall else 0.0,
+        "images": images,
+        "images_per_sec": round(images / wall, 2) if wall else 0.0,
+        "download_bytes_per_sec": downloads.get("bytes_per_sec", 0.0),
+        "download_latency_p50": downloads.get("latency_p50", 0.0),
+        "download_latency_p99": downloads.get("latency_p99", 0.0),
+        "page_network": summary["pages"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 픽스처 사이트 기준 크롤러 벤치마크 (결과는 JSON)")
+    parser.add_argument("--crawler", default="kakao_crawling", choices=["kakao_crawling", "kakao_crawling_category"])
+    parser.add_argument("--products", type=int, default=20)
+    parser.add_argument("--detail-images", type=int, default=8)
+    parser.add_argument("--image-kb", type=int, default=200)
+    parser.add_argument("--lazy-delay-ms", type=int, default=150, help="픽스처 지연 로딩 이미지가 src를 채우기까지의 지연")
+    parser.add_argument("--detail-pages", type=int, default=5, help="parse_product_detail 단독 측정 페이지 수")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--no-lean", action="store_true")
+    parser.add_argument("--keep-delays", action="store_true", help="rand_sleep 대기 유지 (기본은 0초)")
+    parser.add_argument("--skip-crawl", action="store_true", help="전체 crawl() 측정 생략")
+    parser.add_argument("--chrome-binary", help="크롬 실행 파일 경로 (기본: 시스템 크롬)")
+    parser.add_argument("--chromedriver", help="chromedriver 경로 (기본: webdriver_manager 설치)")
+    parser.add_argument("--output", help="JSON 저장 경로 (기본: stdout)")
+    args = parser.parse_args()
+
+    lean = not args.no_lean
+    site = FixtureSite(products=args.products, detail_images=args.detail_images,
+                       image_kb=args.image_kb, lazy_delay_ms=args.lazy_delay_ms).start()
+    out_dir = tempfile.mkdtemp(prefix="crawler-bench-")
+    crawler = importlib.import_module(args.crawler)
+    configure_crawler(crawler, site, out_dir, args.products, args.keep_delays)
+    use_local_browser(crawler, args.chrome_binary, args.chromedriver)
+
+    result = {
+        "command": shlex.join(["python", os.path.relpath(sys.argv[0])] + sys.argv[1:]),
+        "config": {
+            "crawler": args.crawler,
+            "products": args.products,
+            "detail_images": args.detail_images,
+            "image_kb": args.image_kb,
+            "lazy_delay_ms": args.lazy_delay_ms,
+            "lean": lean,
+            "keep_delays": args.keep_delays,
+        },
+        "stages": {},
+    }
+
+    try:
+        # 크롤러 로그는 stderr로 보내 stdout에는 JSON만 남김
+        with contextlib.redirect_stdout(sys.stderr):
+            result["browser"], stages = bench_list_and_detail(crawler, site, lean, args.detail_pages)
+            result["stages"].update(stages)
+            if not args.skip_crawl:
+                crawler.PAGE_STATS = PageNetworkStats()
+                result["stages"]["crawl"] = bench_crawl(crawler, lean, args.workers)
+        result["fixture_server"] = dict(site.stats)
+        result["peak_rss_kb"] = peak_rss_kb()
+    finally:
+        site.stop()
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
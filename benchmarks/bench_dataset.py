@@ -0,0 +1,137 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from product_store import load_products, parquet_available, write_products_parquet, features_as_text  # noqa: E402
+from crawl_state import PRODUCT_COLUMNS  # noqa: E402
+
+
+CATEGORIES = ["뷰티", "식품", "리빙", "패션", "디지털", "출산/유아동", "스포츠/레저", "반려동물"]
+NAME_WORDS = ["선물포장", "핸드크림", "텀블러", "기프트세트", "향수", "머그컵", "캔들", "디퓨저", "초콜릿", "와인"]
+
+
+def synthetic_products(rows, detail_images=8, seed=0):
+    # 크롤러 출력과 같은 컬럼의 가짜 상품 데이터
+    rnd = random.Random(seed)
+    records = []
+    for i in range(rows):
+        product_id = str(1000000 + i)
+        category = rnd.choice(CATEGORIES)
+        features = [f"images/{product_id}/detail_{j}.jpg" for j in range(rnd.randint(0, detail_images))]
+        records.append({
+            "product_id": product_id,
+            "name": f"[{rnd.choice(NAME_WORDS)}] " + " ".join(rnd.choice(NAME_WORDS) for _ in range(3)),
+            "price": rnd.randrange(1000, 300000, 100),
+            "image_path": f"images/{product_id}/main.jpg",
+            "features": features,
+            "detail_image_count": len(features),
+            "category": category,
+            "theme": rnd.choice(["", "생일", "감사", "집들이"]),
+            "source_url": f"https://gift.kakao.com/product/{product_id}",
+            "crawled_at": "2024-01-01T00:00:00",
+            "detail_load_sec": round(rnd.uniform(0.2, 3.0), 3),
+        })
+    return pd.DataFrame(records, columns=PRODUCT_COLUMNS)
+
+
+def _measure(source, columns, filters, queue):
+    # 새 프로세스에서 한 번 로드 (최대 RSS를 케이스별로 분리하기 위함)
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    df = load_products(source, columns=columns, filters=filters)
+    sec = time.perf_counter() - started
+    queue.put({
+        "rows": len(df),
+        "columns": len(df.columns),
+        "load_sec": round(sec, 4),
+        "frame_mb": round(float(df.memory_usage(deep=True).sum()) / (1024 * 1024), 2),
+        # 로드 전(pandas import 후) RSS와 로드 중 최대 RSS (ru_maxrss는 Linux 기준 KB)
+        "base_rss_mb": round(base_rss / 1024, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+    })
+
+
+def measure(source, columns=None, filters=None, repeat=3):
+    ctx = multiprocessing.get_context("spawn")
+    runs = []
+    for _ in range(repeat):
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_measure, args=(source, columns, filters, queue))
+        proc.start()
+        runs.append(queue.get())
+        proc.join()
+    best = min(runs, key=lambda r: r["load_sec"])
+    best["load_sec_runs"] = [r["load_sec"] for r in runs]
+    return best
+
+
+def dir_size_mb(path):
+    if os.path.isfile(path):
+        return round(os.path.getsize(path) / (1024 * 1024), 2)
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return round(total / (1024 * 1024), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="products.csv와 category 분할 Parquet의 로드 시간/메모리 비교 (결과는 JSON)")
+    parser.add_argument("--rows", type=int, default=100000, help="가짜 상품 수 (--csv를 주면 무시)")
+    parser.add_argument("--csv", help="실제 products.csv로 측정")
+    parser.add_argument("--category", default=CATEGORIES[0], help="필터 케이스에 쓸 카테고리")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="JSON 저장 경로 (기본: stdout)")
+    args = parser.parse_args()
+
+    if not parquet_available():
+        print("[ERROR] pyarrow가 필요합니다 (pip install pyarrow)", file=sys.stderr)
+        sys.exit(1)
+
+    out_dir = tempfile.mkdtemp(prefix="dataset-bench-")
+    try:
+        csv_path = os.path.join(out_dir, "products.csv")
+        parquet_path = os.path.join(out_dir, "products_parquet")
+        if args.csv:
+            df = load_products(args.csv)
+        else:
+            df = synthetic_products(args.rows)
+        features_as_text(df).to_csv(csv_path, index=False, encoding="utf-8")
+        write_products_parquet(df, parquet_path)
+
+        view_columns = ["product_id", "name", "price", "image_path", "features", "category"]
+        category_filter = [("category", "==", args.category)]
+        result = {
+            "config": {"rows": len(df), "source": args.csv or "synthetic", "category": args.category,
+                       "repeat": args.repeat},
+            "size_mb": {"csv": dir_size_mb(csv_path), "parquet": dir_size_mb(parquet_path)},
+            "cases": {},
+        }
+        for fmt, source in (("csv", csv_path), ("parquet", parquet_path)):
+            result["cases"][f"{fmt}_full"] = measure(source, repeat=args.repeat)
+            result["cases"][f"{fmt}_columns"] = measure(source, view_columns, repeat=args.repeat)
+            result["cases"][f"{fmt}_category"] = measure(source, ["product_id", "name", "features"],
+                                                         category_filter, repeat=args.repeat)
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
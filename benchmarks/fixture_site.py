@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+CATEGORIES = ["뷰티", "식품", "리빙", "패션", "디지털"]
+
+# 최소 PNG (플레이스홀더 / 아이콘)
+_PIXEL_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def render(template, **values):
+    # CSS/JS 중괄호와 충돌하지 않도록 {key} 자리만 치환
+    for key, value in values.items():
+        template = template.replace("{" + key + "}", str(value))
+    return template
+
+
+class FixtureSite:
+    """
+    gift.kakao.com 구조를 본뜬 로컬 픽스처 사이트.
+
+    - /home                  카테고리 탭 (kakao_crawling_category.py용)
+    - /list[?category=ID]    상품 목록 (a.link_thumb)
+    - /product/<id>          상품 상세 (og:image, 브레드크럼, Shadow DOM 지연 로딩 상세 이미지)
+    - /img/<name>.jpg        이미지 payload (ETag / If-None-Match 지원)
+    상품마다 마지막 상세 이미지는 여러 상품이 공유하는 배너로 구성
+    """
+
+    def __init__(self, products=20, detail_images=8, image_kb=200, lazy_delay_ms=150, seed=0):
+        self.products = products
+        self.detail_images = detail_images
+        self.image_bytes = image_kb * 1024
+        self.lazy_delay_ms = lazy_delay_ms
+        self.seed = seed
+        self.server = None
+        self.thread = None
+
+        self._templates = {
+            name: load_fixture(f"{name}.html")
+            for name in ["home", "home_category", "list", "list_item", "product"]
+        }
+        self._image_cache = {}
+        self._lock = threading.Lock()
+        self.stats = {"pages": 0, "images": 0, "image_bytes": 0, "not_modified": 0}
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path):
+        return self.base_url + path
+
+    def product_ids(self, category_id=None):
+        ids = [str(100000 + i) for i in range(self.products)]
+        if category_id is None:
+            return ids
+        return [pid for i, pid in enumerate(ids) if i % len(CATEGORIES) == int(category_id)]
+
+    def product_info(self, product_id):
+        idx = int(product_id) - 100000
+        category_id = idx % len(CATEGORIES)
+        detail_urls = [self.url(f"/img/{product_id}_detail{n}.jpg") for n in range(1, self.detail_images)]
+        detail_urls.append(self.url("/img/shared_brand_banner.jpg"))
+        return {
+            "product_id": product_id,
+            "name": f"[선물포장] 픽스처 상품 {idx + 1}",
+            "price": f"{(idx % 9 + 1) * 5000:,}",
+            "category": CATEGORIES[category_id],
+            "category_id": category_id,
+            "og_image": self.url(f"/img/{product_id}_main.jpg"),
+            "detail_urls": detail_urls,
+        }
+
+    def image_payload(self, name):
+        with self._lock:
+            if name not in self._image_cache:
+                rng = random.Random(f"{self.seed}:{name}")
+                self._image_cache[name] = rng.randbytes(self.image_bytes)
+            return self._image_cache[name]
+
+    def render_home(self):
+        items = "\n".join(
+            render(self._templates["home_category"], category=name, category_id=i)
+            for i, name in enumerate(CATEGORIES)
+        )
+        return render(self._templates["home"], categories=items)
+
+    def render_list(self, category_id=None):
+        items = []
+        for pid in self.product_ids(category_id):
+            info = self.product_info(pid)
+            items.append(render(self._templates["list_item"], product_id=pid, name=info["name"], price=info["price"]))
+        return render(self._templates["list"], items="\n".join(items))
+
+    def render_product(self, product_id):
+        info = self.product_info(product_id)
+        return render(
+            self._templates["product"],
+            name=info["name"], price=info["price"], category=info["category"],
+            category_id=info["category_id"], og_image=info["og_image"],
+            detail_urls_json=json.dumps(info["detail_urls"]), lazy_delay_ms=self.lazy_delay_ms,
+        )
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body=b"", content_type="text/html; charset=utf-8", headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                path = parsed.path
+                query = parse_qs(parsed.query)
+
+                if path == "/home":
+                    site._count("pages")
+                    return self._send(200, site.render_home().encode("utf-8"))
+                if path == "/list":
+                    site._count("pages")
+                    category_id = query.get("category", [None])[0]
+                    return self._send(200, site.render_list(category_id).encode("utf-8"))
+                if path.startswith("/product/"):
+                    site._count("pages")
+                    return self._send(200, site.render_product(path.rsplit("/", 1)[-1]).encode("utf-8"))
+                if path.startswith("/static/"):
+                    return self._send(200, _PIXEL_PNG, "image/png")
+                if path.startswith("/img/"):
+                    name = path[len("/img/"):]
+                    body = site.image_payload(name)
+                    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                    if self.headers.get("If-None-Match") == etag:
+                        site._count("not_modified")
+                        return self._send(304, headers={"ETag": etag})
+                    site._count("images")
+                    site._count("image_bytes", len(body))
+                    return self._send(200, body, "image/jpeg", {"ETag": etag})
+                return self._send(404, b"not found", "text/plain")
+
+        return Handler
+
+    def start(self, host="127.0.0.1", port=0):
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="fixture-site", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
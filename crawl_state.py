@@ -0,0 +1,147 @@
+import csv
+import datetime
+import json
+import os
+import sqlite3
+import threading
+
+
+# products.csv 컬럼 순서
+PRODUCT_COLUMNS = [
+    "product_id", "name", "price", "image_path", "features",
+    "category", "theme", "source_url", "crawled_at", "detail_load_sec", "detail_image_count",
+]
+
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    product_id  TEXT PRIMARY KEY,
+    source_url  TEXT,
+    status      TEXT NOT NULL,
+    row_json    TEXT,
+    error       TEXT,
+    updated_at  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS images (
+    product_id     TEXT NOT NULL,
+    img_name       TEXT NOT NULL,
+    url            TEXT NOT NULL,
+    rel_path       TEXT,
+    etag           TEXT,
+    last_modified  TEXT,
+    updated_at     TEXT NOT NULL,
+    PRIMARY KEY (product_id, img_name)
+);
+"""
+
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+class CrawlState:
+    """
+    크롤링 진행 상태 저장소 (dataset/crawl_state.sqlite3).
+
+    - products: product_id(guess_product_id_from_url) 별 상태(done/failed), 수집한 행, 오류
+    - images: 상품별 이미지 URL, 저장 경로, ETag / Last-Modified
+    다운로드 스레드에서 동시에 호출되므로 모든 접근은 lock으로 직렬화
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+    def completed_ids(self):
+        with self._lock:
+            cur = self.conn.execute("SELECT product_id FROM products WHERE status = ?", (STATUS_DONE,))
+            return {r[0] for r in cur.fetchall()}
+
+    def save_product(self, row, images=()):
+        now = _now()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO products (product_id, source_url, status, row_json, error, updated_at) "
+                "VALUES (?, ?, ?, ?, NULL, ?)",
+                (row["product_id"], row.get("source_url"), STATUS_DONE,
+                 json.dumps(row, ensure_ascii=False), now),
+            )
+            self.conn.execute("DELETE FROM images WHERE product_id = ?", (row["product_id"],))
+            self.conn.executemany(
+                "INSERT INTO images (product_id, img_name, url, rel_path, etag, last_modified, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (row["product_id"], img["img_name"], img["url"], img["rel_path"],
+                     img.get("etag"), img.get("last_modified"), now)
+                    for img in images if img
+                ],
+            )
+
+    def mark_failed(self, product_id, source_url, error):
+        # 이전에 완료된 상품은 완료 상태를 유지 (이전 데이터가 더 유용)
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO products (product_id, source_url, status, error, updated_at) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(product_id) DO UPDATE SET error = excluded.error, updated_at = excluded.updated_at, "
+                "status = CASE WHEN products.status = ? THEN products.status ELSE excluded.status END",
+                (product_id, source_url, STATUS_FAILED, error, _now(), STATUS_DONE),
+            )
+
+    def get_rows(self, product_ids):
+        # 완료된 상품의 행을 product_ids 순서대로 반환
+        with self._lock:
+            cur = self.conn.execute("SELECT product_id, row_json FROM products WHERE status = ?", (STATUS_DONE,))
+            rows = {pid: json.loads(row_json) for pid, row_json in cur.fetchall()}
+        return [rows[pid] for pid in product_ids if pid in rows]
+
+    def image_records(self, product_id):
+        with self._lock:
+            cur = self.conn.execute(
+                "SELECT img_name, url, rel_path, etag, last_modified FROM images WHERE product_id = ? "
+                "ORDER BY rowid", (product_id,))
+            return [
+                {"img_name": r[0], "url": r[1], "rel_path": r[2], "etag": r[3], "last_modified": r[4]}
+                for r in cur.fetchall()
+            ]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class IncrementalCsvWriter:
+    # 상품 하나가 끝날 때마다 products.csv에 한 줄씩 추가 (크래시가 나도 완료된 행은 남음)
+
+    def __init__(self, path, columns=PRODUCT_COLUMNS, append=False):
+        self.columns = columns
+        self._lock = threading.Lock()
+        write_header = not append or not os.path.exists(path) or os.path.getsize(path) == 0
+        if not write_header and self._read_header(path) != list(columns):
+            # 컬럼이 바뀐 이전 파일에는 이어 쓰지 않음 (완료된 행은 크롤링 마지막에 상태 저장소에서 다시 씀)
+            append, write_header = False, True
+        self._file = open(path, "a" if append else "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=columns, extrasaction="ignore")
+        if write_header:
+            self._writer.writeheader()
+            self._file.flush()
+
+    @staticmethod
+    def _read_header(path):
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            return next(csv.reader(f), [])
+
+    def write(self, row):
+        with self._lock:
+            self._writer.writerow(row)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+from image_cache import file_sha256
+
+
+REASON_NEW = "new"
+REASON_CHANGED = "changed"
+REASON_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path      TEXT PRIMARY KEY,
+    mtime_ns  INTEGER NOT NULL,
+    size      INTEGER NOT NULL,
+    sha256    TEXT NOT NULL
+);
+"""
+
+
+class FileHashIndex:
+    """
+    이미지 파일 SHA-256 메모 (dataset/file_hashes.sqlite3).
+    경로별 mtime/크기가 그대로면 저장된 해시를 쓰고, 바뀐 파일만 다시 읽어서 해시
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+        self.hashed = 0
+
+    def sha256(self, full_path):
+        st = os.stat(full_path)
+        key = os.path.abspath(full_path)
+        with self._lock:
+            r = self.conn.execute("SELECT mtime_ns, size, sha256 FROM file_hashes WHERE path = ?", (key,)).fetchone()
+        if r and r[0] == st.st_mtime_ns and r[1] == st.st_size:
+            return r[2]
+        digest = file_sha256(full_path)
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO file_hashes (path, mtime_ns, size, sha256) VALUES (?, ?, ?, ?)",
+                (key, st.st_mtime_ns, st.st_size, digest))
+            self.hashed += 1
+        return digest
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def row_fingerprint(row, image_hashes):
+    # 생성 입력(상품명, 카테고리, 크롤링 시각, 이미지 내용)이 같으면 같은 값
+    payload = json.dumps({
+        "name": str(row.get("name", "")),
+        "category": str(row.get("category", "")),
+        "crawled_at": str(row.get("crawled_at", "")),
+        "images": list(image_hashes),
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def priority_sort(df, key=None, order=None):
+    """
+    key 컬럼 기준 우선순위 정렬 (같은 값 안에서는 원래 순서 유지).
+    order에 있는 값이 먼저 그 순서대로, 나머지는 값 오름차순
+    """
+    if not key or key not in df.columns or df.empty:
+        return df
+    order = list(order or [])
+    rank = {value: i for i, value in enumerate(order)}
+    # category가 범주형(product_store로 로드)이어도 값 단위로 비교
+    sort_key = df[key].astype(object).map(lambda v: (rank.get(v, len(order)), "" if pd.isna(v) else str(v)))
+    return df.loc[sorted(df.index, key=lambda idx: sort_key[idx])]
+
+
+def schedule_rows(df, results, fingerprint_fn, priority_key=None, priority_order=None):
+    """
+    결과 로그와 비교해 생성이 필요한 행만 골라 우선순위 순서로 반환.
+
+    - new: 로그에 기록이 없는 상품
+    - changed: 성공 기록은 있지만 입력 fingerprint가 달라진 상품 (fingerprint 없는 예전 기록은 그대로 둠)
+    - failed: 마지막 기록이 실패인 상품
+    반환: (처리할 df, {product_id: fingerprint}, {사유: 개수})
+    """
+    fingerprints = {}
+    selected = []
+    reasons = {REASON_NEW: 0, REASON_CHANGED: 0, REASON_FAILED: 0}
+    for idx, row in df.iterrows():
+        product_id = str(row["product_id"])
+        fingerprint = fingerprint_fn(row)
+        fingerprints[product_id] = fingerprint
+        record = results.get(product_id)
+        if record is None:
+            reason = REASON_NEW
+        elif record.get("status") != "ok":
+            reason = REASON_FAILED
+        elif record.get("fingerprint") and record["fingerprint"] != fingerprint:
+            reason = REASON_CHANGED
+        else:
+            continue
+        reasons[reason] += 1
+        selected.append(idx)
+    return priority_sort(df.loc[selected], priority_key, priority_order), fingerprints, reasons
@@ -0,0 +1,156 @@
+import time
+
+from page_extract import DETAIL_EXCLUDE_MARKERS
+
+
+# 상세 이미지 지연 로딩 대기 설정
+DETAIL_LOAD_MAX_WAIT = 10.0      # 최대 대기 시간 (초)
+DETAIL_LOAD_POLL_INTERVAL = 0.3  # 스크롤/상태 확인 간격 (초)
+DETAIL_LOAD_STABLE_ROUNDS = 3    # 맨 아래 도달 후 이미지 수가 이 횟수만큼 그대로면 종료
+
+# 기존 고정 대기 시간 (스크롤 3회 x (2초 + 1초) + 5초) - 절약 시간 비교용
+LEGACY_FIXED_WAIT_SEC = 14.0
+
+PLACEHOLDER_MARKERS = ["1x1", "1px", "pixel", "transparent", "blank", "placeholder"]
+
+# 한 화면씩 스크롤을 내리고 _editor_contents 안의 지연 로딩 img 상태를 반환
+_SCROLL_AND_PROBE_JS = """
+var placeholderMarkers = arguments[0];
+var excludeMarkers = arguments[1];
+var host = document.querySelector('app-view-encapsuled-product-desc');
+var shadowRoot = host ? host.shadowRoot : null;
+var editorContents = shadowRoot ? shadowRoot.querySelector('div._editor_contents') : null;
+if (!editorContents) {
+    return null;
+}
+
+function hasMarker(url, markers) {
+    var lower = (url || '').toLowerCase();
+    for (var i = 0; i < markers.length; i++) {
+        if (lower.indexOf(markers[i]) !== -1) return true;
+    }
+    return false;
+}
+
+function isPlaceholder(url) {
+    return !url || url.indexOf('data:') === 0 || hasMarker(url, placeholderMarkers);
+}
+
+// 컨테이너 자체 스크롤과 창 스크롤을 모두 한 화면씩 진행
+var step = Math.max(editorContents.clientHeight, window.innerHeight, 300);
+editorContents.scrollTop = Math.min(editorContents.scrollTop + step, editorContents.scrollHeight);
+var rect = editorContents.getBoundingClientRect();
+var bottomY = window.scrollY + rect.bottom;
+window.scrollTo(0, Math.min(window.scrollY + window.innerHeight, bottomY));
+
+var containerAtBottom = editorContents.scrollTop + editorContents.clientHeight >= editorContents.scrollHeight - 2;
+var windowAtBottom = window.scrollY + window.innerHeight >= bottomY - 2
+    || window.scrollY + window.innerHeight >= document.documentElement.scrollHeight - 2;
+
+var imgs = editorContents.querySelectorAll('img');
+var tracked = 0;
+var pending = 0;
+for (var i = 0; i < imgs.length; i++) {
+    var img = imgs[i];
+    // 상대 경로는 img.src로 절대 URL이 됨 (src 속성이 없으면 빈 값)
+    var src = img.getAttribute('src') ? img.src : '';
+    var lazy = img.getAttribute('data-original-src') || img.getAttribute('data-src');
+    if (lazy) {
+        // 지연 로딩 대상 중 아이콘/버튼 등 상세 이미지로 수집하지 않는 것은 기다리지 않음 (page_extract와 같은 기준)
+        if (hasMarker(lazy, excludeMarkers)) continue;
+        tracked++;
+        if (isPlaceholder(src) || src.indexOf('http') !== 0) pending++;
+    } else if (isPlaceholder(src)) {
+        // data-* 원본 URL 없이 플레이스홀더만 있는 img
+        tracked++;
+        pending++;
+    }
+    // 그 외(이미 실제 이미지, 상대 경로 아이콘/스프라이트 등)는 로딩 대기 대상 아님
+}
+
+return {
+    count: imgs.length,
+    tracked: tracked,
+    pending: pending,
+    atBottom: containerAtBottom && windowAtBottom
+};
+"""
+
+_RESET_SCROLL_JS = """
+var host = document.querySelector('app-view-encapsuled-product-desc');
+var editorContents = host && host.shadowRoot ? host.shadowRoot.querySelector('div._editor_contents') : null;
+if (editorContents) {
+    editorContents.scrollTop = 0;
+}
+window.scrollTo(0, 0);
+"""
+
+
+def wait_for_detail_images(driver,
+                           max_wait=DETAIL_LOAD_MAX_WAIT,
+                           poll_interval=DETAIL_LOAD_POLL_INTERVAL,
+                           stable_rounds=DETAIL_LOAD_STABLE_ROUNDS):
+    """
+    상품설명 Shadow DOM(app-view-encapsuled-product-desc) 안의 div._editor_contents를
+    스크롤하면서 지연 로딩 이미지를 기다린다.
+
+    다음 중 하나를 만족하면 바로 반환:
+    - resolved: 맨 아래까지 스크롤했고 지연 로딩 img(data-original-src/data-src 또는 플레이스홀더 src)가
+      모두 실제 URL로 바뀜 (아이콘/버튼 등 DETAIL_EXCLUDE_MARKERS에 걸리는 img와 일반 img는 세지 않음)
+    - stable: 맨 아래 도달 후 img 수/미로딩 수가 stable_rounds번 연속 변하지 않음
+    - timeout: max_wait 초과
+    - no_editor: Shadow DOM / _editor_contents가 없음 (대기하지 않음)
+    반환: {"waited", "reason", "images", "pending"}
+    """
+    started = time.monotonic()
+    last_state = None
+    unchanged = 0
+    state = {"count": 0, "pending": 0, "atBottom": False}
+    reason = "timeout"
+
+    while True:
+        probed = driver.execute_script(_SCROLL_AND_PROBE_JS, PLACEHOLDER_MARKERS, DETAIL_EXCLUDE_MARKERS)
+        if probed is None:
+            reason = "no_editor"
+            break
+        state = probed
+
+        if state["atBottom"]:
+            if state["count"] > 0 and state["pending"] == 0:
+                reason = "resolved"
+                break
+
+            current = (state["count"], state["pending"])
+            unchanged = unchanged + 1 if current == last_state else 0
+            last_state = current
+            if unchanged >= stable_rounds:
+                reason = "stable"
+                break
+
+        if time.monotonic() - started >= max_wait:
+            break
+        time.sleep(poll_interval)
+
+    if reason != "no_editor":
+        try:
+            driver.execute_script(_RESET_SCROLL_JS)
+        except Exception:
+            pass
+
+    return {
+        "waited": round(time.monotonic() - started, 2) if reason != "no_editor" else None,
+        "reason": reason,
+        "images": state["count"],
+        "pending": state["pending"],
+    }
+
+
+def summarize_detail_waits(rows):
+    # 상품별 실제 대기 시간 합계와 기존 고정 대기 대비 절약 시간 출력
+    waits = [row["detail_load_sec"] for row in rows if row.get("detail_load_sec") is not None]
+    if not waits:
+        return
+    total = sum(waits)
+    legacy = LEGACY_FIXED_WAIT_SEC * len(waits)
+    print(f"[INFO] 상세 이미지 로딩 대기: 상품 {len(waits)}개, 총 {total:.1f}초 (평균 {total / len(waits):.1f}초, 최대 {max(waits):.1f}초)")
+    print(f"[INFO] 기존 고정 대기({LEGACY_FIXED_WAIT_SEC:.0f}초/상품) 대비 절약: {legacy - total:.1f}초")
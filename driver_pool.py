@@ -0,0 +1,121 @@
+import os
+import queue
+import threading
+
+
+# 기본 워커(크롬 드라이버) 수: 코어 수 기준, 사이트 부하를 고려해 최대 4개
+DEFAULT_NUM_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+
+def _driver_alive(driver):
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+def run_driver_pool(tasks, handler, build_driver, num_workers=DEFAULT_NUM_WORKERS):
+    """
+    tasks의 각 항목을 handler(driver, *task)로 처리하는 크롬 드라이버 워커 풀.
+
+    - 워커마다 build_driver()로 드라이버를 한 번만 만들고 재사용
+    - 작업은 공유 큐에서 꺼내 처리
+    - 반환: (rows, failures)
+        rows: 성공한 결과를 tasks 입력 순서대로 정렬한 리스트
+        failures: {"index", "task", "worker", "error"} 딕셔너리 리스트 (입력 순서)
+    """
+    tasks = list(tasks)
+    if not tasks:
+        return [], []
+
+    num_workers = max(1, min(num_workers, len(tasks)))
+    work_queue = queue.Queue()
+    for idx, task in enumerate(tasks):
+        work_queue.put((idx, task))
+
+    results = {}
+    failures = []
+    lock = threading.Lock()
+
+    def worker(worker_id):
+        try:
+            driver = build_driver()
+        except Exception as e:
+            print(f"[ERROR] [worker-{worker_id}] 드라이버 생성 실패: {e}")
+            return
+
+        try:
+            while True:
+                try:
+                    idx, task = work_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                try:
+                    row = handler(driver, *task)
+                    with lock:
+                        results[idx] = row
+                except Exception as e:
+                    print(f"[FAIL] [worker-{worker_id}] {task[0]}")
+                    print(f"[ERROR] {str(e)}")
+                    with lock:
+                        failures.append({
+                            "index": idx,
+                            "task": task,
+                            "worker": worker_id,
+                            "error": str(e),
+                        })
+
+                    # 브라우저 세션이 죽었으면 드라이버 재생성
+                    if not _driver_alive(driver):
+                        print(f"[WARNING] [worker-{worker_id}] 드라이버 세션 종료 감지, 재생성")
+                        try:
+                            driver.quit()
+                        except Exception:
+                            pass
+                        try:
+                            driver = build_driver()
+                        except Exception as ex:
+                            print(f"[ERROR] [worker-{worker_id}] 드라이버 재생성 실패: {ex}")
+                            driver = None
+                            break
+        finally:
+            if driver is not None:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+
+    threads = [
+        threading.Thread(target=worker, args=(worker_id,), name=f"crawl-worker-{worker_id}", daemon=True)
+        for worker_id in range(1, num_workers + 1)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # 모든 워커가 죽어서 처리되지 못한 작업은 실패로 기록
+    while True:
+        try:
+            idx, task = work_queue.get_nowait()
+        except queue.Empty:
+            break
+        failures.append({
+            "index": idx,
+            "task": task,
+            "worker": None,
+            "error": "처리 가능한 워커 없음",
+        })
+
+    rows = [results[idx] for idx in sorted(results)]
+    failures.sort(key=lambda f: f["index"])
+    return rows, failures
+
+
+def write_failures(path, failures):
+    with open(path, "w", encoding="utf-8") as f:
+        for fail in failures:
+            worker = f"worker-{fail['worker']}" if fail["worker"] else "-"
+            f.write(f"{fail['task'][0]}\t{worker}\t{fail['error']}\n")
@@ -0,0 +1,122 @@
+import json
+import threading
+
+
+# lean 프로필에서 차단할 URL 패턴 (CDP Network.setBlockedURLs, * 와일드카드)
+# 크롤러는 DOM 속성만 읽고 이미지는 requests로 따로 받으므로 브라우저가 받을 필요가 없음
+DEFAULT_BLOCKED_URL_PATTERNS = [
+    # 이미지
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp",
+    # 미디어
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+    # 폰트
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    # 분석/트래킹
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*connect.facebook.*", "*analytics.kakao.com*", "*stat.tiara.kakao.com*",
+    "*t1.daumcdn.net/tiara*", "*hotjar.com*", "*clarity.ms*",
+]
+
+
+def apply_lean_options(opts):
+    # DOMContentLoaded 시점에 driver.get() 반환 + 이미지 렌더링 비활성화
+    opts.page_load_strategy = "eager"
+    opts.add_argument("--blink-settings=imagesEnabled=false")
+    opts.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+    })
+
+
+def enable_performance_log(opts):
+    # CDP Network.* 이벤트를 driver.get_log("performance")로 읽기 위한 설정
+    opts.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+
+def enable_request_blocking(driver, patterns=DEFAULT_BLOCKED_URL_PATTERNS):
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+
+
+def collect_network_metrics(driver):
+    """
+    performance 로그에 쌓인 CDP Network.* 이벤트를 읽어 페이지 단위 지표로 요약 (로그는 비워짐).
+    반환: {"requests", "bytes", "blocked", "failed", "bytes_by_type", "blocked_by_type"}
+    """
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        return None
+
+    resource_types = {}
+    metrics = {"requests": 0, "bytes": 0, "blocked": 0, "failed": 0,
+               "bytes_by_type": {}, "blocked_by_type": {}}
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        method = message.get("method", "")
+        params = message.get("params", {})
+
+        if method == "Network.requestWillBeSent":
+            metrics["requests"] += 1
+            resource_types[params.get("requestId")] = params.get("type", "Other")
+        elif method == "Network.loadingFinished":
+            rtype = resource_types.get(params.get("requestId"), "Other")
+            size = int(params.get("encodedDataLength", 0))
+            metrics["bytes"] += size
+            metrics["bytes_by_type"][rtype] = metrics["bytes_by_type"].get(rtype, 0) + size
+        elif method == "Network.loadingFailed":
+            rtype = params.get("type") or resource_types.get(params.get("requestId"), "Other")
+            if params.get("blockedReason"):
+                metrics["blocked"] += 1
+                metrics["blocked_by_type"][rtype] = metrics["blocked_by_type"].get(rtype, 0) + 1
+            else:
+                metrics["failed"] += 1
+    return metrics
+
+
+class PageNetworkStats:
+    # 상품 페이지별 로딩 시간 / 전송 바이트 / 차단 요청 수 집계 (워커 스레드에서 동시에 기록)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pages = []
+
+    def add(self, url, load_sec, metrics):
+        if metrics is None:
+            return
+        with self._lock:
+            self.pages.append(dict(metrics, url=url, load_sec=load_sec))
+
+    def summary(self):
+        with self._lock:
+            pages = list(self.pages)
+        if not pages:
+            return None
+        n = len(pages)
+        blocked_by_type = {}
+        for page in pages:
+            for rtype, count in page["blocked_by_type"].items():
+                blocked_by_type[rtype] = blocked_by_type.get(rtype, 0) + count
+        return {
+            "pages": n,
+            "avg_load_sec": round(sum(p["load_sec"] for p in pages) / n, 3),
+            "avg_requests": round(sum(p["requests"] for p in pages) / n, 1),
+            "avg_bytes": round(sum(p["bytes"] for p in pages) / n, 1),
+            "avg_blocked": round(sum(p["blocked"] for p in pages) / n, 1),
+            "blocked_by_type": blocked_by_type,
+        }
+
+    def report(self, lean):
+        s = self.summary()
+        if s is None:
+            return None
+        profile = "lean" if lean else "full"
+        print(f"[INFO] 상품 페이지 네트워크 ({profile} 프로필, {s['pages']}페이지): "
+              f"평균 로딩 {s['avg_load_sec']:.2f}초, 요청 {s['avg_requests']:.0f}개, "
+              f"전송 {s['avg_bytes'] / 1024:.0f}KB, 차단 {s['avg_blocked']:.0f}개")
+        if s["blocked_by_type"]:
+            print(f"[INFO] 차단된 요청 유형: {s['blocked_by_type']}")
+        return s
@@ -0,0 +1,124 @@
+import datetime
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+DEFAULT_MAX_CACHE_BYTES = 2 * 1024 * 1024 * 1024  # 2GB
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS encoded_images (
+    cache_key    TEXT PRIMARY KEY,
+    source_path  TEXT NOT NULL,
+    file_name    TEXT NOT NULL,
+    size         INTEGER NOT NULL,
+    width        INTEGER NOT NULL,
+    height       INTEGER NOT NULL,
+    tokens       INTEGER NOT NULL,
+    created_at   TEXT NOT NULL,
+    last_access  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_encoded_images_access ON encoded_images (last_access);
+"""
+
+
+def encode_cache_key(image_path, max_size, quality):
+    # 원본 파일이 바뀌면(mtime/크기) 키가 달라져 자동으로 다시 인코딩
+    st = os.stat(image_path)
+    raw = f"{os.path.abspath(image_path)}|{st.st_mtime_ns}|{st.st_size}|{max_size}|{quality}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class EncodedImageCache:
+    """
+    리사이즈 + JPEG 재인코딩 결과를 디스크에 보관하는 캐시.
+
+    키: (원본 경로, mtime, 크기, max_size, quality)
+    값: 리사이즈된 JPEG 바이트(cache_dir/<key>.jpg)와 이미지 토큰 수, 크기(index.sqlite3)
+    전체 용량이 max_bytes를 넘으면 가장 오래 안 쓰인 항목부터 삭제 (LRU)
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_CACHE_BYTES):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(cache_dir, "index.sqlite3"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM encoded_images").fetchone()[0]
+
+    def get(self, key):
+        # 반환: {"data", "width", "height", "tokens"} 또는 None
+        with self._lock:
+            r = self.conn.execute(
+                "SELECT file_name, width, height, tokens FROM encoded_images WHERE cache_key = ?", (key,)).fetchone()
+            if r is None:
+                self.misses += 1
+                return None
+            try:
+                with open(os.path.join(self.cache_dir, r[0]), "rb") as f:
+                    data = f.read()
+            except OSError:
+                # 파일이 지워진 항목은 인덱스에서도 제거
+                self._delete(key)
+                self.misses += 1
+                return None
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE encoded_images SET last_access = ? WHERE cache_key = ?", (time.time(), key))
+            self.hits += 1
+        return {"data": data, "width": r[1], "height": r[2], "tokens": r[3]}
+
+    def put(self, key, source_path, data, width, height, tokens):
+        file_name = f"{key}.jpg"
+        path = os.path.join(self.cache_dir, file_name)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            old = self.conn.execute("SELECT size FROM encoded_images WHERE cache_key = ?", (key,)).fetchone()
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO encoded_images "
+                    "(cache_key, source_path, file_name, size, width, height, tokens, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, source_path, file_name, len(data), width, height, tokens,
+                     datetime.datetime.now().isoformat(timespec="seconds"), time.time()),
+                )
+            self.total_bytes += len(data) - (old[0] if old else 0)
+            self._evict()
+
+    def _delete(self, key):
+        r = self.conn.execute("SELECT file_name, size FROM encoded_images WHERE cache_key = ?", (key,)).fetchone()
+        if r is None:
+            return
+        with self.conn:
+            self.conn.execute("DELETE FROM encoded_images WHERE cache_key = ?", (key,))
+        self.total_bytes -= r[1]
+        try:
+            os.remove(os.path.join(self.cache_dir, r[0]))
+        except OSError:
+            pass
+
+    def _evict(self):
+        if self.total_bytes <= self.max_bytes:
+            return
+        rows = self.conn.execute("SELECT cache_key FROM encoded_images ORDER BY last_access").fetchall()
+        for (key,) in rows:
+            if self.total_bytes <= self.max_bytes:
+                break
+            self._delete(key)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "total_bytes": self.total_bytes}
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -1,152 +1,625 @@
-import os
-import pandas as pd
-from dotenv import load_dotenv
-from openai import OpenAI
-import base64
-from pathlib import Path
-from PIL import Image
-import tiktoken
-import io
-
-load_dotenv()
-
-OUT_DIR = "dataset"
-CSV_PATH = os.path.join(OUT_DIR, "products.csv")
-OUTPUT_CSV_PATH = os.path.join(OUT_DIR, "products_with_description.csv")
-PROMPT_PATH = "prompts/description_generate_prompt.txt"
-
-MAX_INPUT_TOKENS = 128000
-MAX_REQUEST_SIZE_MB = 10
-
-START = 0
-END = 200
-
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise ValueError("OPENAI_API_KEY가 없습니다.")
-
-client = OpenAI(api_key=api_key)
-
-def load_prompt():
-    with open(PROMPT_PATH, "r", encoding="utf-8") as f:
-        return f.read().strip()
-
-def calculate_image_tokens(width, height):
-    if width <= 512 and height <= 512:
-        return 85
-    else:
-        w_tiles = (width + 511) // 512
-        h_tiles = (height + 511) // 512
-        return (w_tiles * h_tiles * 170) + 85
-
-def encode_and_measure_image(image_path, max_size=1024):
-    try:
-        with Image.open(image_path) as img:
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
-            img.thumbnail((max_size, max_size))
-            final_w, final_h = img.size
-            buffer = io.BytesIO()
-            img.save(buffer, format="JPEG", quality=85)
-            size_bytes = buffer.getbuffer().nbytes
-            base64_str = base64.b64encode(buffer.getvalue()).decode("utf-8")
-            tokens = calculate_image_tokens(final_w, final_h)
-            return base64_str, tokens, size_bytes
-    except Exception as e:
-        print(f"이미지 처리 실패: {image_path}, {e}")
-        return None, 0, 0
-
-def prepare_image_messages(image_paths, text_prompt):
-    encoding = tiktoken.encoding_for_model("gpt-4o-mini")
-    text_tokens = len(encoding.encode(text_prompt))
-    target_images = image_paths
-    image_messages = []
-    total_image_tokens = 0
-    total_image_size_mb = 0.0
-    for img_path in target_images:
-        full_path = os.path.join(OUT_DIR, img_path.strip())
-        if not os.path.exists(full_path):
-            continue
-        base64_image, tokens, size_bytes = encode_and_measure_image(full_path)
-        if base64_image:
-            size_mb = size_bytes / (1024 * 1024)
-            if total_image_size_mb + size_mb > MAX_REQUEST_SIZE_MB:
-                print(f"용량 제한 초과로 이미지 제외: {img_path}")
-                break
-            image_messages.append({
-                "type": "image_url",
-                "image_url": {
-                    "url": f"data:image/jpeg;base64,{base64_image}"
-                }
-            })
-            total_image_tokens += tokens
-            total_image_size_mb += size_mb
-    total_tokens = text_tokens + total_image_tokens
-    print(f"[사용량 예측]")
-    print(f"   - 이미지 수: {len(image_messages)}장 (리사이징 됨)")
-    print(f"   - 텍스트 토큰: {text_tokens:,}")
-    print(f"   - 이미지 토큰: {total_image_tokens:,}")
-    print(f"   - 총 합계 토큰: {total_tokens:,}")
-    print(f"   - 요청 데이터 크기: {total_image_size_mb:.2f} MB")
-    return image_messages
-
-def generate_description(name, category, image_paths, prompt_template):
-    if pd.isna(image_paths) or image_paths == "":
-        image_list = []
-    else:
-        image_list = [path.strip() for path in str(image_paths).split(";") if path.strip()]
-    prompt = prompt_template.format(name=name, category=category)
-    image_messages = prepare_image_messages(image_list, prompt)
-    messages = [
-        {
-            "role": "user",
-            "content": [
-                {"type": "text", "text": prompt},
-                *image_messages
-            ]
-        }
-    ]
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            max_tokens=600
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        print(f" GPT 오류 발생: {e}")
-        if hasattr(e, 'response') and e.response:
-             print(f"상세 정보: {e.response.json()}")
-        return ""
-
-def main():
-    print("상품 설명 생성 시작...")
-    prompt_template = load_prompt()
-    if not os.path.exists(CSV_PATH):
-        print(f"오류: {CSV_PATH} 파일이 없습니다.")
-        return
-    if os.path.exists(OUTPUT_CSV_PATH):
-        print(f"기존 작업 파일 발견: {OUTPUT_CSV_PATH}")
-        df_output = pd.read_csv(OUTPUT_CSV_PATH)
-    else:
-        print(f"새 작업 파일 생성 시작")
-        df_output = pd.read_csv(CSV_PATH)
-        df_output["description"] = ""
-    start = START
-    end = END if END is not None else len(df_output)
-    df_to_process = df_output.iloc[start:end]
-    for idx, row in df_to_process.iterrows():
-        print(f"\n[{idx}] 처리 중: {row['name'][:30]}...")
-        description = generate_description(row["name"], row["category"], row["features"], prompt_template)
-        df_output.at[idx, "description"] = description
-        if description:
-            print(f"--> 성공! (결과 길이: {len(description)}자)")
-        else:
-            print("--> 실패")
-        if (idx + 1) % 10 == 0:
-            df_output.to_csv(OUTPUT_CSV_PATH, index=False, encoding="utf-8-sig")
-    df_output.to_csv(OUTPUT_CSV_PATH, index=False, encoding="utf-8-sig")
-    print(f"\n저장 완료: {OUTPUT_CSV_PATH}")
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+import os
+import json
+import argparse
+import asyncio
+import time
+import pandas as pd
+from dotenv import load_dotenv
+from openai import OpenAI, AsyncOpenAI
+import base64
+from pathlib import Path
+from PIL import Image
+import io
+
+from rate_limiter import RateLimiter, call_with_backoff
+from encode_cache import EncodedImageCache, encode_cache_key
+from response_cache import ResponseCache, response_cache_key
+from product_store import load_products, feature_list
+from result_log import ResultLog, load_results, apply_results, compact_results
+from description_scheduler import FileHashIndex, row_fingerprint, schedule_rows
+from token_accounting import count_tokens, PromptTokenCounter, UsageEstimate
+from pipeline_metrics import PipelineMetrics, record_usage
+from image_planner import plan_images, DEFAULT_RESIZE_TARGETS
+from image_prefetch import ImagePrefetcher, resize_and_encode, DEFAULT_PREFETCH_WORKERS
+from batch_description import (
+    BatchFileWriter, batch_request_line, load_jobs, save_jobs, pending_jobs, archive_jobs,
+    submit_batch, wait_for_batch, read_batch_results, merge_batch_results,
+)
+
+load_dotenv()
+
+OUT_DIR = "dataset"
+CSV_PATH = os.path.join(OUT_DIR, "products.csv")
+OUTPUT_CSV_PATH = os.path.join(OUT_DIR, "products_with_description.csv")
+# --parquet: 크롤러가 만든 category 분할 Parquet 데이터셋을 입력으로 쓰고 결과도 분할 Parquet으로 저장
+INPUT_PARQUET_PATH = os.path.join(OUT_DIR, "products_parquet")
+OUTPUT_PARQUET_PATH = os.path.join(OUT_DIR, "products_with_description.parquet")
+# 생성 결과를 한 건씩 바로 추가 기록하는 로그 (재실행 시 여기 성공 기록이 있는 상품은 건너뜀)
+RESULT_LOG_PATH = os.path.join(OUT_DIR, "description_log.jsonl")
+# 이미지 파일 해시 메모 (mtime/크기가 같으면 다시 읽지 않음)
+FILE_HASH_INDEX_PATH = os.path.join(OUT_DIR, "file_hashes.sqlite3")
+
+# 생성 대상 선정: 새 상품 / 입력(상품명, 카테고리, crawled_at, 이미지 해시)이 바뀐 상품 / 이전에 실패한 상품만 처리
+PRIORITY_KEY = "category"  # 이 컬럼 기준으로 먼저 처리 (None이면 파일 순서)
+PRIORITY_ORDER = []        # 먼저 처리할 값 순서 (예: ["뷰티", "식품"]), 나머지는 값 오름차순
+PROMPT_PATH = "prompts/description_generate_prompt.txt"
+
+MODEL = "gpt-4o-mini"
+MAX_TOKENS = 600
+MAX_INPUT_TOKENS = 128000
+MAX_REQUEST_SIZE_MB = 10
+IMAGE_MAX_SIZE = 1024
+JPEG_QUALITY = 85
+
+# 요청당 이미지 예산 (인코딩 전에 헤더만 읽어 들어갈 이미지와 리사이즈 기준 결정)
+# None이면 입력 한도(MAX_INPUT_TOKENS)에서 프롬프트와 MAX_TOKENS를 뺀 나머지까지 사용 (용량은 MAX_REQUEST_SIZE_MB 기준).
+# 값을 주면(--image-token-budget) 요청당 이미지 토큰을 그 이하로 제한
+IMAGE_TOKEN_BUDGET = None
+RESIZE_TARGETS = [IMAGE_MAX_SIZE] + [s for s in DEFAULT_RESIZE_TARGETS if s < IMAGE_MAX_SIZE]
+
+# 리사이즈/재인코딩한 이미지 캐시 (재실행 시 Pillow 작업 생략)
+ENCODE_CACHE_DIR = os.path.join(OUT_DIR, "encode_cache")
+ENCODE_CACHE_MAX_MB = 2048
+USE_ENCODE_CACHE = True
+
+# 생성 결과 캐시 (모델, max_tokens, 프롬프트, 이미지 해시가 같으면 API 호출 없이 재사용)
+RESPONSE_CACHE_PATH = os.path.join(OUT_DIR, "response_cache.sqlite3")
+USE_RESPONSE_CACHE = True
+
+# 다음 행 이미지를 별도 프로세스에서 미리 인코딩 (API 요청과 Pillow 작업을 겹쳐서 실행)
+USE_PREFETCH = True
+PREFETCH_WORKERS = DEFAULT_PREFETCH_WORKERS
+PREFETCH_WINDOW = 8       # 미리 인코딩해 둘 최대 행 수 (메모리 상한)
+
+# 동시 생성 모드 설정 (async)
+MODE = "sync"             # "sync": 한 건씩 / "async": 동시 요청 / "batch": Batch API 일괄 제출
+CONCURRENCY = 8           # 동시에 보내는 요청 수
+RPM_LIMIT = 500           # 분당 요청 수 제한
+TPM_LIMIT = 200000        # 분당 토큰 수 제한 (입력 예상 토큰 + max_tokens 기준)
+MAX_RETRIES = 5           # 429 / 5xx 재시도 횟수
+
+# Batch 모드 설정 (입력 JSONL과 제출한 batch id 기록 위치)
+BATCH_DIR = os.path.join(OUT_DIR, "batch")
+BATCH_JOBS_PATH = os.path.join(BATCH_DIR, "batch_jobs.json")
+BATCH_CACHE_KEYS_PATH = os.path.join(BATCH_DIR, "batch_cache_keys.json")
+BATCH_POLL_INTERVAL = 30
+
+# 행 단위 지표 (span JSONL, 종료 시 요약 JSON). METRICS_PORT를 정하면 /metrics로 Prometheus 텍스트 노출
+METRICS_DIR = os.path.join(OUT_DIR, "metrics")
+METRICS_SPANS_PATH = os.path.join(METRICS_DIR, "description_spans.jsonl")
+METRICS_SUMMARY_PATH = os.path.join(METRICS_DIR, "description_summary.json")
+METRICS_PORT = None
+
+START = 0
+END = 200
+
+api_key = os.getenv("OPENAI_API_KEY")
+# --dry-run은 API 키 없이도 실행되도록 키 확인은 main()에서
+client = OpenAI(api_key=api_key) if api_key else None
+
+def load_prompt():
+    with open(PROMPT_PATH, "r", encoding="utf-8") as f:
+        return f.read().strip()
+
+def calculate_image_tokens(width, height):
+    if width <= 512 and height <= 512:
+        return 85
+    else:
+        w_tiles = (width + 511) // 512
+        h_tiles = (height + 511) // 512
+        return (w_tiles * h_tiles * 170) + 85
+
+_encode_cache = None
+
+def get_encode_cache():
+    global _encode_cache
+    if _encode_cache is None and USE_ENCODE_CACHE:
+        _encode_cache = EncodedImageCache(ENCODE_CACHE_DIR, ENCODE_CACHE_MAX_MB * 1024 * 1024)
+    return _encode_cache
+
+_response_cache = None
+_file_hashes = None
+
+def get_file_hashes():
+    global _file_hashes
+    if _file_hashes is None:
+        _file_hashes = FileHashIndex(FILE_HASH_INDEX_PATH)
+    return _file_hashes
+
+def image_hashes(image_paths):
+    return [get_file_hashes().sha256(p) for p in existing_image_paths(image_paths)]
+
+def description_fingerprint(row):
+    return row_fingerprint(row, image_hashes(row["features"]))
+
+def get_response_cache():
+    global _response_cache
+    if _response_cache is None and USE_RESPONSE_CACHE:
+        _response_cache = ResponseCache(RESPONSE_CACHE_PATH)
+    return _response_cache
+
+def description_cache_key(name, category, image_paths, prompt_template):
+    # 원본 이미지 내용 해시 기준이라 파일을 다시 받아도 내용이 같으면 같은 키
+    prompt = prompt_template.format(name=name, category=category)
+    image_settings = {"resize_targets": RESIZE_TARGETS, "quality": JPEG_QUALITY,
+                      "max_request_mb": MAX_REQUEST_SIZE_MB, "token_budget": IMAGE_TOKEN_BUDGET}
+    return response_cache_key(MODEL, MAX_TOKENS, prompt, image_hashes(image_paths), image_settings)
+
+def encode_and_measure_image(image_path, max_size=IMAGE_MAX_SIZE, quality=JPEG_QUALITY):
+    try:
+        cache = get_encode_cache()
+        key = encode_cache_key(image_path, max_size, quality) if cache else None
+        cached = cache.get(key) if cache else None
+        if cached:
+            data, tokens = cached["data"], cached["tokens"]
+        else:
+            data, final_w, final_h = resize_and_encode(image_path, max_size, quality)
+            tokens = calculate_image_tokens(final_w, final_h)
+            if cache:
+                cache.put(key, image_path, data, final_w, final_h, tokens)
+        base64_str = base64.b64encode(data).decode("utf-8")
+        return base64_str, tokens, len(data)
+    except Exception as e:
+        print(f"이미지 처리 실패: {image_path}, {e}")
+        return None, 0, 0
+
+def parse_image_list(image_paths):
+    # CSV의 세미콜론 구분 문자열과 Parquet의 리스트 모두 처리
+    return feature_list(image_paths)
+
+def existing_image_paths(image_paths):
+    # features 값에서 실제로 존재하는 이미지의 전체 경로 목록
+    full_paths = [os.path.join(OUT_DIR, p) for p in parse_image_list(image_paths)]
+    return [p for p in full_paths if os.path.exists(p)]
+
+_prompt_counters = {}
+
+def count_text_tokens(text):
+    return count_tokens(MODEL, text)
+
+def prompt_tokens(prompt_template, name, category):
+    # 템플릿 고정 부분은 한 번만 토큰화하고 행마다 name/category만 토큰화
+    counter = _prompt_counters.get(prompt_template)
+    if counter is None:
+        counter = _prompt_counters[prompt_template] = PromptTokenCounter(MODEL, prompt_template)
+    return counter.count(name=name, category=category)
+
+def image_token_budget(text_tokens):
+    remaining = MAX_INPUT_TOKENS - MAX_TOKENS - text_tokens
+    return remaining if IMAGE_TOKEN_BUDGET is None else min(IMAGE_TOKEN_BUDGET, remaining)
+
+def plan_row_images(image_list, text_tokens):
+    # 토큰/용량 예산 안에 들어갈 이미지와 리사이즈 기준 결정 (헤더만 읽음)
+    candidates = []
+    for img_path in image_list:
+        full_path = os.path.join(OUT_DIR, img_path.strip())
+        if os.path.exists(full_path):
+            candidates.append((img_path, full_path))
+    return plan_images(candidates, calculate_image_tokens, image_token_budget(text_tokens),
+                       MAX_REQUEST_SIZE_MB * 1024 * 1024, RESIZE_TARGETS)
+
+def row_image_jobs(row, prompt_template, response_cache=None):
+    # 프리페치용: 계획에 포함된 이미지 경로와 리사이즈 기준 (응답 캐시에 있는 행은 인코딩하지 않음)
+    if response_cache and response_cache.contains(
+            description_cache_key(row["name"], row["category"], row["features"], prompt_template)):
+        return [], None
+    text_tokens = prompt_tokens(prompt_template, row["name"], row["category"])
+    plan = plan_row_images(parse_image_list(row["features"]), text_tokens)
+    return [image["full_path"] for image in plan["images"]], plan["max_size"]
+
+def prepare_image_messages(image_paths, text_prompt, encoded=None, text_tokens=None):
+    # encoded: 미리 인코딩된 결과 {전체 경로: (base64, 토큰, 바이트)} (없으면 여기서 인코딩)
+    if text_tokens is None:
+        text_tokens = count_text_tokens(text_prompt)
+    plan = plan_row_images(image_paths, text_tokens)
+    image_messages = []
+    total_image_tokens = 0
+    total_image_size_mb = 0.0
+    for image in plan["images"]:
+        img_path, full_path = image["rel_path"], image["full_path"]
+        if encoded is not None and full_path in encoded:
+            base64_image, tokens, size_bytes = encoded[full_path]
+        else:
+            base64_image, tokens, size_bytes = encode_and_measure_image(full_path, plan["max_size"])
+        if base64_image:
+            size_mb = size_bytes / (1024 * 1024)
+            if total_image_size_mb + size_mb > MAX_REQUEST_SIZE_MB:
+                print(f"용량 제한 초과로 이미지 제외: {img_path}")
+                break
+            image_messages.append({
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:image/jpeg;base64,{base64_image}"
+                }
+            })
+            total_image_tokens += tokens
+            total_image_size_mb += size_mb
+    total_tokens = text_tokens + total_image_tokens
+    print(f"[사용량 예측]")
+    print(f"   - 이미지 수: {len(image_messages)}장 (리사이징 기준 {plan['max_size']}px, 제외 {len(plan['dropped'])}장)")
+    print(f"   - 텍스트 토큰: {text_tokens:,}")
+    print(f"   - 이미지 토큰: {total_image_tokens:,}")
+    print(f"   - 총 합계 토큰: {total_tokens:,}")
+    print(f"   - 요청 데이터 크기: {total_image_size_mb:.2f} MB")
+    return image_messages, total_tokens
+
+def build_messages(name, category, image_paths, prompt_template, encoded=None):
+    # 요청 메시지와 예상 입력 토큰 수 반환
+    image_list = parse_image_list(image_paths)
+    prompt = prompt_template.format(name=name, category=category)
+    text_tokens = prompt_tokens(prompt_template, name, category)
+    image_messages, estimated_tokens = prepare_image_messages(image_list, prompt, encoded, text_tokens)
+    messages = [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": prompt},
+                *image_messages
+            ]
+        }
+    ]
+    return messages, estimated_tokens
+
+def print_gpt_error(e):
+    print(f" GPT 오류 발생: {e}")
+    if hasattr(e, 'response') and e.response:
+        try:
+            print(f"상세 정보: {e.response.json()}")
+        except Exception:
+            pass
+
+def generate_description(name, category, image_paths, prompt_template, encoded=None, span=None):
+    # span: 단계별 시간/토큰/오류를 채워 넣을 지표 dict (pipeline_metrics.new_span)
+    span = span if span is not None else {}
+    cache = get_response_cache()
+    cache_key = description_cache_key(name, category, image_paths, prompt_template) if cache else None
+    cached = cache.get(cache_key) if cache else None
+    if cached:
+        print("--> 캐시된 응답 사용")
+        span["cache_hit"] = True
+        return cached
+    started = time.monotonic()
+    messages, estimated_tokens = build_messages(name, category, image_paths, prompt_template, encoded)
+    span["encode_sec"] = time.monotonic() - started
+    span["estimated_tokens"] = estimated_tokens
+    started = time.monotonic()
+    try:
+        response = client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            max_tokens=MAX_TOKENS
+        )
+        description = response.choices[0].message.content.strip()
+    except Exception as e:
+        span["error"] = type(e).__name__
+        print_gpt_error(e)
+        return ""
+    finally:
+        span["request_sec"] = time.monotonic() - started
+    record_usage(span, response)
+    if cache:
+        cache.put(cache_key, MODEL, description)
+    return description
+
+async def generate_description_async(async_client, limiter, name, category, image_paths, prompt_template,
+                                     encoded=None, span=None):
+    span = span if span is not None else {}
+    cache = get_response_cache()
+    cache_key = None
+    if cache:
+        cache_key = await asyncio.to_thread(description_cache_key, name, category, image_paths, prompt_template)
+        cached = cache.get(cache_key)
+        if cached:
+            print(f"--> 캐시된 응답 사용: {name[:30]}")
+            span["cache_hit"] = True
+            return cached
+
+    # 이미지 인코딩은 CPU 작업이라 이벤트 루프를 막지 않도록 스레드에서 실행
+    started = time.monotonic()
+    messages, estimated_tokens = await asyncio.to_thread(
+        build_messages, name, category, image_paths, prompt_template, encoded)
+    span["encode_sec"] = time.monotonic() - started
+    span["estimated_tokens"] = estimated_tokens
+
+    async def call():
+        # 재시도마다 요청/토큰 버킷을 다시 통과
+        await limiter.acquire(estimated_tokens + MAX_TOKENS)
+        return await async_client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            max_tokens=MAX_TOKENS
+        )
+
+    def on_retry(attempt, delay, e):
+        span["retries"] = attempt
+        print(f" 재시도 {attempt}/{MAX_RETRIES} ({delay:.1f}초 후): {e}")
+
+    # request_sec은 속도 제한 대기와 재시도 대기를 포함한 시간
+    started = time.monotonic()
+    try:
+        response = await call_with_backoff(call, max_retries=MAX_RETRIES, on_retry=on_retry)
+        description = response.choices[0].message.content.strip()
+    except Exception as e:
+        span["error"] = type(e).__name__
+        print_gpt_error(e)
+        return ""
+    finally:
+        span["request_sec"] = time.monotonic() - started
+    record_usage(span, response)
+    if cache:
+        cache.put(cache_key, MODEL, description)
+    return description
+
+async def generate_all_async(df_output, rows, prompt_template, result_log, metrics, concurrency=CONCURRENCY):
+    # 최대 concurrency개의 요청을 동시에 보내고, 끝나는 즉시 결과 반영/기록
+    async_client = AsyncOpenAI(api_key=api_key, max_retries=0)
+    limiter = RateLimiter(RPM_LIMIT, TPM_LIMIT)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def process(idx, row, encoded):
+        span = metrics.start_span(row["product_id"], "async")
+        try:
+            print(f"\n[{idx}] 처리 중: {row['name'][:30]}...")
+            description = await generate_description_async(
+                async_client, limiter, row["name"], row["category"], row["features"], prompt_template,
+                encoded, span)
+        finally:
+            semaphore.release()
+        df_output.at[idx, "description"] = description
+        # 기록마다 fsync 하므로 이벤트 루프를 막지 않도록 스레드에서 실행
+        await asyncio.to_thread(result_log.append, row["product_id"], description, "async")
+        metrics.finish(span, description)
+        if description:
+            print(f"[{idx}] --> 성공! (결과 길이: {len(description)}자)")
+        else:
+            print(f"[{idx}] --> 실패")
+
+    tasks = []
+    try:
+        # 요청 슬롯이 빌 때마다 다음 행을 꺼냄 (행 반복자가 이미지 인코딩으로 막힐 수 있어 스레드에서 호출)
+        while True:
+            await semaphore.acquire()
+            item = await asyncio.to_thread(next, rows, None)
+            if item is None:
+                semaphore.release()
+                break
+            tasks.append(asyncio.create_task(process(*item)))
+        await asyncio.gather(*tasks)
+    finally:
+        await async_client.close()
+
+def write_batch_input(df_output, rows, prompt_template, result_log, metrics):
+    # 행마다 메시지를 만들어 product_id를 custom_id로 JSONL에 기록 (캐시된 응답이 있는 행은 바로 채우고 제외)
+    writer = BatchFileWriter(BATCH_DIR)
+    cache = get_response_cache()
+    cache_keys = {}
+    seen = set()
+    cached_count = 0
+    try:
+        for idx, row, encoded in rows:
+            product_id = str(row["product_id"])
+            if product_id in seen:
+                print(f"[WARNING] 중복 product_id 건너뜀: {product_id}")
+                continue
+            seen.add(product_id)
+            if cache:
+                cache_key = description_cache_key(row["name"], row["category"], row["features"], prompt_template)
+                cached = cache.get(cache_key)
+                if cached:
+                    df_output.at[idx, "description"] = cached
+                    result_log.append(product_id, cached, "batch")
+                    span = metrics.start_span(product_id, "batch")
+                    span["cache_hit"] = True
+                    metrics.finish(span, cached)
+                    cached_count += 1
+                    continue
+                cache_keys[product_id] = cache_key
+            print(f"\n[{idx}] batch 입력 작성: {row['name'][:30]}...")
+            messages, _ = build_messages(row["name"], row["category"], row["features"], prompt_template, encoded)
+            writer.write(batch_request_line(product_id, MODEL, messages, MAX_TOKENS))
+    finally:
+        writer.close()
+    if cache:
+        # 새 제출마다 다시 씀 (이전 batch의 키가 남지 않도록 비어 있어도 기록)
+        with open(BATCH_CACHE_KEYS_PATH, "w", encoding="utf-8") as f:
+            json.dump(cache_keys, f)
+    print(f"[INFO] batch 입력 {len(seen) - cached_count}건 (캐시 사용 {cached_count}건), "
+          f"파일 {len(writer.paths)}개 작성")
+    return writer.paths
+
+def generate_all_batch(df_output, rows, prompt_template, result_log, metrics, poll_interval=BATCH_POLL_INTERVAL):
+    """
+    Batch API로 일괄 생성: 입력 JSONL 작성 -> 업로드/제출 -> 완료까지 폴링 -> product_id 기준 병합.
+    BATCH_JOBS_PATH에 아직 병합하지 않은 batch가 있으면 새로 제출하지 않고 그 batch들의 결과를 기다림.
+    모두 병합된 기록은 batch_jobs_<시각>.json으로 옮기고 새로 제출
+    """
+    jobs = load_jobs(BATCH_JOBS_PATH)
+    if pending_jobs(jobs):
+        print(f"[INFO] 이전에 제출한 batch {len(jobs)}개 중 미완료 {len(pending_jobs(jobs))}개 이어서 확인")
+    else:
+        if jobs:
+            print(f"[INFO] 이전 batch 기록은 모두 병합됨 -> {archive_jobs(BATCH_JOBS_PATH)}로 옮기고 새로 제출")
+        jobs = []
+        for input_path in write_batch_input(df_output, rows, prompt_template, result_log, metrics):
+            jobs.append({"input_path": input_path, "batch_id": submit_batch(client, input_path), "merged": False})
+            save_jobs(BATCH_JOBS_PATH, jobs)
+
+    cache = get_response_cache()
+    cache_keys = {}
+    if cache and os.path.exists(BATCH_CACHE_KEYS_PATH):
+        with open(BATCH_CACHE_KEYS_PATH, "r", encoding="utf-8") as f:
+            cache_keys = json.load(f)
+
+    def on_merged(product_id, description):
+        result_log.append(product_id, description, "batch")
+        # batch는 요청별 지연시간이 없으므로 성공/실패만 집계
+        metrics.finish(metrics.start_span(product_id, "batch"), description)
+        if description and product_id in cache_keys:
+            cache.put(cache_keys[product_id], MODEL, description)
+
+    for job in pending_jobs(jobs):
+        batch = wait_for_batch(client, job["batch_id"], poll_interval)
+        if batch.status != "completed":
+            print(f"[ERROR] batch {job['batch_id']} 종료 상태: {batch.status}")
+        results = read_batch_results(client, batch)
+        _, success = merge_batch_results(df_output, results, on_merged)
+        print(f"[INFO] batch {job['batch_id']}: 결과 {len(results)}건 중 성공 {success}건 병합")
+        job["merged"] = True
+        save_jobs(BATCH_JOBS_PATH, jobs)
+
+def products_source(parquet=False):
+    return INPUT_PARQUET_PATH if parquet and os.path.isdir(INPUT_PARQUET_PATH) else CSV_PATH
+
+def select_categories(df, categories, parquet=False):
+    # 지정한 카테고리 상품만 남김 (Parquet이면 해당 category 폴더의 product_id 컬럼만 읽어서 비교)
+    if not categories:
+        return df
+    source = products_source(parquet)
+    if source != INPUT_PARQUET_PATH:
+        return df[df["category"].isin(list(categories))]
+    ids = load_products(source, columns=["product_id"], filters=[("category", "in", list(categories))])["product_id"]
+    return df[df["product_id"].astype(str).isin(set(ids.astype(str)))]
+
+def load_output_frame(parquet=False):
+    """
+    최신 products.csv(--parquet이면 products_parquet/)를 기준으로 출력 프레임 구성 + 결과 로그 로드.
+    로그 도입 전에 만든 products_with_description.csv의 description은 완료 기록(fingerprint 없음)으로 취급
+    """
+    df_output = load_products(products_source(parquet))
+    df_output["description"] = ""
+    results = load_results(RESULT_LOG_PATH)
+    if os.path.exists(OUTPUT_CSV_PATH):
+        df_previous = load_products(OUTPUT_CSV_PATH, columns=["product_id", "description"])
+        legacy = 0
+        if "description" in df_previous.columns:
+            for product_id, description in zip(df_previous["product_id"], df_previous["description"]):
+                product_id = str(product_id)
+                if product_id not in results and pd.notna(description) and description:
+                    results[product_id] = {"product_id": product_id, "description": description,
+                                           "status": "ok", "fingerprint": None}
+                    legacy += 1
+        if legacy:
+            print(f"[INFO] 기존 {OUTPUT_CSV_PATH}의 description {legacy}건을 완료로 처리")
+    apply_results(df_output, results)
+    return df_output, results
+
+def compact_only(parquet=False):
+    # 생성 중 종료된 경우 등 로그만 최종 파일로 합칠 때 사용
+    df_output, results = load_output_frame(parquet)
+    compact_results(df_output, results, OUTPUT_CSV_PATH, OUTPUT_PARQUET_PATH if parquet else None)
+    print(f"[INFO] 결과 로그 {len(results)}건을 합쳐 저장: {OUTPUT_CSV_PATH}")
+
+def dry_run(df_to_process, prompt_template):
+    # API 호출/이미지 인코딩 없이 토큰 수와 비용만 예측 (이미지는 헤더만 읽어 계획)
+    estimate = UsageEstimate(MODEL, MAX_TOKENS)
+    for _, row in df_to_process.iterrows():
+        text_tokens = prompt_tokens(prompt_template, row["name"], row["category"])
+        plan = plan_row_images(parse_image_list(row["features"]), text_tokens)
+        estimate.add(text_tokens, plan["tokens"], len(plan["images"]), len(plan["dropped"]),
+                     plan["bytes"], group=row["category"])
+    return estimate.report()
+
+def main(mode=MODE, concurrency=CONCURRENCY, parquet=False, dry=False, metrics_port=METRICS_PORT, categories=None):
+    print("상품 설명 생성 시작...")
+    if not api_key and not dry:
+        raise ValueError("OPENAI_API_KEY가 없습니다.")
+    prompt_template = load_prompt()
+    if not os.path.exists(products_source(parquet)):
+        print(f"오류: {products_source(parquet)} 파일이 없습니다.")
+        return
+
+    # 최신 products.csv와 결과 로그를 비교해 새 상품 / 바뀐 상품 / 실패했던 상품만 처리
+    df_output, results = load_output_frame(parquet)
+    if results:
+        print(f"[INFO] 결과 로그 {len(results)}건 확인: {RESULT_LOG_PATH}")
+    start = START
+    end = END if END is not None else len(df_output)
+    df_range = select_categories(df_output.iloc[start:end], categories, parquet)
+    df_to_process, fingerprints, reasons = schedule_rows(
+        df_range, results, description_fingerprint, PRIORITY_KEY, PRIORITY_ORDER)
+    print(f"[INFO] 대상 {len(df_range)}행 중 {len(df_to_process)}행 처리 "
+          f"(새 상품 {reasons['new']}, 변경 {reasons['changed']}, 이전 실패 {reasons['failed']}), "
+          f"{len(df_range) - len(df_to_process)}행은 변경 없음")
+    if dry:
+        dry_run(df_to_process, prompt_template)
+        return
+
+    prefetcher = None
+    if USE_PREFETCH:
+        prefetcher = ImagePrefetcher(calculate_image_tokens, JPEG_QUALITY, get_encode_cache(),
+                                     workers=PREFETCH_WORKERS, window=PREFETCH_WINDOW)
+        response_cache = get_response_cache()
+        rows = prefetcher.iterate(df_to_process.iterrows(),
+                                  lambda row: row_image_jobs(row, prompt_template, response_cache))
+    else:
+        rows = ((idx, row, None) for idx, row in df_to_process.iterrows())
+
+    result_log = ResultLog(RESULT_LOG_PATH, fingerprints)
+    metrics = PipelineMetrics(METRICS_SPANS_PATH)
+    if metrics_port:
+        metrics.serve(metrics_port)
+    try:
+        if mode == "async":
+            print(f"동시 생성 모드: 동시 요청 {concurrency}개, RPM {RPM_LIMIT}, TPM {TPM_LIMIT:,}")
+            asyncio.run(generate_all_async(df_output, rows, prompt_template, result_log, metrics, concurrency))
+        elif mode == "batch":
+            generate_all_batch(df_output, rows, prompt_template, result_log, metrics)
+        else:
+            for idx, row, encoded in rows:
+                print(f"\n[{idx}] 처리 중: {row['name'][:30]}...")
+                span = metrics.start_span(row["product_id"], "sync")
+                description = generate_description(
+                    row["name"], row["category"], row["features"], prompt_template, encoded, span)
+                df_output.at[idx, "description"] = description
+                result_log.append(row["product_id"], description, "sync")
+                metrics.finish(span, description)
+                if description:
+                    print(f"--> 성공! (결과 길이: {len(description)}자)")
+                else:
+                    print("--> 실패")
+    finally:
+        if prefetcher:
+            prefetcher.close()
+        result_log.close()
+        metrics.report(METRICS_SUMMARY_PATH)
+        metrics.close()
+
+    # 로그를 합쳐 최종 파일 저장 (중간 저장 없이 마지막에 한 번만)
+    df_output, results = load_output_frame(parquet)
+    compact_results(df_output, results, OUTPUT_CSV_PATH, OUTPUT_PARQUET_PATH if parquet else None)
+    print(f"\n저장 완료: {OUTPUT_CSV_PATH}" + (f", {OUTPUT_PARQUET_PATH}" if parquet else ""))
+    if _encode_cache:
+        stats = _encode_cache.stats()
+        print(f"[INFO] 이미지 인코딩 캐시: 적중 {stats['hits']}건, 미스 {stats['misses']}건, "
+              f"캐시 용량 {stats['total_bytes'] / (1024 * 1024):.1f} MB")
+        _encode_cache.close()
+    if _response_cache:
+        stats = _response_cache.stats()
+        print(f"[INFO] 응답 캐시: 적중 {stats['hits']}건, 미스 {stats['misses']}건")
+        _response_cache.close()
+    if _file_hashes:
+        _file_hashes.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["sync", "async", "batch"], default=MODE,
+                        help="sync: 한 건씩 생성 / async: 동시 요청 + RPM·TPM 제한 / batch: Batch API 일괄 제출")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="async 모드 동시 요청 수")
+    parser.add_argument("--parquet", action="store_true",
+                        help="products_parquet/이 있으면 입력으로 사용하고 최종 결과를 category 분할 Parquet으로도 저장 (pyarrow 필요)")
+    parser.add_argument("--category", action="append", dest="categories",
+                        help="해당 카테고리 상품만 생성 (여러 번 지정 가능, Parquet이면 해당 폴더만 읽음)")
+    parser.add_argument("--compact-only", action="store_true", help="API 호출 없이 결과 로그만 합쳐서 저장")
+    parser.add_argument("--dry-run", action="store_true", help="API 호출 없이 남은 행의 토큰 수/비용만 예측")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT,
+                        help="실행 중 http://127.0.0.1:<port>/metrics 로 Prometheus 지표 노출")
+    parser.add_argument("--image-token-budget", type=int,
+                        help="요청당 이미지 토큰 상한 (기본: 입력 한도에서 프롬프트와 max_tokens를 뺀 나머지)")
+    args = parser.parse_args()
+    if args.image_token_budget:
+        IMAGE_TOKEN_BUDGET = args.image_token_budget
+    if args.compact_only:
+        compact_only(parquet=args.parquet)
+    else:
+        main(mode=args.mode, concurrency=args.concurrency, parquet=args.parquet, dry=args.dry_run,
+             metrics_port=args.metrics_port, categories=args.categories)
\ No newline at end of file
@@ -0,0 +1,89 @@
+import datetime
+import hashlib
+import sqlite3
+import threading
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS image_cache (
+    url            TEXT NOT NULL,
+    rel_path       TEXT NOT NULL,
+    etag           TEXT,
+    last_modified  TEXT,
+    sha256         TEXT,
+    size           INTEGER,
+    updated_at     TEXT NOT NULL,
+    PRIMARY KEY (url, rel_path)
+);
+"""
+
+
+def file_sha256(path, chunk_size=64 * 1024):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ImageFetchCache:
+    """
+    이미지 (URL, 저장 경로)별 검증값 캐시 (dataset/image_cache.sqlite3).
+
+    ETag / Last-Modified / SHA-256 / 크기를 기록해 두고,
+    다음 크롤링 때 조건부 요청(If-None-Match / If-Modified-Since)에 사용.
+    여러 상품이 같은 URL(브랜드 배너, 배송 안내 등)을 각자 폴더에 저장해도 상품별 기록이 서로 덮어쓰지 않음
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._drop_url_only_table()
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+    def _drop_url_only_table(self):
+        # 이전 스키마(url 단일 키)는 상품별 기록이 덮어써지므로 비우고 다시 생성 (검증값 캐시라 다음 실행에서 다시 채워짐)
+        pk = [row[1] for row in self.conn.execute("PRAGMA table_info(image_cache)") if row[5]]
+        if pk == ["url"]:
+            self.conn.execute("DROP TABLE image_cache")
+
+    def get(self, url, rel_path=None):
+        # rel_path가 없으면 해당 URL의 가장 최근 기록 (content-addressed 저장은 경로가 내용 해시로 정해짐)
+        with self._lock:
+            if rel_path is None:
+                cur = self.conn.execute(
+                    "SELECT rel_path, etag, last_modified, sha256, size FROM image_cache WHERE url = ? "
+                    "ORDER BY updated_at DESC, rowid DESC LIMIT 1", (url,))
+            else:
+                cur = self.conn.execute(
+                    "SELECT rel_path, etag, last_modified, sha256, size FROM image_cache "
+                    "WHERE url = ? AND rel_path = ?", (url, rel_path))
+            r = cur.fetchone()
+        if r is None:
+            return None
+        return {"rel_path": r[0], "etag": r[1], "last_modified": r[2], "sha256": r[3], "size": r[4]}
+
+    def put(self, url, rel_path, etag, last_modified, sha256, size):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO image_cache (url, rel_path, etag, last_modified, sha256, size, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, rel_path, etag, last_modified, sha256, size,
+                 datetime.datetime.now().isoformat(timespec="seconds")),
+            )
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def conditional_headers(entry):
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
@@ -0,0 +1,395 @@
+import functools
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from image_cache import conditional_headers, file_sha256
+from stats_util import percentile
+
+
+DOWNLOAD_WORKERS = 8        # 동시 다운로드 스레드 수
+PER_HOST_LIMIT = 4          # 호스트별 동시 연결 수 제한
+REQUEST_TIMEOUT = 20
+MAX_IMAGE_BYTES = 30 * 1024 * 1024  # 이미지 1장 최대 크기
+CHUNK_SIZE = 64 * 1024              # 스트리밍 청크 크기
+USER_AGENT = "Mozilla/5.0"
+
+# 이미지 저장 방식
+LAYOUT_PRODUCT = "product"  # images/<product_id>/main.jpg, detail1.jpg ...
+LAYOUT_CAS = "cas"          # images/blobs/<sha256 앞 2자리>/<sha256>.jpg + images/<product_id>/manifest.json
+MANIFEST_NAME = "manifest.json"
+
+
+def image_columns(results):
+    # 다운로드 결과를 CSV의 image_path / features / detail_image_count 값으로 변환 (실패한 이미지는 제외)
+    main_image_path = ""
+    detail_image_paths = []
+    for result in results:
+        if not result or not result["rel_path"]:
+            continue
+        if result["img_name"] == "main":
+            main_image_path = result["rel_path"]
+        else:
+            detail_image_paths.append(result["rel_path"])
+    return {
+        "image_path": main_image_path,
+        "features": "; ".join(detail_image_paths),
+        "detail_image_count": len(detail_image_paths),
+    }
+
+
+
+def blob_rel_path(sha256, ext):
+    # content-addressed 저장 경로: images/blobs/<해시 앞 2자리>/<해시><확장자>
+    return f"images/blobs/{sha256[:2]}/{sha256}{ext}"
+
+
+class DownloadStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.total_bytes = 0
+        self.failed = 0
+        self.reused = 0
+        self.cache_results = {}
+        self.first_start = None
+        self.last_end = None
+
+    def record(self, started, ended, nbytes=0, ok=True, cache="miss"):
+        with self._lock:
+            if ok:
+                self.latencies.append(ended - started)
+                self.total_bytes += nbytes
+                self.cache_results[cache] = self.cache_results.get(cache, 0) + 1
+            else:
+                self.failed += 1
+            if self.first_start is None or started < self.first_start:
+                self.first_start = started
+            if self.last_end is None or ended > self.last_end:
+                self.last_end = ended
+
+    def record_reuse(self):
+        # 같은 실행에서 이미 받은 URL을 요청 없이 재사용
+        with self._lock:
+            self.reused += 1
+
+    def summary(self):
+        with self._lock:
+            elapsed = (self.last_end - self.first_start) if self.first_start is not None else 0.0
+            hits = self.cache_results.get("not_modified", 0) + self.cache_results.get("hash_match", 0) + self.reused
+            lookups = len(self.latencies) + self.reused
+            return {
+                "downloaded": len(self.latencies),
+                "failed": self.failed,
+                "total_bytes": self.total_bytes,
+                "elapsed_sec": round(elapsed, 3),
+                "bytes_per_sec": round(self.total_bytes / elapsed, 1) if elapsed > 0 else 0.0,
+                "latency_p50": round(percentile(self.latencies, 50), 3),
+                "latency_p90": round(percentile(self.latencies, 90), 3),
+                "latency_p99": round(percentile(self.latencies, 99), 3),
+                "cache_not_modified": self.cache_results.get("not_modified", 0),
+                "cache_hash_match": self.cache_results.get("hash_match", 0),
+                "cache_reused": self.reused,
+                "cache_hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+class ImageDownloader:
+    """
+    parse_product_detail이 만든 (img_name, img_url) 목록을 백그라운드에서 병렬 다운로드.
+
+    - keep-alive 커넥션 풀을 공유하는 requests.Session 사용
+    - 호스트별 동시 연결 수 제한 (PER_HOST_LIMIT)
+    - 응답은 청크 단위로 임시 파일에 스트리밍 후 원자적으로 rename (다운로드당 메모리 사용량 고정)
+    - Content-Length 및 실제 수신 크기가 max_bytes를 넘으면 중단
+    - cache(ImageFetchCache)가 있으면 ETag / Last-Modified 조건부 요청 + SHA-256 비교로 재다운로드 생략
+    - layout="cas"면 이미지를 해시 기준으로 images/blobs/에 한 번만 저장하고
+      상품 폴더에는 manifest.json만 기록 (여러 상품이 공유하는 배너 중복 제거)
+    - submit()은 바로 반환되므로 브라우저는 다음 상품 페이지를 로드하는 동안 다운로드가 진행됨
+    - 상품별 다운로드가 모두 끝나면 submit()의 on_complete 콜백으로 결과 전달
+    """
+
+    def __init__(self, out_dir, max_workers=DOWNLOAD_WORKERS, per_host_limit=PER_HOST_LIMIT,
+                 timeout=REQUEST_TIMEOUT, max_bytes=MAX_IMAGE_BYTES, cache=None, layout=LAYOUT_PRODUCT):
+        if layout not in (LAYOUT_PRODUCT, LAYOUT_CAS):
+            raise ValueError(f"알 수 없는 이미지 저장 방식: {layout}")
+        self.out_dir = out_dir
+        self.cache = cache
+        self.layout = layout
+        self.img_dir = os.path.join(out_dir, "images")
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.per_host_limit = per_host_limit
+        self.stats = DownloadStats()
+
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT})
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="img-download")
+        self._host_slots = {}
+        self._url_locks = {}
+        self._run_results = {}
+        self._lock = threading.Lock()
+
+    def _host_slot(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_slots[host]
+
+    def _url_lock(self, url):
+        with self._lock:
+            if url not in self._url_locks:
+                self._url_locks[url] = threading.Lock()
+            return self._url_locks[url]
+
+    def _valid_entry(self, url, rel_path=None):
+        # 캐시 기록이 있고 기록된 파일이 그대로 남아 있을 때만 조건부 요청에 사용
+        entry = self.cache.get(url, rel_path) if self.cache else None
+        if not entry or not entry["rel_path"]:
+            return None
+        path = os.path.join(self.out_dir, entry["rel_path"])
+        if not os.path.exists(path) or os.path.getsize(path) != entry["size"]:
+            return None
+        return entry
+
+    def _fetch(self, url, entry, tmp_dir):
+        """
+        조건부 요청 후 본문을 tmp_dir의 임시 파일로 스트리밍.
+        반환: {"not_modified", "headers", "tmp_path", "nbytes", "sha256", "started"}
+        """
+        with self._host_slot(url):
+            started = time.monotonic()
+            try:
+                with self.session.get(url, timeout=self.timeout, stream=True,
+                                      headers=conditional_headers(entry)) as resp:
+                    if resp.status_code == 304 and entry:
+                        self.stats.record(started, time.monotonic(), 0, cache="not_modified")
+                        return {"not_modified": True, "headers": resp.headers}
+                    resp.raise_for_status()
+                    tmp_path, nbytes, sha256 = self._stream_to_temp(resp, tmp_dir)
+            except Exception:
+                self.stats.record(started, time.monotonic(), ok=False)
+                raise
+        return {"not_modified": False, "headers": resp.headers, "tmp_path": tmp_path,
+                "nbytes": nbytes, "sha256": sha256, "started": started}
+
+    def download(self, url, save_path=None):
+        """
+        url을 내려받아 {"rel_path", "etag", "last_modified", "sha256", "cache"}를 반환.
+
+        save_path가 없으면 content-addressed 저장소(images/blobs/)에 저장.
+        캐시에 기록된 파일이 남아 있으면 조건부 요청을 보내
+        304면 기존 파일을 유지하고(cache="not_modified"),
+        200이어도 내용 해시가 기존 파일과 같으면 파일을 건드리지 않음(cache="hash_match")
+        """
+        if save_path is None:
+            return self._download_blob(url)
+
+        rel_path = os.path.relpath(save_path, self.out_dir).replace(os.sep, "/")
+        entry = self._valid_entry(url, rel_path)
+        fetched = self._fetch(url, entry, os.path.dirname(save_path))
+        if fetched["not_modified"]:
+            result = self._result(rel_path, fetched["headers"], entry, "not_modified")
+        else:
+            if entry:
+                existing_sha = entry["sha256"]
+            elif os.path.exists(save_path) and self.cache:
+                existing_sha = file_sha256(save_path)
+            else:
+                existing_sha = None
+
+            if existing_sha == fetched["sha256"] and os.path.exists(save_path):
+                os.remove(fetched["tmp_path"])
+                cache = "hash_match"
+            else:
+                os.replace(fetched["tmp_path"], save_path)
+                cache = "miss"
+            self.stats.record(fetched["started"], time.monotonic(), fetched["nbytes"], cache=cache)
+            result = self._result(rel_path, fetched["headers"], {"sha256": fetched["sha256"]}, cache)
+
+        self._remember(url, result)
+        return result
+
+    def _download_blob(self, url):
+        # 같은 URL은 한 실행에서 한 번만 요청 (여러 상품이 공유하는 이미지)
+        with self._url_lock(url):
+            with self._lock:
+                reused = self._run_results.get(url)
+            if reused:
+                self.stats.record_reuse()
+                return dict(reused, cache="reused")
+
+            entry = self._valid_entry(url)
+            if entry and not entry["rel_path"].startswith("images/blobs/"):
+                entry = None  # 폴더별 저장 방식으로 받았던 기록은 사용하지 않음
+            blob_tmp_dir = os.path.join(self.img_dir, "blobs")
+            os.makedirs(blob_tmp_dir, exist_ok=True)
+            fetched = self._fetch(url, entry, blob_tmp_dir)
+            if fetched["not_modified"]:
+                result = self._result(entry["rel_path"], fetched["headers"], entry, "not_modified")
+            else:
+                ext = os.path.splitext(urlparse(url).path)[1] or ".jpg"
+                rel_path = blob_rel_path(fetched["sha256"], ext)
+                blob_path = os.path.join(self.out_dir, rel_path)
+                # 다른 URL로 이미 같은 내용이 저장돼 있으면 새로 쓰지 않음
+                if os.path.exists(blob_path):
+                    os.remove(fetched["tmp_path"])
+                    cache = "hash_match"
+                else:
+                    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                    os.replace(fetched["tmp_path"], blob_path)
+                    cache = "miss"
+                self.stats.record(fetched["started"], time.monotonic(), fetched["nbytes"], cache=cache)
+                result = self._result(rel_path, fetched["headers"], {"sha256": fetched["sha256"]}, cache)
+
+            self._remember(url, result)
+            with self._lock:
+                self._run_results[url] = result
+            return result
+
+    def _result(self, rel_path, headers, entry, cache):
+        return {
+            "rel_path": rel_path,
+            "etag": headers.get("ETag") or entry.get("etag"),
+            "last_modified": headers.get("Last-Modified") or entry.get("last_modified"),
+            "sha256": entry["sha256"],
+            "cache": cache,
+        }
+
+    def _remember(self, url, result):
+        if self.cache:
+            size = os.path.getsize(os.path.join(self.out_dir, result["rel_path"]))
+            self.cache.put(url, result["rel_path"], result["etag"], result["last_modified"],
+                           result["sha256"], size)
+
+    def _stream_to_temp(self, resp, tmp_dir):
+        # 응답 전체를 메모리에 올리지 않고 청크 단위로 임시 파일에 기록
+        # 반환: (임시 파일 경로, 수신 바이트, sha256)
+        content_length = resp.headers.get("Content-Length")
+        expected = int(content_length) if content_length and content_length.isdigit() else None
+        if expected is not None and expected > self.max_bytes:
+            raise ValueError(f"이미지 크기 초과: {expected} bytes > {self.max_bytes} bytes")
+
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, prefix=".download-", suffix=".part")
+        nbytes = 0
+        hasher = hashlib.sha256()
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                    if not chunk:
+                        continue
+                    nbytes += len(chunk)
+                    if nbytes > self.max_bytes:
+                        raise ValueError(f"이미지 크기 초과: {nbytes} bytes 이상 > {self.max_bytes} bytes")
+                    hasher.update(chunk)
+                    f.write(chunk)
+            # gzip 등으로 인코딩된 응답은 Content-Length가 압축 크기라 비교하지 않음
+            if expected is not None and not resp.headers.get("Content-Encoding") and nbytes != expected:
+                raise ValueError(f"다운로드 크기 불일치: {nbytes} bytes (Content-Length {expected})")
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return tmp_path, nbytes, hasher.hexdigest()
+
+    def _download_one(self, product_id, img_name, img_url):
+        result = {"img_name": img_name, "url": img_url, "rel_path": None,
+                  "etag": None, "last_modified": None, "sha256": None}
+        try:
+            if self.layout == LAYOUT_CAS:
+                fetched = self.download(img_url)
+            else:
+                ext = os.path.splitext(urlparse(img_url).path)[1] or ".jpg"
+                fetched = self.download(img_url, os.path.join(self.img_dir, product_id, f"{img_name}{ext}"))
+        except Exception as e:
+            print(f"[WARNING] 이미지 다운로드 실패 ({product_id}/{img_name}): {e}")
+            return result
+        for key in ("rel_path", "etag", "last_modified", "sha256"):
+            result[key] = fetched[key]
+        return result
+
+    def _write_manifest(self, product_id, results):
+        # 상품별 이미지 목록 (content-addressed 저장 시 상품 폴더에는 이 파일만 존재)
+        manifest = {
+            "product_id": product_id,
+            "images": [
+                {"img_name": r["img_name"], "url": r["url"], "path": r["rel_path"], "sha256": r["sha256"]}
+                for r in results if r and r["rel_path"]
+            ],
+        }
+        path = os.path.join(self.img_dir, product_id, MANIFEST_NAME)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def submit(self, product_id, images, on_complete=None):
+        """
+        상품 이미지 다운로드를 예약하고 바로 반환.
+        모든 이미지가 끝나면 on_complete(results)를 다운로드 스레드에서 호출
+        (results는 images 순서의 {"img_name", "url", "rel_path", "etag", "last_modified", "sha256"} 리스트,
+         실패 시 rel_path=None)
+        """
+        results = [None] * len(images)
+        remaining = [len(images)]
+        lock = threading.Lock()
+
+        def finish():
+            try:
+                if self.layout == LAYOUT_CAS and images:
+                    self._write_manifest(product_id, results)
+                if on_complete is not None:
+                    on_complete(results)
+            except Exception as e:
+                print(f"[ERROR] 다운로드 완료 처리 실패 ({product_id}): {e}")
+
+        def done(idx, future):
+            results[idx] = future.result()
+            with lock:
+                remaining[0] -= 1
+                finished = remaining[0] == 0
+            if finished:
+                finish()
+
+        if not images:
+            finish()
+            return []
+
+        os.makedirs(os.path.join(self.img_dir, product_id), exist_ok=True)
+        print(f"[INFO] {len(images)}개 이미지 다운로드 예약: {product_id}")
+        futures = []
+        for idx, (img_name, img_url) in enumerate(images):
+            future = self._executor.submit(self._download_one, product_id, img_name, img_url)
+            future.add_done_callback(functools.partial(done, idx))
+            futures.append(future)
+        return futures
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    def report(self):
+        s = self.stats.summary()
+        print(f"[INFO] 이미지 다운로드: 성공 {s['downloaded']}개, 실패 {s['failed']}개, "
+              f"{s['total_bytes'] / (1024 * 1024):.1f}MB / {s['elapsed_sec']:.1f}초 "
+              f"({s['bytes_per_sec'] / 1024:.1f}KB/s)")
+        print(f"[INFO] 이미지 다운로드 지연시간: p50 {s['latency_p50']:.3f}s, "
+              f"p90 {s['latency_p90']:.3f}s, p99 {s['latency_p99']:.3f}s")
+        if self.cache or self.layout == LAYOUT_CAS:
+            print(f"[INFO] 이미지 캐시 적중률: {s['cache_hit_ratio'] * 100:.1f}% "
+                  f"(304 {s['cache_not_modified']}개, 해시 일치 {s['cache_hash_match']}개, "
+                  f"중복 URL 재사용 {s['cache_reused']}개)")
+        return s
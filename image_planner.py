@@ -0,0 +1,111 @@
+import math
+
+from PIL import Image
+
+
+# 리사이즈 기준 후보 (큰 것부터 시도해 예산에 가장 많이 들어가는 기준 선택)
+DEFAULT_RESIZE_TARGETS = [1024, 768, 512]
+# 짧은 변이 이보다 작으면 아이콘/구분선으로 보고 제외
+MIN_IMAGE_SIDE = 80
+# 가로/세로 비율이 이보다 크면 띠 배너로 보고 우선순위를 낮춤
+BANNER_ASPECT = 4.0
+# JPEG(quality 85) 예상 용량 (픽셀당 바이트, 실제보다 넉넉하게 잡음)
+JPEG_BYTES_PER_PIXEL = 0.5
+
+
+def read_image_size(path):
+    # Image.open은 헤더만 읽음 (픽셀 디코딩 없음)
+    with Image.open(path) as img:
+        return img.size
+
+
+def predict_thumbnail_size(width, height, max_size):
+    # PIL Image.thumbnail((max_size, max_size))과 같은 결과 크기 계산
+    if max_size >= width and max_size >= height:
+        return width, height
+
+    def round_aspect(number, key):
+        return max(min(math.floor(number), math.ceil(number), key=key), 1)
+
+    x, y = max_size, max_size
+    aspect = width / height
+    if x / y >= aspect:
+        x = round_aspect(y * aspect, key=lambda n: abs(aspect - n / y))
+    else:
+        y = round_aspect(x / aspect, key=lambda n: 0 if n == 0 else abs(aspect - x / n))
+    return x, y
+
+
+def estimate_jpeg_bytes(width, height):
+    return int(width * height * JPEG_BYTES_PER_PIXEL)
+
+
+def image_priority(position, width, height):
+    """
+    값이 작을수록 먼저 선택. 후보는 features(상세 이미지)뿐이며 대표 이미지(image_path)는 들어오지 않음.
+    일반 상세 이미지(원본 면적이 클수록 우선) > 띠 배너, 같으면 상세 페이지 앞쪽 이미지 우선
+    """
+    aspect = width / height if height else 0
+    if aspect >= BANNER_ASPECT:
+        return (1, -width * height, position)
+    return (0, -width * height, position)
+
+
+def plan_images(candidates, token_fn, token_budget, byte_budget,
+                resize_targets=DEFAULT_RESIZE_TARGETS, min_side=MIN_IMAGE_SIDE):
+    """
+    이미지를 인코딩하기 전에 헤더만 읽어 요청에 넣을 이미지와 리사이즈 기준을 결정.
+
+    candidates: [(rel_path, full_path), ...] (features 상세 이미지 순서)
+    반환: {"max_size", "images": [{"rel_path", "full_path", "size", "tokens", "bytes"}], "tokens", "bytes",
+           "dropped": [(rel_path, 사유)]}
+    images는 원래 순서를 유지하고, dropped 이미지는 인코딩하지 않음
+    """
+    infos = []
+    dropped = []
+    for position, (rel_path, full_path) in enumerate(candidates):
+        try:
+            width, height = read_image_size(full_path)
+        except Exception as e:
+            dropped.append((rel_path, f"헤더 읽기 실패: {e}"))
+            continue
+        if min(width, height) < min_side:
+            dropped.append((rel_path, f"너무 작음 ({width}x{height})"))
+            continue
+        infos.append({
+            "position": position, "rel_path": rel_path, "full_path": full_path,
+            "original": (width, height), "priority": image_priority(position, width, height),
+        })
+
+    best = None
+    for max_size in resize_targets:
+        selected = []
+        total_tokens = 0
+        total_bytes = 0
+        for info in sorted(infos, key=lambda i: i["priority"]):
+            size = predict_thumbnail_size(*info["original"], max_size)
+            tokens = token_fn(*size)
+            nbytes = estimate_jpeg_bytes(*size)
+            if total_tokens + tokens > token_budget or total_bytes + nbytes > byte_budget:
+                continue
+            selected.append(dict(info, size=size, tokens=tokens, bytes=nbytes))
+            total_tokens += tokens
+            total_bytes += nbytes
+        # 더 많은 이미지가 들어가는 기준 우선, 같으면 더 큰 기준 유지
+        if best is None or len(selected) > len(best["images"]):
+            best = {"max_size": max_size, "images": selected, "tokens": total_tokens, "bytes": total_bytes}
+        if len(selected) == len(infos):
+            break
+
+    if best is None:
+        best = {"max_size": resize_targets[0], "images": [], "tokens": 0, "bytes": 0}
+    chosen = {info["position"] for info in best["images"]}
+    for info in infos:
+        if info["position"] not in chosen:
+            dropped.append((info["rel_path"], "예산 초과"))
+    best["images"].sort(key=lambda i: i["position"])
+    best["images"] = [
+        {k: info[k] for k in ("rel_path", "full_path", "size", "tokens", "bytes")} for info in best["images"]
+    ]
+    best["dropped"] = dropped
+    return best
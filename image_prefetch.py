@@ -0,0 +1,114 @@
+import base64
+import collections
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from encode_cache import encode_cache_key
+
+
+DEFAULT_PREFETCH_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+DEFAULT_PREFETCH_WINDOW = 8
+# 워커 프로세스 시작 방식. 작업 제출이 asyncio.to_thread 스레드에서도 일어나므로
+# 다른 스레드가 SQLite/인코딩 캐시 잠금을 쥔 채로 fork되지 않도록 spawn 사용
+PREFETCH_START_METHOD = "spawn"
+
+
+def resize_and_encode(image_path, max_size, quality):
+    # 반환: (JPEG 바이트, 가로, 세로). 프로세스 풀에서 실행되므로 모듈 최상위 함수로 유지
+    with Image.open(image_path) as img:
+        if img.mode in ("RGBA", "P"):
+            img = img.convert("RGB")
+        img.thumbnail((max_size, max_size))
+        final_w, final_h = img.size
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=quality)
+        return buffer.getvalue(), final_w, final_h
+
+
+class _Done:
+    # 캐시 적중 / 실패 결과를 Future처럼 다루기 위한 래퍼
+    def __init__(self, value=None, error=None):
+        self.value = value
+        self.error = error
+
+    def result(self):
+        if self.error:
+            raise self.error
+        return self.value
+
+
+class ImagePrefetcher:
+    """
+    다음 행들의 이미지를 ProcessPoolExecutor에서 미리 리사이즈/인코딩하는 파이프라인.
+
+    iterate()는 현재 행을 돌려주기 전에 최대 window개 행의 이미지 작업을 미리 제출해 두므로
+    앞 행의 API 요청이 진행되는 동안 뒤 행의 Pillow 작업이 다른 프로세스에서 진행됨.
+    window로 메모리에 올라와 있는 인코딩 결과 수를 제한
+    """
+
+    def __init__(self, token_fn, quality, cache=None,
+                 workers=DEFAULT_PREFETCH_WORKERS, window=DEFAULT_PREFETCH_WINDOW):
+        self.token_fn = token_fn
+        self.quality = quality
+        self.cache = cache
+        self.window = max(1, window)
+        self.pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context(PREFETCH_START_METHOD))
+
+    def _submit_image(self, full_path, max_size):
+        key = None
+        try:
+            key = encode_cache_key(full_path, max_size, self.quality) if self.cache else None
+            cached = self.cache.get(key) if self.cache else None
+        except OSError as e:
+            return key, _Done(error=e)
+        if cached:
+            return key, _Done(value=(cached["data"], cached["width"], cached["height"]))
+        return key, self.pool.submit(resize_and_encode, full_path, max_size, self.quality)
+
+    def _collect(self, jobs):
+        # 반환: {full_path: (base64 문자열, 토큰 수, 바이트 수)}, 실패한 이미지는 (None, 0, 0)
+        encoded = {}
+        for full_path, (key, future) in jobs.items():
+            try:
+                data, width, height = future.result()
+            except Exception as e:
+                print(f"이미지 처리 실패: {full_path}, {e}")
+                encoded[full_path] = (None, 0, 0)
+                continue
+            tokens = self.token_fn(width, height)
+            if self.cache and not isinstance(future, _Done):
+                self.cache.put(key, full_path, data, width, height, tokens)
+            encoded[full_path] = (base64.b64encode(data).decode("utf-8"), tokens, len(data))
+        return encoded
+
+    def iterate(self, rows, paths_fn):
+        """
+        rows: (idx, row) 반복자, paths_fn(row): (그 행에서 인코딩할 이미지 전체 경로 목록, 리사이즈 기준).
+        인코딩이 필요 없는 행(응답 캐시 적중 등)은 paths_fn이 빈 목록을 반환.
+        (idx, row, encoded)를 순서대로 반환
+        """
+        pending = collections.deque()
+        rows = iter(rows)
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < self.window:
+                item = next(rows, None)
+                if item is None:
+                    exhausted = True
+                    break
+                idx, row = item
+                paths, max_size = paths_fn(row)
+                jobs = {path: self._submit_image(path, max_size) for path in paths}
+                pending.append((idx, row, jobs))
+            if not pending:
+                return
+            idx, row, jobs = pending.popleft()
+            yield idx, row, self._collect(jobs)
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
@@ -1,6 +1,5 @@
-import os, re, time, random, csv, datetime
+import os, re, time, random, csv, datetime, threading, functools, argparse
 from urllib.parse import urlparse
-import requests
 import pandas as pd
 from slugify import slugify
 
@@ -15,20 +14,44 @@ from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import UnexpectedAlertPresentException, NoAlertPresentException
 
+from driver_pool import run_driver_pool, write_failures, DEFAULT_NUM_WORKERS
+from detail_page import wait_for_detail_images, summarize_detail_waits
+from page_extract import extract_product_page, extract_list_links, extract_category_tabs
+from driver_profile import (DEFAULT_BLOCKED_URL_PATTERNS, PageNetworkStats, apply_lean_options,
+                            collect_network_metrics, enable_performance_log, enable_request_blocking)
+from image_downloader import ImageDownloader, image_columns
+from crawl_state import CrawlState, IncrementalCsvWriter, PRODUCT_COLUMNS
+from image_cache import ImageFetchCache
+from product_store import write_products_parquet, add_detail_image_count
+
 
 START_URLS = [
     "https://gift.kakao.com/page/26921?banner_id=1246&campaign_code=null"  
 ]
 MAX_LIST_PAGES = 1         
 MAX_PRODUCTS_PER_LIST = 3  
+NUM_WORKERS = DEFAULT_NUM_WORKERS  # 상품 상세 크롤링에 사용할 크롬 드라이버 수
 
 OUT_DIR = "dataset"
 IMG_DIR = os.path.join(OUT_DIR, "images")
 CSV_PATH = os.path.join(OUT_DIR, "products.csv")
+STATE_PATH = os.path.join(OUT_DIR, "crawl_state.sqlite3")
+IMAGE_CACHE_PATH = os.path.join(OUT_DIR, "image_cache.sqlite3")
+# --parquet: products.csv와 함께 category별 분할 Parquet 데이터셋(features는 리스트 컬럼)도 저장
+PARQUET_PATH = os.path.join(OUT_DIR, "products_parquet")
+# 이미지 저장 방식: "product" (상품 폴더별 저장) / "cas" (해시 기준 한 번만 저장 + 상품별 manifest.json)
+IMAGE_STORE_LAYOUT = "product"
 
 REQUEST_TIMEOUT = 20
 MIN_DELAY, MAX_DELAY = 1.2, 2.8 
 
+# lean 드라이버 프로필: 이미지/미디어/폰트/트래킹 요청 차단 + eager 페이지 로딩
+LEAN_DRIVER = True
+BLOCKED_URL_PATTERNS = DEFAULT_BLOCKED_URL_PATTERNS
+
+# 상품 페이지별 로딩 시간 / 전송량 / 차단 요청 수 (CDP Network.* 이벤트 기준)
+PAGE_STATS = PageNetworkStats()
+
 def safe_mkdir(p):
     if not os.path.exists(p):
         os.makedirs(p, exist_ok=True)
@@ -67,13 +90,18 @@ def guess_product_id_from_url(url):
     m = re.search(r"/product/(\d+)", url)
     return m.group(1) if m else slugify(url)[:32]
 
-def download_image(url, save_path):
-    resp = requests.get(url, timeout=REQUEST_TIMEOUT, headers={"User-Agent":"Mozilla/5.0"})
-    resp.raise_for_status()
-    with open(save_path, "wb") as f:
-        f.write(resp.content)
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+def get_chromedriver_path():
+    # 워커들이 동시에 드라이버를 내려받지 않도록 한 번만 설치
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path is None:
+            _chromedriver_path = ChromeDriverManager().install()
+    return _chromedriver_path
 
-def build_driver():
+def build_driver(lean=LEAN_DRIVER):
     opts = Options()
     opts.add_argument("--headless=new")
     opts.add_argument("--disable-gpu")
@@ -83,14 +111,19 @@ def build_driver():
     opts.add_experimental_option("excludeSwitches", ["enable-automation"])
     opts.add_experimental_option('useAutomationExtension', False)
     opts.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36")
+    if lean:
+        apply_lean_options(opts)
+    enable_performance_log(opts)
     
-    service = Service(ChromeDriverManager().install())
+    service = Service(get_chromedriver_path())
     driver = webdriver.Chrome(service=service, options=opts)
     
     driver.execute_cdp_cmd('Network.setUserAgentOverride', {
         "userAgent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36'
     })
     driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    if lean:
+        enable_request_blocking(driver, BLOCKED_URL_PATTERNS)
     
     return driver
 
@@ -98,7 +131,7 @@ def extract_product_links_from_list(driver):
     # 알림창 처리
     handle_alert(driver)
     
-    # 여러 선택자 시도
+    # 여러 선택자 시도 (한 번의 JS 호출로 선택자별 요소 수와 링크를 함께 수집)
     selectors = [
         "a.link_thumb",
         "a[href*='/product/']",
@@ -110,71 +143,58 @@ def extract_product_links_from_list(driver):
         "a[class*='product']"
     ]
     
-    links = []
-    
-    for selector in selectors:
-        try:
-            cards = driver.find_elements(By.CSS_SELECTOR, selector)
-            print(f"[DEBUG] {selector}: {len(cards)}개 요소 발견")
-            
-            for a in cards:
-                href = a.get_attribute("href")
-                if href and "/product/" in href:
-                    links.append(href)
-                    
-            if links:  # 링크를 찾았으면 더 이상 시도하지 않음
-                break
-                
-        except UnexpectedAlertPresentException:
-            handle_alert(driver)
-            continue
-        except Exception as e:
-            print(f"[DEBUG] {selector} 시도 중 오류: {e}")
-            continue
+    found = extract_list_links(driver, selectors, alert_handler=handle_alert)
+    for selector, count in found["counts"]:
+        print(f"[DEBUG] {selector}: {count}개 요소 발견")
     
-    # 중복 제거
-    uniq = []
-    for u in links:
-        if u not in uniq:
-            uniq.append(u)
+    # 중복 제거된 링크
+    uniq = found["links"]
     
     print(f"[INFO] 찾은 상품 링크 수: {len(uniq)}")
     if len(uniq) == 0:
         print("[WARNING] 상품 링크를 못 찾았습니다. 페이지 구조를 확인하세요.")
-        # 디버깅을 위해 현재 페이지의 모든 링크 출력
-        all_links = driver.find_elements(By.CSS_SELECTOR, "a")
-        print(f"[DEBUG] 페이지 내 전체 링크 수: {len(all_links)}")
-        product_links = [a.get_attribute("href") for a in all_links if a.get_attribute("href") and "/product/" in a.get_attribute("href")]
-        print(f"[DEBUG] /product/ 포함 링크 수: {len(product_links)}")
+        # 디버깅을 위해 현재 페이지의 링크 수 출력
+        print(f"[DEBUG] 페이지 내 전체 링크 수: {found['allLinkCount']}")
+        print(f"[DEBUG] /product/ 포함 링크 수: {found['productLinkCount']}")
     
     return uniq
 
-def parse_product_detail(driver, url, category_hint=None, theme_hint=None):
+def parse_product_detail(driver, url, category_hint=None, theme_hint=None, downloader=None, on_row=None):
+    load_started = time.monotonic()
     driver.get(url)
+    page_load_sec = time.monotonic() - load_started
     rand_sleep()
     
     # 알림창 처리
     handle_alert(driver)
     
-    # 상품 이름
-    name = ""
+    # 상품 이름이 보일 때까지 대기
     try:
-        title_el = WebDriverWait(driver, 15).until(
+        WebDriverWait(driver, 15).until(
             EC.visibility_of_element_located((By.CSS_SELECTOR, "h2.tit_subject"))
         )
-        name = title_el.text.strip()
     except Exception as e:
         print(f"[ERROR] 상품 이름을 찾을 수 없습니다: {e}")
-        name = "제목 없음"
+
+    # 상품설명 영역(Shadow DOM)을 스크롤하며 지연 로딩 이미지가 모두 로드되면 바로 진행
+    print("[DEBUG] 지연 로딩 이미지들을 로드하기 위해 스크롤 중...")
+    load_stats = wait_for_detail_images(driver)
+    detail_load_sec = load_stats["waited"]
+    if load_stats["reason"] == "no_editor":
+        print("[WARNING] 상품설명 Shadow DOM을 찾을 수 없음")
+    else:
+        print(f"[DEBUG] 이미지 로딩 대기 {load_stats['waited']:.1f}초 "
+              f"({load_stats['reason']}, img {load_stats['images']}개, 미로딩 {load_stats['pending']}개)")
+
+    # 이름, 가격, 대표 이미지, 상세 이미지, 브레드크럼을 한 번의 JS 호출로 수집
+    page = extract_product_page(driver, alert_handler=handle_alert)
+    PAGE_STATS.add(url, page_load_sec, collect_network_metrics(driver))
+
+    # 상품 이름
+    name = page["name"] or "제목 없음"
 
     # 가격
-    price_text = ""
-    try:
-        price_el = driver.find_element(By.CSS_SELECTOR, "span.txt_total")
-        price_text = price_el.text.strip()
-    except:
-        pass
-    
+    price_text = page["priceText"]
     price = parse_price_to_int(price_text) if price_text else None
     
     if not price:
@@ -184,132 +204,17 @@ def parse_product_detail(driver, url, category_hint=None, theme_hint=None):
     all_images = []
     
     # 1. 대표 이미지 (메타 태그 우선)
-    main_image_url = ""
-    metas = driver.find_elements(By.CSS_SELECTOR, "meta[property='og:image']")
-    if metas:
-        main_image_url = metas[0].get_attribute("content")
-    
-    # 2. 상품 상세 이미지들 (상품설명 영역)
-    detail_images = []
+    main_image_url = page["ogImage"]
     
-    # 상품설명 영역의 이미지들 찾기 (Shadow DOM 접근)
-    try:
-        # Shadow DOM에 접근해서 이미지 찾기
-        shadow_host = driver.find_element(By.CSS_SELECTOR, "app-view-encapsuled-product-desc")
-        shadow_root = driver.execute_script("return arguments[0].shadowRoot", shadow_host)
-        
-        if shadow_root:
-            # Shadow DOM 내부에서 스크롤해서 모든 이미지 로드 유도
-            print("[DEBUG] 지연 로딩 이미지들을 로드하기 위해 스크롤 중...")
-            
-            # 여러 번 스크롤해서 모든 이미지 로드 유도
-            for i in range(3):
-                driver.execute_script("""
-                    var shadowRoot = arguments[0];
-                    var editorContents = shadowRoot.querySelector('div._editor_contents');
-                    if (editorContents) {
-                        // 천천히 스크롤 다운
-                        var height = editorContents.scrollHeight;
-                        for (var j = 0; j < height; j += 100) {
-                            editorContents.scrollTop = j;
-                        }
-                        editorContents.scrollTop = height;
-                    }
-                """, shadow_root)
-                time.sleep(2)
-                
-                # 다시 위로
-                driver.execute_script("""
-                    var shadowRoot = arguments[0];
-                    var editorContents = shadowRoot.querySelector('div._editor_contents');
-                    if (editorContents) {
-                        editorContents.scrollTop = 0;
-                    }
-                """, shadow_root)
-                time.sleep(1)
-            
-            # 최종 대기
-            print("[DEBUG] 이미지 로딩 완료 대기 중...")
-            time.sleep(5)
-            
-            # Shadow DOM 내부의 _editor_contents에서 이미지 찾기
-            imgs = driver.execute_script("""
-                var shadowRoot = arguments[0];
-                var editorContents = shadowRoot.querySelector('div._editor_contents');
-                if (editorContents) {
-                    var allImgs = editorContents.querySelectorAll('img');
-                    var validImgs = [];
-                    
-                    for (var i = 0; i < allImgs.length; i++) {
-                        var img = allImgs[i];
-                        var src = img.src || img.getAttribute('data-original-src') || img.getAttribute('data-src');
-                        
-                        // 유효한 이미지 URL이 있는지 확인
-                        if (src && (src.startsWith('http://') || src.startsWith('https://'))) {
-                            // 빈 이미지나 플레이스홀더 제외
-                            if (!src.includes('1x1') && !src.includes('pixel') && !src.includes('transparent') && !src.includes('blank')) {
-                                validImgs.push(img);
-                            }
-                        }
-                    }
-                    
-                    return validImgs;
-                }
-                return [];
-            """, shadow_root)
-            
-            print(f"[DEBUG] Shadow DOM에서 총 {len(imgs)}개 유효한 img 요소 발견")
-            
-            for i, img in enumerate(imgs):
-                # 여러 속성에서 이미지 URL 시도 (data-original-src 우선)
-                src = (img.get_attribute("data-original-src") or 
-                      img.get_attribute("data-src") or
-                      img.get_attribute("src"))
-                
-                print(f"[DEBUG] 이미지 {i+1}: {src}")
-                
-                if src and ("http://" in src or "https://" in src):
-                    # 1px.png 같은 플레이스홀더 제외
-                    if not any(x in src.lower() for x in [
-                        "icon", "logo", "thumb_small", "btn_", "arrow",
-                        "1x1", "1px", "pixel", "transparent", "blank", "placeholder"
-                    ]):
-                        detail_images.append(src)
-                        print(f"[DEBUG] 유효한 이미지 추가: {src}")
-                    else:
-                        print(f"[DEBUG] 필터링으로 제외: {src}")
-                        
-            print(f"[INFO] Shadow DOM _editor_contents에서 {len(detail_images)}개 유효한 이미지 발견")
-        else:
-            print("[WARNING] Shadow Root를 찾을 수 없음")
-            
-    except Exception as e:
-        print(f"[WARNING] Shadow DOM 접근 실패: {e}")
-        # 백업 선택자들 (일반 DOM)
-        fallback_selectors = [
-            "div._editor_contents img",
-            "[imglazyload] img",
-            "div[class*='editor'] img", 
-            ".wrap_editor img"
-        ]
-        
-        for selector in fallback_selectors:
-            try:
-                imgs = driver.find_elements(By.CSS_SELECTOR, selector)
-                for img in imgs:
-                    src = img.get_attribute("src") or img.get_attribute("data-original-src")
-                    if src and ("http://" in src or "https://" in src):
-                        if not any(x in src.lower() for x in ["icon", "logo", "thumb_small", "btn_", "arrow"]):
-                            detail_images.append(src)
-                print(f"[INFO] {selector}에서 {len(imgs)}개 이미지 요소 발견")
-                if detail_images:
-                    break
-            except Exception as ex:
-                print(f"[DEBUG] {selector} 시도 실패: {ex}")
-                continue
-    
-    # 중복 제거
-    detail_images = list(dict.fromkeys(detail_images))
+    # 2. 상품 상세 이미지들 (상품설명 영역, 필터링/중복 제거 완료)
+    detail_images = page["detailImages"]
+    if page["detailSource"] == "shadow":
+        print(f"[DEBUG] Shadow DOM에서 총 {page['candidateCount']}개 유효한 img 요소 발견")
+        for src in page["excluded"]:
+            print(f"[DEBUG] 필터링으로 제외: {src}")
+        print(f"[INFO] Shadow DOM _editor_contents에서 {len(detail_images)}개 유효한 이미지 발견")
+    elif page["detailSource"]:
+        print(f"[INFO] {page['detailSource']}에서 {page['candidateCount']}개 이미지 요소 발견")
     
     # 대표 이미지가 없으면 첫 번째 상세 이미지를 대표로 사용
     if not main_image_url and detail_images:
@@ -331,68 +236,40 @@ def parse_product_detail(driver, url, category_hint=None, theme_hint=None):
     category = category_hint or ""
     theme = theme_hint or ""
     # 예: 빵부스러기(브레드크럼) 탐색
-    for bc_sel in [".breadcrumb", "nav.breadcrumb", "ul.breadcrumb"]:
-        bc = driver.find_elements(By.CSS_SELECTOR, bc_sel + " li, " + bc_sel + " a")
-        if bc:
-            crumbs = [el.text.strip() for el in bc if el.text.strip()]
-            if len(crumbs) >= 2:
-                category = category or crumbs[1]  # 대략 상위 카테고리로 추정
-            break
+    crumbs = page["breadcrumbs"]
+    if len(crumbs) >= 2:
+        category = category or crumbs[1]  # 대략 상위 카테고리로 추정
 
-    # 이미지 저장
     product_id = guess_product_id_from_url(url)
-    image_rel_paths = []
-    main_image_path = ""
-    
-    if all_images:
-        # 상품별 폴더 생성
-        product_img_dir = os.path.join(IMG_DIR, product_id)
-        safe_mkdir(product_img_dir)
-        
-        print(f"[INFO] {len(all_images)}개 이미지 다운로드 시작: {product_id}")
-        
-        for img_name, img_url in all_images:
-            try:
-                ext = os.path.splitext(urlparse(img_url).path)[1] or ".jpg"
-                filename = f"{img_name}{ext}"
-                save_path = os.path.join(product_img_dir, filename)
-                rel_path = f"images/{product_id}/{filename}"
-                
-                download_image(img_url, save_path)
-                image_rel_paths.append(rel_path)
-                
-                # 대표 이미지 경로 저장 (CSV용)
-                if img_name == "main":
-                    main_image_path = rel_path
-                
-                print(f"[INFO] 이미지 저장: {filename}")
-            except Exception as e:
-                print(f"[WARNING] 이미지 다운로드 실패 ({img_name}): {e}")
-                continue
-        
-        print(f"[INFO] 이미지 저장 완료: {product_id} ({len(image_rel_paths)}개)")
-    
-    # CSV에는 대표 이미지 경로만 저장 (기존 호환성 유지)
-    image_rel_path = main_image_path
-    
-    # features에 상품설명 이미지 경로들 저장
-    detail_image_paths = []
-    for rel_path in image_rel_paths:
-        if "/detail" in rel_path:  # detail1, detail2 등이 포함된 경로만
-            detail_image_paths.append(rel_path)
-    features_str = "; ".join(detail_image_paths) if detail_image_paths else ""
-
     row = {
         "product_id": product_id,
         "name": name,
         "price": price,
-        "image_path": image_rel_path,
-        "features": features_str,
+        "image_path": "",
+        "features": "",
+        "detail_image_count": 0,
         "category": category,
         "theme": theme,
         "source_url": url,
-        "crawled_at": datetime.datetime.now().isoformat(timespec="seconds")
+        "crawled_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "detail_load_sec": detail_load_sec
     }
+
+    # 이미지 저장 (다운로드는 백그라운드에서 진행되고 브라우저는 바로 다음 상품으로 이동)
+    # 다운로드가 모두 끝나면 이미지 경로를 채우고 on_row(row, images) 호출
+    def on_images_done(results):
+        row.update(image_columns(results))
+        if on_row:
+            on_row(row, results)
+
+    own_downloader = downloader is None
+    if own_downloader:
+        downloader = ImageDownloader(OUT_DIR, timeout=REQUEST_TIMEOUT, layout=IMAGE_STORE_LAYOUT)
+    downloader.submit(product_id, all_images, on_complete=on_images_done)
+
+    # 단독 호출 시에는 다운로드 완료를 기다린 뒤 반환
+    if own_downloader:
+        downloader.close()
     return row
 
 def scroll_to_load_more(driver, max_scrolls=5):
@@ -411,13 +288,20 @@ def scroll_to_load_more(driver, max_scrolls=5):
         scroll_count += 1
         print(f"[INFO] 스크롤 {scroll_count}회 완료")
 
-def crawl():
+def crawl_product(driver, link, category_hint=None, downloader=None, on_row=None):
+    print(f"\n[{threading.current_thread().name}] 크롤링 중: {link}")
+    rand_sleep()
+    row = parse_product_detail(driver, link, category_hint=category_hint, downloader=downloader, on_row=on_row)
+    print(f"[OK] {row['name']} - {row['price']}원")
+    return row
+
+def crawl(resume=False, num_workers=NUM_WORKERS, image_layout=IMAGE_STORE_LAYOUT, lean=LEAN_DRIVER, parquet=False):
     safe_mkdir(OUT_DIR)
     safe_mkdir(IMG_DIR)
 
-    driver = build_driver()
-    all_rows = []
-    failures = []
+    driver_factory = functools.partial(build_driver, lean=lean)
+    driver = driver_factory()
+    product_links = []
 
     try:
         for start_url in START_URLS:
@@ -433,25 +317,16 @@ def crawl():
             
             for page_idx in range(1, MAX_LIST_PAGES + 1):
                 print(f"\n[INFO] === 페이지 {page_idx} 처리 중 ===")
-                product_links = extract_product_links_from_list(driver)[:MAX_PRODUCTS_PER_LIST]
+                page_links = extract_product_links_from_list(driver)[:MAX_PRODUCTS_PER_LIST]
                 
-                if not product_links:
+                if not page_links:
                     print("[WARNING] 상품 링크를 찾을 수 없습니다. CSS 선택자를 확인하세요.")
                     break
 
-                print(f"[INFO] 처리할 상품 수: {len(product_links)}")
-                for idx, link in enumerate(product_links, 1):
-                    try:
-                        print(f"\n[{idx}/{len(product_links)}] 크롤링 중: {link}")
-                        rand_sleep()
-                        row = parse_product_detail(driver, link)
-                        all_rows.append(row)
-                        print(f"[OK] {row['name']} - {row['price']}원")
-                    except Exception as e:
-                        print(f"[FAIL] {link}")
-                        print(f"[ERROR] {str(e)}")
-                        failures.append(link)
-                        continue
+                # 여러 페이지에 중복 노출된 상품은 한 번만 수집
+                page_links = [link for link in page_links if link not in product_links]
+                product_links.extend(page_links)
+                print(f"[INFO] 페이지 {page_idx}에서 수집한 상품 수: {len(page_links)}")
 
                 next_btn = None
                 for sel in ["a.next", "button.next", "a[rel='next']", "[class*='next']", "[class*='Next']"]:
@@ -472,16 +347,79 @@ def crawl():
                     break 
     finally:
         driver.quit()
-        print("\n[INFO] 브라우저 종료")
+        print("\n[INFO] 목록 브라우저 종료")
+
+    tasks = [(link,) for link in product_links]
+
+    # 이번 실행 대상 상품 (CSV 최종 정리 순서 기준)
+    ordered_ids = list(dict.fromkeys(guess_product_id_from_url(task[0]) for task in tasks))
+
+    state = CrawlState(STATE_PATH)
+    if resume:
+        done_ids = state.completed_ids()
+        remaining = [task for task in tasks if guess_product_id_from_url(task[0]) not in done_ids]
+        print(f"\n[INFO] 이어하기: 이미 완료된 상품 {len(tasks) - len(remaining)}개 건너뜀")
+        tasks = remaining
+
+    # 상품 하나가 끝날 때마다 상태 저장소와 CSV에 바로 기록
+    csv_writer = IncrementalCsvWriter(CSV_PATH, append=resume)
+
+    def on_row(row, images):
+        state.save_product(row, images)
+        csv_writer.write(row)
 
-    df = pd.DataFrame(all_rows)
+    # 상품 상세는 드라이버 워커 풀에서 병렬 처리
+    print(f"\n[INFO] 처리할 상품 수: {len(tasks)} (워커 {num_workers}개)")
+    image_cache = ImageFetchCache(IMAGE_CACHE_PATH)
+    downloader = ImageDownloader(OUT_DIR, timeout=REQUEST_TIMEOUT, cache=image_cache, layout=image_layout)
+    try:
+        handler = functools.partial(crawl_product, downloader=downloader, on_row=on_row)
+        all_rows, failures = run_driver_pool(tasks, handler, driver_factory, num_workers)
+        print("\n[INFO] 워커 브라우저 종료")
+    finally:
+        # 남은 이미지 다운로드(및 행 기록)가 끝날 때까지 대기
+        downloader.close()
+        csv_writer.close()
+        image_cache.close()
+
+    for fail in failures:
+        link = fail["task"][0]
+        state.mark_failed(guess_product_id_from_url(link), link, fail["error"])
+
+    download_stats = downloader.report()
+    summarize_detail_waits(all_rows)
+    page_stats = PAGE_STATS.report(lean)
+
+    # 이전 실행분을 포함해 입력 순서대로 CSV 재작성
+    df = pd.DataFrame(state.get_rows(ordered_ids), columns=PRODUCT_COLUMNS)
+    state.close()
+    # 이 컬럼이 생기기 전에 저장된 행은 features로 채움
+    add_detail_image_count(df)
     df.to_csv(CSV_PATH, index=False, encoding="utf-8")
     print(f"\nSaved {len(df)} rows to {CSV_PATH}")
+    if parquet and write_products_parquet(df, PARQUET_PATH):
+        print(f"Saved {len(df)} rows to {PARQUET_PATH}")
 
     if failures:
-        with open(os.path.join(OUT_DIR, "failures.txt"), "w", encoding="utf-8") as f:
-            f.write("\n".join(failures))
+        write_failures(os.path.join(OUT_DIR, "failures.txt"), failures)
         print(f"Failures logged: {len(failures)}")
 
+    return {
+        "products": len(tasks),
+        "rows": len(df),
+        "failures": len(failures),
+        "downloads": download_stats,
+        "pages": page_stats,
+    }
+
 if __name__ == "__main__":
-    crawl()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resume", action="store_true", help="crawl_state.sqlite3 기준으로 완료된 상품은 건너뛰고 이어서 크롤링")
+    parser.add_argument("--workers", type=int, default=NUM_WORKERS, help="상품 상세 크롤링 크롬 드라이버 수")
+    parser.add_argument("--image-layout", choices=["product", "cas"], default=IMAGE_STORE_LAYOUT,
+                        help="이미지 저장 방식 (cas: 동일 이미지는 images/blobs/에 한 번만 저장)")
+    parser.add_argument("--no-lean", action="store_true", help="리소스 차단 없이 일반 크롬 프로필로 크롤링")
+    parser.add_argument("--parquet", action="store_true", help="products_parquet/에 category 분할 Parquet도 저장 (pyarrow 필요)")
+    args = parser.parse_args()
+    crawl(resume=args.resume, num_workers=args.workers, image_layout=args.image_layout,
+          lean=LEAN_DRIVER and not args.no_lean, parquet=args.parquet)
@@ -0,0 +1,200 @@
+from selenium.common.exceptions import UnexpectedAlertPresentException
+
+
+# 상세 이미지에서 제외할 URL 패턴 (아이콘, 버튼, 플레이스홀더 등)
+DETAIL_EXCLUDE_MARKERS = [
+    "icon", "logo", "thumb_small", "btn_", "arrow",
+    "1x1", "1px", "pixel", "transparent", "blank", "placeholder",
+]
+# Shadow DOM을 못 찾았을 때 일반 DOM에서 시도하는 선택자
+DETAIL_FALLBACK_SELECTORS = [
+    "div._editor_contents img",
+    "[imglazyload] img",
+    "div[class*='editor'] img",
+    ".wrap_editor img",
+]
+DETAIL_FALLBACK_EXCLUDE_MARKERS = ["icon", "logo", "thumb_small", "btn_", "arrow"]
+BREADCRUMB_SELECTORS = [".breadcrumb", "nav.breadcrumb", "ul.breadcrumb"]
+
+# 상품 상세 페이지에서 필요한 값을 한 번의 execute_script로 모두 수집해 JSON으로 반환
+_PRODUCT_PAGE_JS = """
+var excludeMarkers = arguments[0];
+var fallbackSelectors = arguments[1];
+var fallbackExcludeMarkers = arguments[2];
+var breadcrumbSelectors = arguments[3];
+
+function isHttp(url) {
+    return !!url && (url.indexOf('http://') === 0 || url.indexOf('https://') === 0);
+}
+function hasMarker(url, markers) {
+    var lower = url.toLowerCase();
+    for (var i = 0; i < markers.length; i++) {
+        if (lower.indexOf(markers[i]) !== -1) return true;
+    }
+    return false;
+}
+function text(el) {
+    return el ? (el.innerText || el.textContent || '').trim() : '';
+}
+
+var result = {
+    name: text(document.querySelector('h2.tit_subject')),
+    priceText: text(document.querySelector('span.txt_total')),
+    ogImage: '',
+    detailSource: '',
+    candidateCount: 0,
+    detailImages: [],
+    excluded: [],
+    breadcrumbs: []
+};
+
+var og = document.querySelector("meta[property='og:image']");
+if (og) result.ogImage = og.getAttribute('content') || '';
+
+var host = document.querySelector('app-view-encapsuled-product-desc');
+var shadowRoot = host ? host.shadowRoot : null;
+var seen = {};
+
+if (shadowRoot) {
+    result.detailSource = 'shadow';
+    var editorContents = shadowRoot.querySelector('div._editor_contents');
+    var imgs = editorContents ? editorContents.querySelectorAll('img') : [];
+    for (var i = 0; i < imgs.length; i++) {
+        var img = imgs[i];
+        // 로딩된 src 기준으로 빈 이미지/플레이스홀더 1차 제외
+        var loaded = img.src || img.getAttribute('data-original-src') || img.getAttribute('data-src');
+        if (!isHttp(loaded) || hasMarker(loaded, ['1x1', 'pixel', 'transparent', 'blank'])) continue;
+        result.candidateCount++;
+
+        // 원본 URL은 data-original-src 우선
+        var src = img.getAttribute('data-original-src') || img.getAttribute('data-src') || img.src;
+        if (!isHttp(src)) continue;
+        if (hasMarker(src, excludeMarkers)) {
+            result.excluded.push(src);
+            continue;
+        }
+        if (!seen[src]) {
+            seen[src] = true;
+            result.detailImages.push(src);
+        }
+    }
+} else {
+    for (var s = 0; s < fallbackSelectors.length; s++) {
+        var fallbackImgs = document.querySelectorAll(fallbackSelectors[s]);
+        for (var j = 0; j < fallbackImgs.length; j++) {
+            var fsrc = fallbackImgs[j].src || fallbackImgs[j].getAttribute('data-original-src');
+            if (isHttp(fsrc) && !hasMarker(fsrc, fallbackExcludeMarkers) && !seen[fsrc]) {
+                seen[fsrc] = true;
+                result.detailImages.push(fsrc);
+            }
+        }
+        result.candidateCount += fallbackImgs.length;
+        if (result.detailImages.length) {
+            result.detailSource = fallbackSelectors[s];
+            break;
+        }
+    }
+}
+
+for (var b = 0; b < breadcrumbSelectors.length; b++) {
+    var sel = breadcrumbSelectors[b];
+    var crumbs = document.querySelectorAll(sel + ' li, ' + sel + ' a');
+    if (crumbs.length) {
+        for (var c = 0; c < crumbs.length; c++) {
+            var t = text(crumbs[c]);
+            if (t) result.breadcrumbs.push(t);
+        }
+        break;
+    }
+}
+return result;
+"""
+
+# 목록 페이지의 상품 링크를 선택자 순서대로 찾아 한 번에 반환
+_LIST_LINKS_JS = """
+var selectors = arguments[0];
+var result = {counts: [], links: [], allLinkCount: 0, productLinkCount: 0};
+var seen = {};
+for (var i = 0; i < selectors.length; i++) {
+    var cards;
+    try {
+        cards = document.querySelectorAll(selectors[i]);
+    } catch (e) {
+        result.counts.push([selectors[i], -1]);
+        continue;
+    }
+    result.counts.push([selectors[i], cards.length]);
+    for (var j = 0; j < cards.length; j++) {
+        var href = cards[j].href || cards[j].getAttribute('href');
+        if (href && href.indexOf('/product/') !== -1 && !seen[href]) {
+            seen[href] = true;
+            result.links.push(href);
+        }
+    }
+    if (result.links.length) break;
+}
+if (!result.links.length) {
+    var all = document.querySelectorAll('a');
+    result.allLinkCount = all.length;
+    for (var k = 0; k < all.length; k++) {
+        if (all[k].href && all[k].href.indexOf('/product/') !== -1) result.productLinkCount++;
+    }
+}
+return result;
+"""
+
+# 카테고리 탭의 이름(aria-label)과 href를 한 번에 반환
+_CATEGORY_TABS_JS = """
+var selectors = arguments[0];
+for (var i = 0; i < selectors.length; i++) {
+    var tabs = document.querySelectorAll(selectors[i]);
+    if (tabs.length) {
+        var info = [];
+        for (var j = 0; j < tabs.length; j++) {
+            info.push({
+                name: tabs[j].getAttribute('aria-label') || '알 수 없음',
+                href: tabs[j].href || tabs[j].getAttribute('href') || ''
+            });
+        }
+        return {selector: selectors[i], tabs: info};
+    }
+}
+return {selector: null, tabs: []};
+"""
+
+
+def _run_script(driver, script, *args, alert_handler=None):
+    # 알림창 때문에 실패하면 알림창을 닫고 한 번 더 시도
+    try:
+        return driver.execute_script(script, *args)
+    except UnexpectedAlertPresentException:
+        if alert_handler is None:
+            raise
+        alert_handler(driver)
+        return driver.execute_script(script, *args)
+
+
+def extract_product_page(driver, alert_handler=None):
+    """
+    상품명, 가격 텍스트, og:image, 필터링된 상세 이미지 URL, 브레드크럼을 한 번의 JS 호출로 수집.
+    반환 키: name, priceText, ogImage, detailSource, candidateCount, detailImages, excluded, breadcrumbs
+    """
+    return _run_script(
+        driver, _PRODUCT_PAGE_JS,
+        DETAIL_EXCLUDE_MARKERS, DETAIL_FALLBACK_SELECTORS,
+        DETAIL_FALLBACK_EXCLUDE_MARKERS, BREADCRUMB_SELECTORS,
+        alert_handler=alert_handler,
+    )
+
+
+def extract_list_links(driver, selectors, alert_handler=None):
+    """
+    selectors를 순서대로 시도해 처음으로 상품 링크가 나온 선택자의 링크(중복 제거)를 반환.
+    반환 키: counts([선택자, 요소 수] 목록), links, allLinkCount, productLinkCount
+    """
+    return _run_script(driver, _LIST_LINKS_JS, selectors, alert_handler=alert_handler)
+
+
+def extract_category_tabs(driver, selectors, alert_handler=None):
+    # 반환: {"selector": 사용된 선택자, "tabs": [{"name", "href"}, ...]}
+    return _run_script(driver, _CATEGORY_TABS_JS, selectors, alert_handler=alert_handler)
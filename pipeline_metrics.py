@@ -0,0 +1,184 @@
+import datetime
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from stats_util import percentile
+
+
+# 요약/Prometheus에 내보내는 분위수
+QUANTILES = [50, 95, 99]
+
+
+def new_span(product_id, mode):
+    # 행 하나의 처리 기록. 각 단계에서 키를 채워 넣음
+    return {
+        "product_id": str(product_id),
+        "mode": mode,
+        "started_at": datetime.datetime.now().isoformat(timespec="milliseconds"),
+        "encode_sec": None,
+        "request_sec": None,
+        "estimated_tokens": None,
+        "prompt_tokens": None,
+        "completion_tokens": None,
+        "retries": 0,
+        "cache_hit": False,
+        "error": None,
+        "_started": time.monotonic(),
+    }
+
+
+def record_usage(span, response):
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        span["prompt_tokens"] = getattr(usage, "prompt_tokens", None)
+        span["completion_tokens"] = getattr(usage, "completion_tokens", None)
+
+
+class PipelineMetrics:
+    """
+    description 생성 행 단위 지표 수집.
+
+    - finish()마다 span을 JSONL로 한 줄씩 기록 (spans_path)
+    - serve(port)로 http://127.0.0.1:<port>/metrics 에 Prometheus 텍스트 형식 노출
+    - report()로 실행 종료 시 p50/p95/p99 지연시간, rows/min, 토큰 사용량 요약 출력/저장
+    """
+
+    def __init__(self, spans_path=None):
+        self._lock = threading.Lock()
+        self.spans = []
+        self.started = time.monotonic()
+        self.server = None
+        self._file = None
+        if spans_path:
+            os.makedirs(os.path.dirname(spans_path) or ".", exist_ok=True)
+            self._file = open(spans_path, "a", encoding="utf-8")
+
+    def start_span(self, product_id, mode):
+        return new_span(product_id, mode)
+
+    def finish(self, span, description):
+        span["status"] = "ok" if description else "failed"
+        span["total_sec"] = round(time.monotonic() - span.pop("_started"), 4)
+        for key in ("encode_sec", "request_sec"):
+            if span[key] is not None:
+                span[key] = round(span[key], 4)
+        with self._lock:
+            self.spans.append(span)
+            if self._file:
+                self._file.write(json.dumps(span, ensure_ascii=False) + "\n")
+                self._file.flush()
+
+    def _values(self, spans, key):
+        return [s[key] for s in spans if s.get(key) is not None]
+
+    def summary(self):
+        with self._lock:
+            spans = list(self.spans)
+        elapsed = time.monotonic() - self.started
+        rows = len(spans)
+        failed = sum(1 for s in spans if s["status"] != "ok")
+        # 캐시 적중 행은 API 지연시간 분포에서 제외
+        requested = [s for s in spans if not s["cache_hit"]]
+        result = {
+            "rows": rows,
+            "ok": rows - failed,
+            "failed": failed,
+            "error_rate": round(failed / rows, 4) if rows else 0.0,
+            "cache_hits": rows - len(requested),
+            "retries": sum(s["retries"] for s in spans),
+            "elapsed_sec": round(elapsed, 2),
+            "rows_per_min": round(rows / elapsed * 60, 2) if elapsed > 0 else 0.0,
+            "prompt_tokens": sum(self._values(spans, "prompt_tokens")),
+            "completion_tokens": sum(self._values(spans, "completion_tokens")),
+            "estimated_tokens": sum(self._values(spans, "estimated_tokens")),
+        }
+        for key in ("request_sec", "encode_sec", "total_sec"):
+            values = self._values(requested, key)
+            for q in QUANTILES:
+                result[f"{key}_p{q}"] = round(percentile(values, q), 4)
+        errors = {}
+        for s in spans:
+            if s.get("error"):
+                errors[s["error"]] = errors.get(s["error"], 0) + 1
+        result["errors"] = errors
+        return result
+
+    def prometheus_text(self):
+        s = self.summary()
+        lines = []
+
+        def metric(name, mtype, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {mtype}")
+            for labels, value in samples:
+                label_text = "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}" if labels else ""
+                lines.append(f"{name}{label_text} {value}")
+
+        metric("description_rows_total", "counter", "처리한 행 수",
+               [({"status": "ok"}, s["ok"]), ({"status": "failed"}, s["failed"])])
+        metric("description_cache_hits_total", "counter", "응답 캐시 적중 수", [({}, s["cache_hits"])])
+        metric("description_retries_total", "counter", "API 재시도 횟수", [({}, s["retries"])])
+        metric("description_tokens_total", "counter", "사용 토큰 수",
+               [({"type": "prompt"}, s["prompt_tokens"]), ({"type": "completion"}, s["completion_tokens"])])
+        metric("description_errors_total", "counter", "오류 유형별 실패 수",
+               [({"error": name}, count) for name, count in s["errors"].items()])
+        metric("description_rows_per_minute", "gauge", "시작 이후 분당 처리 행 수", [({}, s["rows_per_min"])])
+        for key, help_text in (("request_sec", "API 요청 지연시간(재시도 포함)"),
+                               ("encode_sec", "이미지 인코딩/메시지 구성 시간"),
+                               ("total_sec", "행 전체 처리 시간")):
+            metric(f"description_{key.replace('_sec', '_seconds')}", "summary", help_text,
+                   [({"quantile": q / 100}, s[f"{key}_p{q}"]) for q in QUANTILES])
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = metrics.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="metrics-server", daemon=True).start()
+        print(f"[INFO] 지표 노출: http://{host}:{port}/metrics")
+
+    def report(self, summary_path=None):
+        s = self.summary()
+        print(f"[INFO] 처리 {s['rows']}행 (성공 {s['ok']}, 실패 {s['failed']}, 캐시 {s['cache_hits']}), "
+              f"{s['elapsed_sec']:.1f}초, {s['rows_per_min']:.1f} rows/min")
+        if s["rows"] > s["cache_hits"]:
+            print(f"[INFO] API 지연시간 p50 {s['request_sec_p50']:.2f}초 / p95 {s['request_sec_p95']:.2f}초 / "
+                  f"p99 {s['request_sec_p99']:.2f}초, 인코딩 p50 {s['encode_sec_p50']:.2f}초, 재시도 {s['retries']}회")
+            print(f"[INFO] 토큰: 입력 {s['prompt_tokens']:,} / 출력 {s['completion_tokens']:,} "
+                  f"(예측 입력 {s['estimated_tokens']:,})")
+        if s["errors"]:
+            print(f"[INFO] 오류 유형: {s['errors']}")
+        if summary_path:
+            os.makedirs(os.path.dirname(summary_path) or ".", exist_ok=True)
+            with open(summary_path, "w", encoding="utf-8") as f:
+                json.dump(s, f, ensure_ascii=False, indent=2)
+        return s
+
+    def close(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
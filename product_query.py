@@ -0,0 +1,214 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from product_store import add_detail_image_count, features_as_text
+
+
+DEFAULT_QUERY_DB_NAME = "products_query.sqlite3"
+# 화면에 필요한 컬럼 (없는 컬럼은 NULL)
+QUERY_COLUMNS = ["product_id", "name", "price", "image_path", "features", "category", "source_url",
+                 "detail_image_count"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key    TEXT PRIMARY KEY,
+    value  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS products (
+    pos                 INTEGER PRIMARY KEY,
+    product_id          TEXT,
+    name                TEXT,
+    price               REAL,
+    image_path          TEXT,
+    features            TEXT,
+    category            TEXT,
+    source_url          TEXT,
+    detail_image_count  INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_products_category ON products (category, pos);
+CREATE INDEX IF NOT EXISTS idx_products_price ON products (price, category, detail_image_count);
+CREATE TABLE IF NOT EXISTS category_stats (
+    category      TEXT,
+    rows          INTEGER NOT NULL,
+    images        INTEGER NOT NULL,
+    priced_rows   INTEGER NOT NULL,
+    priced_sum    REAL NOT NULL,
+    priced_images INTEGER NOT NULL
+);
+"""
+
+
+def query_db_path_for(dataset_path):
+    # 데이터셋(products.csv 또는 products_parquet/) 옆에 저장
+    return os.path.join(os.path.dirname(os.path.abspath(dataset_path)), DEFAULT_QUERY_DB_NAME)
+
+
+class ProductQueryEngine:
+    """
+    시각화용 상품 조회 엔진 (SQLite).
+
+    - products: 데이터셋 행 순서(pos) 그대로 저장, category/price 인덱스
+    - category_stats: 카테고리별 행 수, 상세 이미지 수, 가격 합계를 미리 집계
+    - page()는 현재 페이지 행만, stats()는 개수/평균 가격/카테고리 수/상세 이미지 수만 반환
+    - 검색 결과(순위순 pos 배열)는 JSON 배열 하나로 넘겨 json_each로 조인 (순위 = 배열 순서)
+    데이터셋 fingerprint가 저장된 값과 같으면 다시 만들지 않음
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+        self._bounds = None
+
+    def fingerprint(self):
+        r = self.conn.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        return r[0] if r else None
+
+    def sync(self, fingerprint, load_fn):
+        """
+        저장된 fingerprint와 다를 때만 load_fn()으로 데이터를 읽어 다시 적재.
+        반환: {"rebuilt", "rows", "sec"}
+        """
+        started = time.monotonic()
+        with self._lock:
+            if self.fingerprint() == fingerprint:
+                return {"rebuilt": False, "rows": self._count_all(), "sec": 0.0}
+            df = features_as_text(add_detail_image_count(load_fn()))
+            columns = [c for c in QUERY_COLUMNS if c in df.columns]
+            table = df.reindex(columns=QUERY_COLUMNS)
+            table["price"] = pd.to_numeric(table["price"], errors="coerce")
+            table = table.astype(object).where(table.notna(), None)
+            rows = [(pos,) + values for pos, values in enumerate(table.itertuples(index=False, name=None))]
+            with self.conn:
+                self.conn.execute("DELETE FROM products")
+                self.conn.execute("DELETE FROM category_stats")
+                self.conn.executemany(
+                    f"INSERT INTO products (pos, {', '.join(QUERY_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * (len(QUERY_COLUMNS) + 1))})", rows)
+                self.conn.execute(
+                    "INSERT INTO category_stats (category, rows, images, priced_rows, priced_sum, priced_images) "
+                    "SELECT category, COUNT(*), SUM(detail_image_count), COUNT(price), COALESCE(SUM(price), 0), "
+                    "COALESCE(SUM(CASE WHEN price IS NOT NULL THEN detail_image_count END), 0) "
+                    "FROM products GROUP BY category")
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)", (fingerprint,))
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('columns', ?)",
+                                  (",".join(columns),))
+            self.conn.execute("ANALYZE")
+            self._bounds = None
+        return {"rebuilt": True, "rows": len(rows), "sec": round(time.monotonic() - started, 2)}
+
+    def _count_all(self):
+        return self.conn.execute("SELECT COALESCE(SUM(rows), 0) FROM category_stats").fetchone()[0]
+
+    def columns(self):
+        r = self.conn.execute("SELECT value FROM meta WHERE key = 'columns'").fetchone()
+        return r[0].split(",") if r and r[0] else []
+
+    def count(self):
+        with self._lock:
+            return self._count_all()
+
+    def _price_bounds(self):
+        # MIN/MAX를 따로 조회해야 각각 price 인덱스 끝값만 읽음
+        if self._bounds is None:
+            self._bounds = self.conn.execute(
+                "SELECT (SELECT MIN(price) FROM products), (SELECT MAX(price) FROM products)").fetchone()
+        return self._bounds
+
+    def price_bounds(self):
+        # (최소, 최대) 또는 가격이 하나도 없으면 None
+        with self._lock:
+            low, high = self._price_bounds()
+        return None if low is None else (low, high)
+
+    def _full_price(self, price_range):
+        low, high = self._price_bounds()
+        return low is not None and price_range[0] <= low and price_range[1] >= high
+
+    def categories(self):
+        # 데이터셋에 처음 나온 순서
+        with self._lock:
+            cur = self.conn.execute(
+                "SELECT category FROM products WHERE category IS NOT NULL GROUP BY category ORDER BY MIN(pos)")
+            return [r[0] for r in cur.fetchall()]
+
+    def product_ids(self):
+        with self._lock:
+            return [r[0] for r in self.conn.execute("SELECT product_id FROM products ORDER BY pos")]
+
+    def frame(self, columns):
+        # 썸네일 미리 생성 등 전체 행이 필요한 경우 해당 컬럼만
+        with self._lock:
+            return pd.read_sql_query(f"SELECT {', '.join(columns)} FROM products ORDER BY pos", self.conn)
+
+    def _where(self, price_range, categories, use_price_index=True):
+        clauses, params = [], []
+        if price_range is not None:
+            if self._full_price(price_range):
+                # 전체 범위면 가격 없는 상품만 제외
+                clauses.append("p.price IS NOT NULL")
+            else:
+                # 페이지 조회는 pos 순서로 읽다가 LIMIT만큼 차면 멈추도록 price 인덱스를 쓰지 않음 (+p.price)
+                clauses.append(("p.price" if use_price_index else "+p.price") + " BETWEEN ? AND ?")
+                params.extend(price_range)
+        if categories is not None:
+            clauses.append(f"p.category IN ({', '.join('?' * len(categories))})")
+            params.extend(categories)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _source(self, hits, params):
+        if hits is None:
+            return "products p", params
+        return "json_each(?) h JOIN products p ON p.pos = h.value", [json.dumps(hits.tolist())] + params
+
+    def stats(self, price_range=None, categories=None, hits=None):
+        """
+        필터 결과 통계 {"count", "avg_price", "category_count", "detail_images"}.
+        검색이 없고 가격 범위가 전체(또는 없음)이면 category_stats 집계만 읽음
+        """
+        with self._lock:
+            if hits is None and (price_range is None or self._full_price(price_range)):
+                where, params = "", []
+                if categories is not None:
+                    where = f" WHERE category IN ({', '.join('?' * len(categories))})"
+                    params = list(categories)
+                if price_range is None:
+                    sql = ("SELECT COALESCE(SUM(rows), 0), SUM(priced_sum) / NULLIF(SUM(priced_rows), 0), "
+                           "COUNT(CASE WHEN category IS NOT NULL AND rows > 0 THEN 1 END), COALESCE(SUM(images), 0) "
+                           "FROM category_stats")
+                else:
+                    # 가격 필터가 있으면 가격 없는 상품은 제외 (BETWEEN과 같은 기준)
+                    sql = ("SELECT COALESCE(SUM(priced_rows), 0), SUM(priced_sum) / NULLIF(SUM(priced_rows), 0), "
+                           "COUNT(CASE WHEN category IS NOT NULL AND priced_rows > 0 THEN 1 END), "
+                           "COALESCE(SUM(priced_images), 0) FROM category_stats")
+                r = self.conn.execute(sql + where, params).fetchone()
+            else:
+                where, params = self._where(price_range, categories)
+                source, params = self._source(hits, params)
+                r = self.conn.execute(
+                    f"SELECT COUNT(*), AVG(p.price), COUNT(DISTINCT p.category), COALESCE(SUM(p.detail_image_count), 0) "
+                    f"FROM {source}{where}", params).fetchone()
+        return {"count": int(r[0]), "avg_price": r[1], "category_count": int(r[2]), "detail_images": int(r[3])}
+
+    def page(self, offset, limit, price_range=None, categories=None, hits=None):
+        # 현재 페이지 행만 DataFrame으로 (검색이 있으면 순위순, 없으면 데이터셋 순서)
+        with self._lock:
+            where, params = self._where(price_range, categories, use_price_index=False)
+            source, params = self._source(hits, params)
+            order = "h.key" if hits is not None else "p.pos"
+            sql = f"SELECT p.* FROM {source}{where} ORDER BY {order} LIMIT ? OFFSET ?"
+            return pd.read_sql_query(sql, self.conn, params=params + [limit, offset])
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,203 @@
+import io
+import os
+import shutil
+
+import pandas as pd
+
+
+# products.csv / products_with_description.csv 컬럼 타입 (없는 컬럼은 무시)
+STRING_COLUMNS = ["product_id", "name", "image_path", "features", "source_url", "crawled_at", "description"]
+CATEGORY_COLUMNS = ["category", "theme"]
+NUMERIC_COLUMNS = ["price", "detail_load_sec", "detail_image_count"]
+# Parquet 데이터셋은 category별 폴더로 분할 (category=뷰티/part-0.parquet ...)
+PARTITION_COLUMNS = ["category"]
+# 분할 폴더 순으로 읽히므로 원래 행 순서(크롤링 순서)를 따로 저장해 두고 읽을 때 정렬
+ORDER_COLUMN = "crawl_order"
+FEATURE_SEPARATOR = "; "
+
+
+def is_parquet_path(path):
+    return isinstance(path, str) and (os.path.isdir(path) or path.endswith(".parquet"))
+
+
+def dataset_base_dir(path):
+    # 이미지 상대 경로의 기준 폴더 (products.csv 또는 products_parquet/가 있는 폴더, 끝의 '/'는 무시)
+    return os.path.dirname(os.path.normpath(path))
+
+
+def file_fingerprint(path):
+    # 같은 파일이면 같은 값 (수정되면 mtime/크기가 바뀌어 다시 로드). 폴더(Parquet 데이터셋)는 안의 파일 전체 기준
+    if os.path.isdir(path):
+        latest, total, count = 0, 0, 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                st = os.stat(os.path.join(root, name))
+                latest = max(latest, st.st_mtime_ns)
+                total += st.st_size
+                count += 1
+        return f"{os.path.abspath(path)}|{latest}|{total}|{count}"
+    st = os.stat(path)
+    return f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}"
+
+
+def feature_list(value):
+    # features 값(CSV의 세미콜론 구분 문자열 또는 Parquet의 리스트)을 경로 리스트로
+    if value is None or value is pd.NA:
+        return []
+    if isinstance(value, str):
+        return [f.strip() for f in value.split(";") if f.strip()]
+    if isinstance(value, float):
+        return []
+    return [str(f).strip() for f in value if f is not None and str(f).strip()]
+
+
+def _apply_types(df):
+    for column in NUMERIC_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors="coerce")
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    return df
+
+
+def features_as_text(df):
+    # CSV로 쓸 때 리스트 features를 원래 "; " 구분 문자열로 되돌림 (원본 df는 그대로)
+    if "features" not in df.columns:
+        return df
+    return df.assign(features=[FEATURE_SEPARATOR.join(feature_list(v)) for v in df["features"]])
+
+
+def apply_filters(df, filters):
+    """
+    pyarrow 형식 필터 [(컬럼, 연산자, 값), ...]를 pandas로 적용 (CSV 입력용, 모든 조건 AND).
+    연산자: ==, =, !=, <, <=, >, >=, in, not in
+    """
+    if not filters:
+        return df
+    mask = pd.Series(True, index=df.index)
+    for column, op, value in filters:
+        series = df[column]
+        if op in ("==", "="):
+            mask &= series == value
+        elif op == "!=":
+            mask &= series != value
+        elif op == "<":
+            mask &= series < value
+        elif op == "<=":
+            mask &= series <= value
+        elif op == ">":
+            mask &= series > value
+        elif op == ">=":
+            mask &= series >= value
+        elif op == "in":
+            mask &= series.isin(list(value))
+        elif op == "not in":
+            mask &= ~series.isin(list(value))
+        else:
+            raise ValueError(f"지원하지 않는 필터 연산자: {op}")
+    return df[mask.fillna(False).astype(bool)].reset_index(drop=True)
+
+
+def read_products_csv(source, columns=None, filters=None):
+    """
+    상품 CSV를 명시적 타입으로 로드 (source: 경로 또는 bytes).
+    문자열 컬럼은 string, category/theme는 category, price 등은 숫자로 변환.
+    columns를 주면 해당 컬럼만 파싱, filters는 로드 후 적용 (pushdown은 Parquet에서만)
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    header = pd.read_csv(source, nrows=0)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    usecols = None
+    if columns is not None:
+        needed = list(columns) + [f[0] for f in filters or [] if f[0] not in columns]
+        usecols = [c for c in header.columns if c in needed]
+    dtypes = {c: "string" for c in STRING_COLUMNS if c in header.columns}
+    dtypes.update({c: "string" for c in CATEGORY_COLUMNS if c in header.columns})
+    df = _apply_types(pd.read_csv(source, dtype=dtypes, usecols=usecols))
+    df = apply_filters(df, filters)
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    return df
+
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def read_products_parquet(path, columns=None, filters=None):
+    """
+    Parquet 데이터셋(파일 또는 category 분할 폴더) 로드 (pyarrow 필요).
+    columns는 해당 컬럼만 읽고(없는 컬럼은 무시), filters는 분할 폴더/row group 단위로 건너뛰어 읽음.
+    features는 리스트 컬럼 그대로 반환 (feature_list()로 처리).
+    행은 저장 당시 순서(crawl_order)로 정렬해 CSV와 같은 순서로 반환 (crawl_order 컬럼은 제외)
+    """
+    import pyarrow.dataset as ds
+    names = ds.dataset(path, format="parquet", partitioning="hive").schema.names
+    if columns is not None:
+        columns = [c for c in columns if c in names]
+        if ORDER_COLUMN in names and ORDER_COLUMN not in columns:
+            columns = columns + [ORDER_COLUMN]
+    df = pd.read_parquet(path, engine="pyarrow", columns=columns, filters=filters or None)
+    if ORDER_COLUMN in df.columns:
+        df = df.sort_values(ORDER_COLUMN, kind="stable").drop(columns=ORDER_COLUMN).reset_index(drop=True)
+    return _apply_types(df)
+
+
+def load_products(source, columns=None, filters=None):
+    # 경로가 폴더나 .parquet이면 Parquet, 그 외(CSV 경로/업로드 bytes)는 CSV로 로드
+    if is_parquet_path(source):
+        return read_products_parquet(source, columns, filters)
+    return read_products_csv(source, columns, filters)
+
+
+def write_products_parquet(df, path, partition_cols=PARTITION_COLUMNS):
+    """
+    features를 리스트 컬럼으로 바꿔 category별로 분할 저장 (임시 폴더에 쓴 뒤 교체).
+    현재 행 순서를 crawl_order 컬럼으로 함께 저장 (read_products_parquet가 이 순서로 복원).
+    pyarrow가 없으면 경고만 출력하고 False 반환
+    """
+    if not parquet_available():
+        print("[WARNING] Parquet 저장 건너뜀 (pyarrow 필요)")
+        return False
+    out = df.copy()
+    out[ORDER_COLUMN] = range(len(out))
+    if "features" in out.columns:
+        out["features"] = [feature_list(v) for v in out["features"]]
+    for column in NUMERIC_COLUMNS:
+        if column in out.columns:
+            out[column] = pd.to_numeric(out[column], errors="coerce")
+    partition_cols = [c for c in partition_cols or [] if c in out.columns]
+    for column in partition_cols:
+        # 분할 컬럼은 빈 값이 있으면 저장할 수 없으므로 빈 문자열 대신 "기타"로 채움
+        out[column] = out[column].astype("string").fillna("기타").replace("", "기타")
+    tmp_path = path + ".tmp"
+    if os.path.isdir(tmp_path):
+        shutil.rmtree(tmp_path)
+    if partition_cols:
+        out.to_parquet(tmp_path, engine="pyarrow", index=False, partition_cols=partition_cols)
+    else:
+        out.to_parquet(tmp_path, engine="pyarrow", index=False)
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+    os.replace(tmp_path, path)
+    return True
+
+
+def add_detail_image_count(df):
+    # features에서 상세 이미지 수 컬럼을 채움 (컬럼이 없던 이전 데이터/빈 값 보완)
+    counts = [len(feature_list(v)) for v in df["features"]] if "features" in df.columns else [0] * len(df)
+    if "detail_image_count" in df.columns:
+        existing = pd.to_numeric(df["detail_image_count"], errors="coerce")
+        df["detail_image_count"] = existing.fillna(pd.Series(counts, index=df.index)).astype(int)
+    else:
+        df["detail_image_count"] = counts
+    return df
@@ -4,6 +4,27 @@ from PIL import Image
 import os
 from pathlib import Path
 import math
+import hashlib
+
+from product_store import (load_products as read_products, file_fingerprint, feature_list, parquet_available,
+                           dataset_base_dir)
+from product_query import ProductQueryEngine, query_db_path_for
+from search_index import SearchIndex, index_path_for
+from thumbnail_cache import ThumbnailCache, DEFAULT_THUMB_DIR, CARD_SIZE, MODAL_MAIN_SIZE, MODAL_DETAIL_SIZE, dataset_image_paths
+
+DEFAULT_CSV_PATH = "dataset/products.csv"
+DEFAULT_PARQUET_PATH = "dataset/products_parquet"
+# 화면에 쓰는 컬럼만 읽음 (description 등 긴 텍스트 컬럼은 로드하지 않음)
+VIEW_COLUMNS = ["product_id", "name", "price", "image_path", "features", "category", "source_url",
+                "detail_image_count"]
+# 검색 색인 대상 (description은 있으면 함께 색인)
+SEARCH_COLUMNS = ["product_id", "name", "description"]
+
+def default_dataset_path():
+    # 크롤러를 --parquet으로 실행해 분할 Parquet이 있으면 우선 사용
+    if os.path.isdir(DEFAULT_PARQUET_PATH) and parquet_available():
+        return DEFAULT_PARQUET_PATH
+    return DEFAULT_CSV_PATH
 
 # 페이지 설정
 st.set_page_config(
@@ -12,25 +33,53 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource
+def get_thumbnail_cache():
+    # 세션/재실행 간 공유 (메모리 LRU 유지)
+    return ThumbnailCache(DEFAULT_THUMB_DIR)
+
+@st.cache_resource(max_entries=4)
+def get_query_engine(fingerprint, _source):
+    # 데이터셋 옆 products_query.sqlite3에 적재 (fingerprint가 같으면 재사용, 업로드 파일은 메모리 DB)
+    path = query_db_path_for(_source) if isinstance(_source, str) else ":memory:"
+    engine = ProductQueryEngine(path)
+    engine.sync(fingerprint, lambda: read_products(_source, columns=VIEW_COLUMNS))
+    return engine
+
+@st.cache_resource(max_entries=4)
+def get_search_index(fingerprint, _source, _engine):
+    # 데이터셋 옆 search_index.sqlite3를 열어 바뀐 상품만 다시 색인 (업로드 파일은 메모리 색인)
+    path = index_path_for(_source) if isinstance(_source, str) else ":memory:"
+    index = SearchIndex(path)
+    index.update(read_products(_source, columns=SEARCH_COLUMNS))
+    # doc_id -> 조회 엔진 행 위치(pos)
+    return index, index.doc_positions(_engine.product_ids())
+
+@st.cache_data(max_entries=256)
+def search_hits(fingerprint, _source, _engine, search_term):
+    # 검색어별 순위순 행 위치 (색인에만 있고 데이터셋에 없는 상품은 제외)
+    index, doc_positions = get_search_index(fingerprint, _source, _engine)
+    ranked = doc_positions[index.search_docs(search_term)]
+    return ranked[ranked >= 0]
+
+@st.cache_data(max_entries=256)
+def query_stats(fingerprint, _source, _engine, search_term, price_range, categories):
+    # (검색어, 가격 범위, 카테고리) 조합별 통계만 조회 (검색이 없으면 미리 집계된 category_stats 사용)
+    hits = search_hits(fingerprint, _source, _engine, search_term) if search_term else None
+    return _engine.stats(price_range, categories, hits)
+
+@st.cache_data(max_entries=256)
+def query_page(fingerprint, _source, _engine, search_term, price_range, categories, offset, limit):
+    # 현재 페이지 행만 조회
+    hits = search_hits(fingerprint, _source, _engine, search_term) if search_term else None
+    return _engine.page(offset, limit, price_range, categories, hits)
+
 def load_image_safe(image_path, base_dir, max_width=300, max_height=400):
+    # 원본 대신 (max_width, max_height) 크기 썸네일 바이트 반환 (처음 한 번만 생성)
     try:
         full_path = os.path.join(base_dir, image_path)
         if os.path.exists(full_path):
-            image = Image.open(full_path)
-            image = image.convert('RGB')
-            
-            original_width, original_height = image.size
-            
-            width_ratio = max_width / original_width
-            height_ratio = max_height / original_height
-            
-            ratio = min(width_ratio, height_ratio)
-            
-            new_width = int(original_width * ratio)
-            new_height = int(original_height * ratio)
-            
-            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            return image
+            return get_thumbnail_cache().get(full_path, (max_width, max_height))
         else:
             placeholder = Image.new('RGB', (max_width, max_height), color='lightgray')
             return placeholder
@@ -55,10 +104,10 @@ def main():
         
         # 또는 기본 파일 사용
         st.markdown("**또는**")
-        use_default = st.checkbox("기본 파일 사용 (dataset/products.csv)")
+        use_default = st.checkbox("기본 파일 사용 (dataset/products.csv 또는 products_parquet)")
         
         if use_default:
-            default_path = "dataset/products.csv"
+            default_path = default_dataset_path()
             if os.path.exists(default_path):
                 uploaded_file = default_path
                 st.success("기본 파일을 사용합니다!")
@@ -68,30 +117,35 @@ def main():
     
     # 기본 파일 자동 로드
     if uploaded_file is None and not use_default:
-        default_path = "dataset/products.csv"
+        default_path = default_dataset_path()
         if os.path.exists(default_path):
             uploaded_file = default_path
-            st.info("기본 파일(dataset/products.csv)을 자동으로 로드했습니다!")
+            st.info(f"기본 파일({default_path})을 자동으로 로드했습니다!")
     
     if uploaded_file is not None:
         try:
             if isinstance(uploaded_file, str):
-                df = pd.read_csv(uploaded_file)
-                base_dir = os.path.dirname(uploaded_file)
+                source = uploaded_file
+                fingerprint = file_fingerprint(source)
+                engine = get_query_engine(fingerprint, source)
+                base_dir = dataset_base_dir(uploaded_file)
             else:
-                df = pd.read_csv(uploaded_file)
+                source = uploaded_file.getvalue()
+                fingerprint = hashlib.sha1(source).hexdigest()
+                engine = get_query_engine(fingerprint, source)
                 base_dir = "."
             
-            st.success(f"총 {len(df)}개의 상품 데이터를 로드했습니다!")
+            st.success(f"총 {engine.count()}개의 상품 데이터를 로드했습니다!")
             
             with st.sidebar:
                 st.header("필터링 옵션")
                 
-                search_term = st.text_input("상품명 검색", placeholder="검색어를 입력하세요")
+                search_term = st.text_input("상품명 검색", placeholder="검색어 또는 초성 (예: 핸드크림, ㅎㄷㅋㄹ)")
                 
-                if 'price' in df.columns and df['price'].notna().any():
-                    min_price = int(df['price'].min())
-                    max_price = int(df['price'].max())
+                price_bounds = engine.price_bounds()
+                if price_bounds is not None:
+                    min_price = int(price_bounds[0])
+                    max_price = int(price_bounds[1])
                     price_range = st.slider(
                         "가격 범위",
                         min_value=min_price,
@@ -102,8 +156,8 @@ def main():
                 else:
                     price_range = None
                 
-                if 'category' in df.columns:
-                    categories = df['category'].dropna().unique()
+                categories = engine.categories()
+                if 'category' in engine.columns():
                     if len(categories) > 0:
                         selected_categories = st.multiselect(
                             "카테고리 선택",
@@ -120,28 +174,29 @@ def main():
                     options=[6, 9, 12, 15, 18],
                     index=2
                 )
+
+                if st.button("썸네일 미리 생성", help="전체 이미지의 썸네일을 병렬로 미리 만들어 둠 (처음 한 번)"):
+                    with st.spinner("썸네일 생성 중..."):
+                        result = get_thumbnail_cache().prebuild(
+                            dataset_image_paths(engine.frame(["image_path", "features"]), base_dir))
+                    st.success(f"생성 {result['built']}개, 기존 {result['skipped']}개, "
+                               f"실패 {result['failed']}개 ({result['sec']}초)")
             
-            filtered_df = df.copy()
-            
-            if search_term:
-                mask = filtered_df['name'].str.contains(search_term, case=False, na=False)
-                filtered_df = filtered_df[mask]
-            
-            if price_range and 'price' in filtered_df.columns:
-                mask = (filtered_df['price'] >= price_range[0]) & (filtered_df['price'] <= price_range[1])
-                filtered_df = filtered_df[mask]
-            
-            if selected_categories and 'category' in filtered_df.columns:
-                mask = filtered_df['category'].isin(selected_categories)
-                filtered_df = filtered_df[mask]
+            # 전부 선택했거나 아무것도 선택하지 않으면 카테고리 필터 없음
+            if selected_categories and len(selected_categories) < len(categories):
+                category_key = tuple(sorted(selected_categories))
+            else:
+                category_key = None
+            filter_key = (search_term or None, tuple(price_range) if price_range else None, category_key)
+            stats = query_stats(fingerprint, source, engine, *filter_key)
             
-            if len(filtered_df) == 0:
+            if stats['count'] == 0:
                 st.warning("⚠️ 필터 조건에 맞는 상품이 없습니다.")
                 return
             
-            st.info(f"필터링 결과: {len(filtered_df)}개 상품")
+            st.info(f"필터링 결과: {stats['count']}개 상품")
             
-            total_pages = math.ceil(len(filtered_df) / items_per_page)
+            total_pages = math.ceil(stats['count'] / items_per_page)
             
             if total_pages > 1:
                 col1, col2, col3 = st.columns([1, 2, 1])
@@ -155,8 +210,7 @@ def main():
                 page = 1
             
             start_idx = (page - 1) * items_per_page
-            end_idx = start_idx + items_per_page
-            page_data = filtered_df.iloc[start_idx:end_idx]
+            page_data = query_page(fingerprint, source, engine, *filter_key, start_idx, items_per_page)
             
             cols_per_row = 3
             rows = math.ceil(len(page_data) / cols_per_row)
@@ -175,7 +229,7 @@ def main():
                                 st.markdown(f"### 🏷️ ID: {item['product_id']}")
                                 
                                 if 'image_path' in item and pd.notna(item['image_path']):
-                                    image = load_image_safe(item['image_path'], base_dir, max_width=300, max_height=300)
+                                    image = load_image_safe(item['image_path'], base_dir, *CARD_SIZE)
                                     st.image(image, width=300)
                                 else:
                                     st.info("이미지 없음")
@@ -188,9 +242,8 @@ def main():
                                 if 'category' in item and pd.notna(item['category']):
                                     st.markdown(f"**카테고리:** {item['category']}")
                                 
-                                if 'features' in item and pd.notna(item['features']):
-                                    features = str(item['features'])
-                                    detail_count = len([f for f in features.split(';') if f.strip()])
+                                detail_count = int(item['detail_image_count'])
+                                if detail_count:
                                     st.markdown(f"**상세 이미지:** {detail_count}개")
                                 
                                 if st.button(f"상세보기", key=f"detail_{item['product_id']}"):
@@ -202,28 +255,23 @@ def main():
                 col1, col2, col3, col4 = st.columns(4)
                 
                 with col1:
-                    st.metric("총 상품 수", len(filtered_df))
+                    st.metric("총 상품 수", stats['count'])
                 
                 with col2:
-                    if 'price' in filtered_df.columns and filtered_df['price'].notna().any():
-                        avg_price = filtered_df['price'].mean()
-                        st.metric("평균 가격", f"{int(avg_price):,}원")
+                    if stats['avg_price'] is not None:
+                        st.metric("평균 가격", f"{int(stats['avg_price']):,}원")
                     else:
                         st.metric("평균 가격", "N/A")
                 
                 with col3:
-                    if 'category' in filtered_df.columns:
-                        unique_categories = filtered_df['category'].nunique()
-                        st.metric("카테고리 수", unique_categories)
+                    if stats['category_count'] is not None:
+                        st.metric("카테고리 수", stats['category_count'])
                     else:
                         st.metric("카테고리 수", "N/A")
                 
                 with col4:
-                    if 'features' in filtered_df.columns:
-                        total_images = 0
-                        for features in filtered_df['features'].dropna():
-                            total_images += len([f for f in str(features).split(';') if f.strip()])
-                        st.metric("총 상세 이미지", total_images)
+                    if stats['detail_images'] is not None:
+                        st.metric("총 상세 이미지", stats['detail_images'])
                     else:
                         st.metric("총 상세 이미지", "N/A")
         
@@ -266,33 +314,30 @@ def show_detail_modal(item, base_dir):
     
     st.markdown("#### 메인 이미지")
     if 'image_path' in item and pd.notna(item['image_path']):
-        image = load_image_safe(item['image_path'], base_dir, max_width=400, max_height=500)
+        image = load_image_safe(item['image_path'], base_dir, *MODAL_MAIN_SIZE)
         st.image(image, width=400)
     else:
         st.info("메인 이미지 없음")
     
-    if 'features' in item and pd.notna(item['features']):
-        features = str(item['features'])
-        detail_images = [f.strip() for f in features.split(';') if f.strip()]
+    detail_images = feature_list(item.get('features'))
+    if detail_images:
+        st.markdown(f"#### 🖼️ 상세 이미지 ({len(detail_images)}개)")
         
-        if detail_images:
-            st.markdown(f"#### 🖼️ 상세 이미지 ({len(detail_images)}개)")
-            
-            cols_per_row = 2
-            rows = math.ceil(len(detail_images) / cols_per_row)
+        cols_per_row = 2
+        rows = math.ceil(len(detail_images) / cols_per_row)
+        
+        for row in range(rows):
+            cols = st.columns(cols_per_row)
             
-            for row in range(rows):
-                cols = st.columns(cols_per_row)
+            for col_idx in range(cols_per_row):
+                img_idx = row * cols_per_row + col_idx
                 
-                for col_idx in range(cols_per_row):
-                    img_idx = row * cols_per_row + col_idx
-                    
-                    if img_idx < len(detail_images):
-                        with cols[col_idx]:
-                            img_path = detail_images[img_idx]
-                            st.markdown(f"**{os.path.basename(img_path)}**")
-                            image = load_image_safe(img_path, base_dir, max_width=250, max_height=300)
-                            st.image(image, width=250)
+                if img_idx < len(detail_images):
+                    with cols[col_idx]:
+                        img_path = detail_images[img_idx]
+                        st.markdown(f"**{os.path.basename(img_path)}**")
+                        image = load_image_safe(img_path, base_dir, *MODAL_DETAIL_SIZE)
+                        st.image(image, width=250)
     
     if 'source_url' in item and pd.notna(item['source_url']):
         st.markdown(f"**원본 URL:** [링크 열기]({item['source_url']})")
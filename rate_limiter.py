@@ -0,0 +1,82 @@
+import asyncio
+import random
+import time
+
+
+class TokenBucket:
+    # 분당 rate_per_min 만큼 채워지는 비동기 토큰 버킷
+
+    def __init__(self, rate_per_min, capacity=None):
+        self.rate = rate_per_min / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_min
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        # 버킷 용량보다 큰 요청은 용량만큼만 소비 (영원히 대기하지 않도록)
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class RateLimiter:
+    """
+    OpenAI 요청 제한(RPM, TPM)을 동시에 지키는 limiter.
+    acquire(tokens)는 요청 1건과 예상 토큰 수만큼 버킷이 찰 때까지 대기
+    """
+
+    def __init__(self, requests_per_min, tokens_per_min):
+        self.requests = TokenBucket(requests_per_min)
+        self.tokens = TokenBucket(tokens_per_min)
+
+    async def acquire(self, tokens):
+        await self.requests.acquire(1)
+        await self.tokens.acquire(tokens)
+
+
+def is_retryable_error(e):
+    # 429 / 5xx / 연결 오류 / 타임아웃만 재시도
+    status = getattr(e, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return type(e).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def retry_after_seconds(e):
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+async def call_with_backoff(make_call, max_retries=5, base_delay=1.0, max_delay=60.0, on_retry=None):
+    """
+    make_call()을 실행하고 재시도 가능한 오류면 지수 백오프(+지터) 후 재시도.
+    서버가 retry-after를 주면 그 값을 우선 사용
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return await make_call()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable_error(e):
+                raise
+            delay = retry_after_seconds(e)
+            if delay is None:
+                delay = min(max_delay, base_delay * (2 ** attempt)) * random.uniform(0.5, 1.0)
+            if on_retry:
+                on_retry(attempt + 1, delay, e)
+            await asyncio.sleep(delay)
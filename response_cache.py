@@ -0,0 +1,78 @@
+import datetime
+import hashlib
+import json
+import sqlite3
+import threading
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    cache_key   TEXT PRIMARY KEY,
+    model       TEXT NOT NULL,
+    response    TEXT NOT NULL,
+    created_at  TEXT NOT NULL
+);
+"""
+
+
+def response_cache_key(model, max_tokens, prompt, image_hashes, image_settings=None):
+    """
+    같은 모델/설정/프롬프트/이미지로 보낸 요청이면 같은 키.
+    image_hashes는 요청에 들어가는 이미지 순서대로의 원본 SHA-256 목록,
+    image_settings는 리사이즈/품질처럼 실제 전송 이미지를 바꾸는 값
+    """
+    payload = json.dumps({
+        "model": model,
+        "max_tokens": max_tokens,
+        "prompt": prompt,
+        "images": list(image_hashes),
+        "image_settings": image_settings,
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    생성된 description 캐시 (dataset/response_cache.sqlite3).
+    빈 문자열(실패)은 저장하지 않아 다음 실행에서 다시 요청됨
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            r = self.conn.execute("SELECT response FROM responses WHERE cache_key = ?", (key,)).fetchone()
+            if r is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return r[0]
+
+    def contains(self, key):
+        # 적중/미스 집계 없이 존재 여부만 확인 (프리페치 대상 선별용)
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM responses WHERE cache_key = ?", (key,)).fetchone() is not None
+
+    def put(self, key, model, response):
+        if not response:
+            return
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (cache_key, model, response, created_at) VALUES (?, ?, ?, ?)",
+                (key, model, response, datetime.datetime.now().isoformat(timespec="seconds")),
+            )
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
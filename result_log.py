@@ -0,0 +1,110 @@
+import datetime
+import json
+import os
+import threading
+
+from product_store import features_as_text, write_products_parquet
+
+
+class ResultLog:
+    """
+    description 생성 결과를 한 건씩 바로 추가 기록하는 append-only JSONL 로그.
+
+    한 줄: {"product_id", "description", "status"(ok/failed), "mode", "fingerprint", "created_at"}
+    fingerprint는 생성 당시 입력값 해시 (description_scheduler.row_fingerprint, 입력이 바뀌었는지 비교용)
+    매 기록마다 flush + fsync 하므로 중간에 종료돼도 받은 응답은 남음.
+    최종 CSV/Parquet은 compact_results()로 로그를 합쳐서 만듦
+    """
+
+    def __init__(self, path, fingerprints=None):
+        self.fingerprints = fingerprints or {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+        self.written = 0
+        # 이전 실행이 줄 중간에 끊겼으면 다음 기록이 그 줄에 붙지 않도록 줄바꿈 추가
+        if self._file.tell() > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._file.write("\n")
+                    self._file.flush()
+
+    def append(self, product_id, description, mode=None):
+        record = {
+            "product_id": str(product_id),
+            "description": description or "",
+            "status": "ok" if description else "failed",
+            "mode": mode,
+            "fingerprint": self.fingerprints.get(str(product_id)),
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.written += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def load_results(path):
+    """
+    로그를 읽어 product_id별 최종 결과 반환 ({product_id: record}).
+    성공 기록이 있으면 이후 실패 기록으로 덮어쓰지 않음. 마지막 줄이 잘린 경우는 무시
+    """
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            product_id = record.get("product_id")
+            previous = results.get(product_id)
+            if previous and previous["status"] == "ok" and record.get("status") != "ok":
+                continue
+            results[product_id] = record
+    return results
+
+
+def completed_product_ids(results):
+    return {pid for pid, record in results.items() if record.get("status") == "ok"}
+
+
+def apply_results(df, results, column="description"):
+    # 로그의 성공 결과를 product_id 기준으로 df에 반영 (반영한 행 수 반환)
+    if column not in df.columns:
+        df[column] = ""
+    df[column] = df[column].astype(object)
+    applied = 0
+    for idx, product_id in df["product_id"].items():
+        record = results.get(str(product_id))
+        if record and record.get("status") == "ok":
+            df.at[idx, column] = record["description"]
+            applied += 1
+    return applied
+
+
+def compact_results(df, results, csv_path=None, parquet_path=None):
+    """
+    로그를 df에 합쳐 최종 파일로 저장 (임시 파일에 쓴 뒤 교체).
+    parquet_path를 주면 category별 분할 Parquet 데이터셋으로도 저장 (pyarrow 필요)
+    """
+    apply_results(df, results)
+    if csv_path:
+        tmp_path = csv_path + ".tmp"
+        features_as_text(df).to_csv(tmp_path, index=False, encoding="utf-8-sig")
+        os.replace(tmp_path, csv_path)
+    if parquet_path:
+        write_products_parquet(df, parquet_path)
+    return df
@@ -0,0 +1,412 @@
+import argparse
+import collections
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+
+DEFAULT_INDEX_NAME = "search_index.sqlite3"
+HANGUL_FIRST = 0xAC00
+HANGUL_LAST = 0xD7A3
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+# "[선물포장] 탬버린즈 핸드크림" -> ["선물포장", "탬버린즈", "핸드크림"]
+TOKEN_RE = re.compile(r"[0-9a-z가-힣ㄱ-ㅎ]+")
+JAMO_RE = re.compile(r"[ㄱ-ㅎ]")
+
+# postings 키 앞 글자: (n-gram, 단어 전체, 단어 앞 1~2글자, 상품명 앞 1~2글자)
+NAME_FIELDS = ("n", "w", "s", "p")
+CHOSEONG_FIELDS = ("c", "x", "y", "q")
+FIELD_DESCRIPTION = "d"
+
+# 검색어 단어별 점수: 단어 일치 > 상품명 시작 > 단어 시작 > 부분 일치, 초성 일치는 가중치를 낮춤
+SCORE_TOKEN = 4.0
+SCORE_NAME_PREFIX = 3.0
+SCORE_TOKEN_PREFIX = 2.0
+SCORE_SUBSTRING = 1.0
+CHOSEONG_WEIGHT = 0.8
+SCORE_DESCRIPTION = 0.5
+# 삭제/변경으로 남은 이전 문서 비율이 이보다 크면 update() 때 전체 재색인
+REBUILD_DEAD_RATIO = 0.3
+QUERY_CACHE_SIZE = 256
+
+_EMPTY = np.empty(0, dtype=np.int32)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc_id       INTEGER PRIMARY KEY,
+    product_id   TEXT NOT NULL,
+    fingerprint  TEXT NOT NULL,
+    name         TEXT NOT NULL,
+    choseong     TEXT NOT NULL,
+    alive        INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS postings (
+    gram  TEXT PRIMARY KEY,
+    ids   BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key    TEXT PRIMARY KEY,
+    value  TEXT NOT NULL
+);
+"""
+
+
+def tokenize(text):
+    if not isinstance(text, str):
+        return []
+    return TOKEN_RE.findall(unicodedata.normalize("NFC", text).lower())
+
+
+def to_choseong(token):
+    # 한글 음절만 초성으로 바꾸고 나머지(영문/숫자/자모)는 그대로
+    chars = []
+    for ch in token:
+        code = ord(ch)
+        if HANGUL_FIRST <= code <= HANGUL_LAST:
+            chars.append(CHOSEONG[(code - HANGUL_FIRST) // 588])
+        else:
+            chars.append(ch)
+    return "".join(chars)
+
+
+def token_grams(token):
+    # 색인용: 1-gram + 2-gram
+    grams = set(token)
+    grams.update(token[i:i + 2] for i in range(len(token) - 1))
+    return grams
+
+
+def query_grams(term):
+    # 검색용: 한 글자면 1-gram, 아니면 2-gram만 (모두 포함하는 문서가 후보)
+    if len(term) == 1:
+        return {term}
+    return {term[i:i + 2] for i in range(len(term) - 1)}
+
+
+def doc_keys(tokens, fields):
+    gram_f, word_f, start_f, first_f = fields
+    keys = set()
+    for i, token in enumerate(tokens):
+        keys.update(gram_f + g for g in token_grams(token))
+        keys.add(word_f + token)
+        keys.add(start_f + token[:1])
+        keys.add(start_f + token[:2])
+        if i == 0:
+            keys.add(first_f + token[:1])
+            keys.add(first_f + token[:2])
+    return keys
+
+
+def padded(tokens):
+    # 앞뒤 공백을 붙여 단어 일치/단어 시작을 문자열 검색으로 판단
+    return " " + " ".join(tokens) + " "
+
+
+def sorted_member(a, b):
+    # a의 각 값이 정렬된 배열 b에 있는지 (둘 다 정렬된 doc_id 배열)
+    if not len(b) or not len(a):
+        return np.zeros(len(a), dtype=bool)
+    pos = np.searchsorted(b, a)
+    pos[pos == len(b)] = len(b) - 1
+    return b[pos] == a
+
+
+def doc_fingerprint(name, description):
+    raw = f"{name if isinstance(name, str) else ''}\x00{description if isinstance(description, str) else ''}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class SearchIndex:
+    """
+    상품명(선택적으로 description) n-gram/초성 역색인.
+
+    - 저장: SQLite (docs: 상품별 정규화 이름/초성, postings: 키별 doc_id 배열 BLOB)
+    - 메모리: 키 -> 정렬된 doc_id numpy 배열. 검색어 2-gram 교집합으로 후보를 찾고
+      단어 일치/단어 시작/상품명 시작 여부도 postings로 판단 (3글자 이상 검색어만 일부 문자열 확인)
+    - "ㅎㄷㅋㄹ", "핸ㄷ"처럼 자모가 들어간 검색어는 초성으로 비교
+    - update(df)는 바뀐 상품만 새 doc_id로 추가하고 이전 doc_id는 삭제 표시 (비율이 커지면 전체 재색인)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+        self._cache = collections.OrderedDict()
+        self._load()
+
+    def _load(self):
+        self.product_ids = []
+        self.fingerprints = []
+        self.names = []
+        self.choseongs = []
+        alive = []
+        self.by_product = {}
+        rows = self.conn.execute(
+            "SELECT doc_id, product_id, fingerprint, name, choseong, alive FROM docs ORDER BY doc_id").fetchall()
+        for doc_id, product_id, fingerprint, name, choseong, is_alive in rows:
+            # doc_id는 0부터 빈틈없이 증가 (재색인 시 처음부터 다시 부여)
+            self.product_ids.append(product_id)
+            self.fingerprints.append(fingerprint)
+            self.names.append(name)
+            self.choseongs.append(choseong)
+            alive.append(bool(is_alive))
+            if is_alive:
+                self.by_product[product_id] = doc_id
+        self.alive = np.array(alive, dtype=bool)
+        self.name_len = np.array([len(n) for n in self.names], dtype=np.int32)
+        self.postings = {gram: np.frombuffer(ids, dtype=np.int32)
+                         for gram, ids in self.conn.execute("SELECT gram, ids FROM postings")}
+        r = self.conn.execute("SELECT value FROM meta WHERE key = 'description'").fetchone()
+        self.has_description = bool(r and r[0] == "1")
+
+    def __len__(self):
+        return len(self.by_product)
+
+    def _clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM docs")
+            self.conn.execute("DELETE FROM postings")
+        self._load()
+
+    def _add_docs(self, items, use_description):
+        next_id = len(self.product_ids)
+        new_postings = collections.defaultdict(list)
+        doc_rows = []
+        for product_id, fingerprint, name, description in items:
+            doc_id = next_id
+            next_id += 1
+            tokens = tokenize(name)
+            choseong_tokens = [to_choseong(t) for t in tokens]
+            keys = doc_keys(tokens, NAME_FIELDS) | doc_keys(choseong_tokens, CHOSEONG_FIELDS)
+            if use_description:
+                for t in tokenize(description):
+                    keys.update(FIELD_DESCRIPTION + g for g in token_grams(t))
+            for key in keys:
+                new_postings[key].append(doc_id)
+            name_text, choseong_text = padded(tokens), padded(choseong_tokens)
+            doc_rows.append((doc_id, product_id, fingerprint, name_text, choseong_text))
+            self.product_ids.append(product_id)
+            self.fingerprints.append(fingerprint)
+            self.names.append(name_text)
+            self.choseongs.append(choseong_text)
+            self.by_product[product_id] = doc_id
+        self.alive = np.concatenate([self.alive, np.ones(len(doc_rows), dtype=bool)])
+        self.name_len = np.concatenate([self.name_len, np.array([len(r[3]) for r in doc_rows], dtype=np.int32)])
+        # 새 doc_id는 항상 기존보다 크므로 뒤에 붙여도 정렬 유지
+        for key, ids in new_postings.items():
+            ids = np.array(ids, dtype=np.int32)
+            old = self.postings.get(key)
+            self.postings[key] = ids if old is None else np.concatenate([old, ids])
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO docs (doc_id, product_id, fingerprint, name, choseong, alive) VALUES (?, ?, ?, ?, ?, 1)",
+                doc_rows)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO postings (gram, ids) VALUES (?, ?)",
+                ((key, self.postings[key].tobytes()) for key in new_postings))
+
+    def update(self, df, description=True):
+        """
+        df(product_id, name[, description])와 색인을 맞춤. 새 상품/이름·설명이 바뀐 상품만 다시 색인.
+        반환: {"added", "removed", "total", "rebuilt", "sec"}
+        """
+        started = time.monotonic()
+        use_description = description and "description" in df.columns
+        descriptions = df["description"] if use_description else [None] * len(df)
+        with self._lock:
+            rebuilt = False
+            if self.product_ids and use_description != self.has_description:
+                self._clear()
+                rebuilt = True
+            current = set()
+            changed = []
+            for product_id, name, desc in zip(df["product_id"], df["name"], descriptions):
+                product_id = str(product_id)
+                current.add(product_id)
+                fingerprint = doc_fingerprint(name, desc)
+                doc_id = self.by_product.get(product_id)
+                if doc_id is None or self.fingerprints[doc_id] != fingerprint:
+                    changed.append((product_id, fingerprint, name, desc))
+            removed = [doc_id for product_id, doc_id in self.by_product.items() if product_id not in current]
+            removed += [self.by_product[c[0]] for c in changed if c[0] in self.by_product]
+            dead = int((~self.alive).sum()) + len(removed)
+            total = len(self.product_ids) + len(changed)
+            if not rebuilt and total and dead / total > REBUILD_DEAD_RATIO:
+                # 삭제 표시가 쌓이면 처음부터 다시 색인 (doc_id/postings 압축)
+                self._clear()
+                rebuilt = True
+                changed = [(str(pid), doc_fingerprint(name, desc), name, desc)
+                           for pid, name, desc in zip(df["product_id"], df["name"], descriptions)]
+                removed = []
+            if removed:
+                self.alive[removed] = False
+                for doc_id in removed:
+                    self.by_product.pop(self.product_ids[doc_id], None)
+                with self.conn:
+                    self.conn.executemany("UPDATE docs SET alive = 0 WHERE doc_id = ?", ((d,) for d in removed))
+            if changed:
+                self._add_docs(changed, use_description)
+            self.has_description = use_description
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('description', ?)",
+                                  ("1" if use_description else "0",))
+            self._cache.clear()
+        return {"added": len(changed), "removed": len(removed), "total": len(self.by_product),
+                "rebuilt": rebuilt, "sec": round(time.monotonic() - started, 2)}
+
+    def _candidates(self, field, term):
+        lists = []
+        for gram in query_grams(term):
+            ids = self.postings.get(field + gram)
+            if ids is None:
+                return _EMPTY
+            lists.append(ids)
+        lists.sort(key=len)
+        result = lists[0]
+        for ids in lists[1:]:
+            result = result[sorted_member(result, ids)]
+            if not len(result):
+                return _EMPTY
+        return result[self.alive[result]]
+
+    def _term_scores(self, term, fields, texts, weight):
+        # 반환: (정렬된 doc_id 배열, 점수 배열)
+        gram_f, word_f, start_f, first_f = fields
+        ids = self._candidates(gram_f, term)
+        if not len(ids):
+            return ids, np.empty(0)
+        is_token = sorted_member(ids, self.postings.get(word_f + term, _EMPTY))
+        is_start = sorted_member(ids, self.postings.get(start_f + term[:2], _EMPTY))
+        is_first = sorted_member(ids, self.postings.get(first_f + term[:2], _EMPTY))
+        if len(term) > 2:
+            # 2-gram 교집합/앞 두 글자 기준은 근사치이므로 단어 일치가 아닌 행만 실제 문자열로 확인
+            check = np.flatnonzero(~is_token)
+            if len(check):
+                check_ids = ids[check].tolist()
+                spaced = " " + term
+                # 3: 상품명 시작, 2: 단어 시작, 1: 부분 일치, 0: 불일치 (한 번의 순회로 판단)
+                codes = np.fromiter(
+                    (3 if texts[d].startswith(spaced) else 2 if spaced in texts[d] else 1 if term in texts[d] else 0
+                     for d in check_ids), dtype=np.int8, count=len(check_ids))
+                is_start[check] &= codes >= 2
+                is_first[check] &= codes == 3
+                contains = codes > 0
+                keep = np.ones(len(ids), dtype=bool)
+                keep[check] = contains
+                ids, is_token, is_start, is_first = ids[keep], is_token[keep], is_start[keep], is_first[keep]
+        scores = np.full(len(ids), SCORE_SUBSTRING)
+        scores[is_start] = SCORE_TOKEN_PREFIX
+        scores[is_first] = SCORE_NAME_PREFIX
+        scores[is_token] = SCORE_TOKEN
+        return ids, scores * weight
+
+    def _match(self, term):
+        if JAMO_RE.search(term):
+            return self._term_scores(to_choseong(term), CHOSEONG_FIELDS, self.choseongs, CHOSEONG_WEIGHT)
+        ids, scores = self._term_scores(term, NAME_FIELDS, self.names, 1.0)
+        if self.has_description:
+            # description에만 있는 상품은 낮은 점수로 추가 (2-gram 교집합 기준)
+            extra = self._candidates(FIELD_DESCRIPTION, term)
+            extra = extra[~sorted_member(extra, ids)]
+            if len(extra):
+                ids = np.concatenate([ids, extra])
+                scores = np.concatenate([scores, np.full(len(extra), SCORE_DESCRIPTION)])
+                order = np.argsort(ids, kind="stable")
+                ids, scores = ids[order], scores[order]
+        return ids, scores
+
+    def search_docs(self, query, limit=None):
+        """
+        검색어 단어를 모두 포함하는 문서의 doc_id 배열을 점수순으로 반환
+        (점수가 같으면 이름이 짧은 순, 색인 순)
+        """
+        terms = tokenize(query)
+        if not terms:
+            return _EMPTY
+        key = (" ".join(terms), limit)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+            ids, scores = None, None
+            for term in terms:
+                term_ids, term_scores = self._match(term)
+                if ids is None:
+                    ids, scores = term_ids, term_scores
+                else:
+                    _, i, j = np.intersect1d(ids, term_ids, assume_unique=True, return_indices=True)
+                    ids, scores = ids[i], scores[i] + term_scores[j]
+                if not len(ids):
+                    break
+            order = np.lexsort((ids, self.name_len[ids], -scores))
+            if limit:
+                order = order[:limit]
+            result = ids[order]
+            self._cache[key] = result
+            while len(self._cache) > QUERY_CACHE_SIZE:
+                self._cache.popitem(last=False)
+            return result
+
+    def search(self, query, limit=None):
+        # 점수순 product_id 목록
+        return [self.product_ids[d] for d in self.search_docs(query, limit).tolist()]
+
+    def doc_positions(self, product_ids):
+        """
+        doc_id -> product_ids(데이터프레임 컬럼 등)에서의 위치 배열 (없으면 -1).
+        한 번 만들어 두면 search_docs() 결과를 바로 행 위치로 바꿀 수 있음
+        """
+        positions = np.full(len(self.product_ids), -1, dtype=np.int64)
+        for position, product_id in enumerate(product_ids):
+            doc_id = self.by_product.get(str(product_id))
+            if doc_id is not None:
+                positions[doc_id] = position
+        return positions
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def index_path_for(dataset_path):
+    # 데이터셋(products.csv 또는 products_parquet/) 옆에 저장
+    return os.path.join(os.path.dirname(os.path.abspath(dataset_path)), DEFAULT_INDEX_NAME)
+
+
+def main():
+    from product_store import load_products
+
+    parser = argparse.ArgumentParser(description="상품명 검색 색인 생성/갱신 및 검색 테스트")
+    parser.add_argument("dataset", nargs="?", default=os.path.join("dataset", "products.csv"),
+                        help="products.csv 또는 분할 Parquet 폴더(products_parquet)")
+    parser.add_argument("--no-description", action="store_true", help="description 컬럼이 있어도 색인하지 않음")
+    parser.add_argument("--query", action="append", default=[], help="색인 후 검색해볼 검색어 (여러 번 지정 가능)")
+    args = parser.parse_args()
+
+    df = load_products(args.dataset, columns=["product_id", "name", "description"])
+    index = SearchIndex(index_path_for(args.dataset))
+    result = index.update(df, description=not args.no_description)
+    print(f"[INFO] 색인 {result['total']}개 (추가 {result['added']}, 삭제 {result['removed']}, "
+          f"전체 재색인 {result['rebuilt']}), {result['sec']}초: {index.path}")
+    for query in args.query:
+        started = time.perf_counter()
+        product_ids = index.search(query)
+        ms = (time.perf_counter() - started) * 1000
+        print(f"[INFO] '{query}': {len(product_ids)}개 ({ms:.2f}ms) {product_ids[:10]}")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
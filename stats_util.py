@@ -0,0 +1,10 @@
+import math
+
+
+def percentile(values, pct):
+    # nearest-rank 방식 백분위수
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
@@ -0,0 +1,125 @@
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# 최상위 모듈(image_downloader, rate_limiter ...)을 그대로 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 크기 초과 등으로 클라이언트가 먼저 끊은 경우는 무시
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubServer:
+    """
+    테스트용 로컬 HTTP 서버 (keep-alive, HTTP/1.1).
+
+    route(method, path, handler)로 경로별 응답 함수를 등록. handler(request)는 (status, headers, body) 반환.
+    request: {"method", "path", "headers", "body", "client"} (client는 접속 포트로 커넥션 구분용)
+    요청 기록(requests)과 서버 전체 최대 동시 처리 수(max_in_flight)를 남김
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                request = {"method": self.command, "path": self.path, "headers": dict(self.headers),
+                           "body": body, "client": self.client_address[1]}
+                with stub._lock:
+                    stub.requests.append(request)
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    handler = stub.routes.get((self.command, self.path.split("?")[0]))
+                    if handler is None:
+                        status, headers, payload = 404, {}, b"not found"
+                    else:
+                        status, headers, payload = handler(request)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                if payload is None:
+                    payload = b""
+                if "Content-Length" not in headers:
+                    if headers.get("Connection") == "close":
+                        self.close_connection = True
+                    else:
+                        self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                if self.command != "HEAD" and status != 304:
+                    self.wfile.write(payload)
+
+            do_GET = _handle
+            do_POST = _handle
+            do_HEAD = _handle
+
+        self.server = _QuietServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path):
+        return self.base_url + path
+
+    def route(self, method, path, handler):
+        self.routes[(method, path)] = handler
+
+    def requests_for(self, path):
+        with self._lock:
+            return [r for r in self.requests if r["path"].split("?")[0] == path]
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer().start()
+    try:
+        yield server
+    finally:
+        server.stop()
+
+
+@pytest.fixture
+def slow():
+    # slow(handler, delay): 응답 전에 delay초 대기하는 handler로 감쌈 (동시 처리 수 측정용)
+    def wrap(handler, delay):
+        def wrapped(request):
+            time.sleep(delay)
+            return handler(request)
+        return wrapped
+    return wrap
@@ -0,0 +1,254 @@
+import io
+import itertools
+import json
+import os
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+import batch_description
+from batch_description import (
+    BatchFileWriter, archive_jobs, batch_request_line, load_jobs, merge_batch_results, pending_jobs,
+    read_batch_results, save_jobs, submit_batch, wait_for_batch,
+)
+
+
+class FakeBatchClient:
+    """
+    OpenAI files/batches API 로컬 대역.
+    제출한 batch는 retrieve 할 때마다 validating -> in_progress -> completed 순으로 진행.
+    fail_ids는 출력 파일에 status_code 500으로, error_ids는 오류 파일에만 기록
+    """
+
+    def __init__(self, fail_ids=(), error_ids=(), final_status="completed"):
+        self.fail_ids = set(fail_ids)
+        self.error_ids = set(error_ids)
+        self.final_status = final_status
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+        self.uploaded = {}
+        self.submitted = []
+        self.retrieves = 0
+        self._contents = {}
+        self._batches = {}
+        self._ids = itertools.count(1)
+
+    def _create_file(self, file, purpose):
+        file_id = f"file-{next(self._ids)}"
+        self.uploaded[file_id] = (file.read().decode("utf-8"), purpose)
+        return SimpleNamespace(id=file_id)
+
+    def _file_content(self, file_id):
+        return SimpleNamespace(text=self._contents[file_id])
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        batch_id = f"batch-{next(self._ids)}"
+        self._batches[batch_id] = {"input": input_file_id, "steps": iter(["validating", "in_progress"])}
+        self.submitted.append((batch_id, input_file_id, endpoint, completion_window))
+        return SimpleNamespace(id=batch_id)
+
+    def _retrieve_batch(self, batch_id):
+        self.retrieves += 1
+        state = self._batches[batch_id]
+        lines = [json.loads(line) for line in self.uploaded[state["input"]][0].splitlines()]
+        status = next(state["steps"], None)
+        counts = SimpleNamespace(total=len(lines), completed=0, failed=0)
+        if status is not None:
+            return SimpleNamespace(id=batch_id, status=status, request_counts=counts,
+                                   output_file_id=None, error_file_id=None)
+
+        output, errors = [], []
+        for line in lines:
+            custom_id = line["custom_id"]
+            if custom_id in self.error_ids:
+                errors.append({"custom_id": custom_id, "error": {"code": "invalid_request", "message": "bad"}})
+            elif custom_id in self.fail_ids:
+                output.append({"custom_id": custom_id, "response": {"status_code": 500, "body": {}}})
+            else:
+                content = f"{custom_id} 설명 ({len(line['body']['messages'][0]['content'])} parts)"
+                output.append({"custom_id": custom_id, "response": {
+                    "status_code": 200, "body": {"choices": [{"message": {"content": f"  {content}  "}}]}}})
+        output_id, error_id = f"file-{next(self._ids)}", f"file-{next(self._ids)}"
+        self._contents[output_id] = "\n".join(json.dumps(r, ensure_ascii=False) for r in output)
+        self._contents[error_id] = "\n".join(json.dumps(r, ensure_ascii=False) for r in errors)
+        counts.completed, counts.failed = len(output), len(errors)
+        return SimpleNamespace(id=batch_id, status=self.final_status, request_counts=counts,
+                               output_file_id=output_id, error_file_id=error_id if errors else None)
+
+
+@pytest.fixture(autouse=True)
+def no_poll_sleep(monkeypatch):
+    monkeypatch.setattr(batch_description.time, "sleep", lambda seconds: None)
+
+
+def request_line(custom_id, text="설명을 작성하세요"):
+    messages = [{"role": "user", "content": [{"type": "text", "text": text}]}]
+    return batch_request_line(custom_id, "gpt-4o-mini", messages, 600)
+
+
+def read_lines(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_request_line_format():
+    record = json.loads(request_line(1001))
+    assert record["custom_id"] == "1001"
+    assert record["method"] == "POST" and record["url"] == batch_description.BATCH_ENDPOINT
+    assert record["body"]["max_tokens"] == 600
+
+
+def test_writer_splits_by_request_count(tmp_path):
+    writer = BatchFileWriter(str(tmp_path), max_requests=3)
+    for n in range(7):
+        writer.write(request_line(n))
+    writer.close()
+    assert [os.path.basename(p) for p in writer.paths] == [
+        "batch_input_000.jsonl", "batch_input_001.jsonl", "batch_input_002.jsonl"]
+    assert [[r["custom_id"] for r in read_lines(p)] for p in writer.paths] == [
+        ["0", "1", "2"], ["3", "4", "5"], ["6"]]
+
+
+def test_writer_splits_by_size(tmp_path):
+    line = request_line(0, "가" * 100)
+    size = len(line.encode("utf-8")) + 1
+    writer = BatchFileWriter(str(tmp_path), max_bytes=size * 2)
+    for n in range(5):
+        writer.write(request_line(n, "가" * 100))
+    # 제한보다 큰 줄 하나는 단독 파일로
+    writer.write(request_line(99, "가" * 1000))
+    writer.close()
+    counts = [len(read_lines(p)) for p in writer.paths]
+    assert counts == [2, 2, 1, 1]
+    assert all(os.path.getsize(p) <= size * 2 for p in writer.paths[:-1])
+    assert read_lines(writer.paths[-1])[0]["custom_id"] == "99"
+
+
+def test_jobs_state_roundtrip_and_archive(tmp_path):
+    path = str(tmp_path / "batch_jobs.json")
+    assert load_jobs(path) == []
+    jobs = [{"input_path": "a.jsonl", "batch_id": "batch-1", "merged": True},
+            {"input_path": "b.jsonl", "batch_id": "batch-2", "merged": False}]
+    save_jobs(path, jobs)
+    assert load_jobs(path) == jobs
+    assert not os.path.exists(path + ".tmp")
+    assert [job["batch_id"] for job in pending_jobs(load_jobs(path))] == ["batch-2"]
+
+    jobs[1]["merged"] = True
+    save_jobs(path, jobs)
+    assert pending_jobs(load_jobs(path)) == []
+    archived = archive_jobs(path)
+    assert not os.path.exists(path) and load_jobs(path) == []
+    assert os.path.basename(archived).startswith("batch_jobs_") and load_jobs(archived) == jobs
+    # 같은 초에 다시 옮겨도 덮어쓰지 않음
+    save_jobs(path, jobs[:1])
+    assert archive_jobs(path) != archived and os.path.exists(archived)
+    assert archive_jobs(path) is None
+
+
+def test_submit_poll_and_merge_with_partial_failures(tmp_path, capsys):
+    writer = BatchFileWriter(str(tmp_path), max_requests=2)
+    for product_id in ["1001", "1002", "1003", "1004", "9999"]:
+        writer.write(request_line(product_id))
+    writer.close()
+
+    client = FakeBatchClient(fail_ids={"1002"}, error_ids={"1003"})
+    jobs_path = str(tmp_path / "batch_jobs.json")
+    jobs = []
+    for input_path in writer.paths:
+        jobs.append({"input_path": input_path, "batch_id": submit_batch(client, input_path), "merged": False})
+        save_jobs(jobs_path, jobs)
+    assert [s[2] for s in client.submitted] == [batch_description.BATCH_ENDPOINT] * 3
+    assert all(purpose == "batch" for _, purpose in client.uploaded.values())
+    assert [job["batch_id"] for job in load_jobs(jobs_path)] == [s[0] for s in client.submitted]
+
+    # product_id가 숫자로 읽힌 경우에도 문자열 custom_id와 매칭
+    df = pd.DataFrame({"product_id": [1001, 1002, 1003, 1004], "description": ""})
+    merged_ids = []
+    totals = [0, 0]
+    jobs = load_jobs(jobs_path)
+    for job in pending_jobs(jobs):
+        batch = wait_for_batch(client, job["batch_id"], poll_interval=0)
+        assert batch.status == "completed"
+        merged, success = merge_batch_results(df, read_batch_results(client, batch),
+                                              lambda pid, text: merged_ids.append((pid, bool(text))))
+        totals[0] += merged
+        totals[1] += success
+        job["merged"] = True
+        save_jobs(jobs_path, jobs)
+
+    assert client.retrieves == 9  # batch 3개 x (validating, in_progress, completed)
+    assert pending_jobs(load_jobs(jobs_path)) == []
+    # 9999는 df에 없으므로 병합하지 않음, 실패한 요청은 빈 문자열로 채움
+    assert totals == [4, 2]
+    assert sorted(merged_ids) == [("1001", True), ("1002", False), ("1003", False), ("1004", True)]
+    assert df.set_index("product_id")["description"].to_dict() == {
+        1001: "1001 설명 (1 parts)", 1002: "", 1003: "", 1004: "1004 설명 (1 parts)"}
+    out = capsys.readouterr().out
+    assert "batch 응답 오류: 1002" in out and "batch 요청 실패: 1003" in out
+
+
+def test_failed_batch_without_output(tmp_path):
+    writer = BatchFileWriter(str(tmp_path))
+    writer.write(request_line("1001"))
+    writer.close()
+    client = FakeBatchClient(error_ids={"1001"}, final_status="failed")
+    batch = wait_for_batch(client, submit_batch(client, writer.paths[0]), poll_interval=0)
+    assert batch.status == "failed"
+    assert read_batch_results(client, batch) == {"1001": ""}
+
+
+def test_generate_all_batch_resumes_then_starts_new(tmp_path, monkeypatch):
+    pytest.importorskip("openai")
+    pytest.importorskip("dotenv")
+    pytest.importorskip("tiktoken")
+    import generate_description as gd
+    from pipeline_metrics import PipelineMetrics
+    from result_log import ResultLog
+
+    batch_dir = tmp_path / "batch"
+    client = FakeBatchClient(fail_ids={"1002"})
+    for key, value in {
+        "OUT_DIR": str(tmp_path), "BATCH_DIR": str(batch_dir),
+        "BATCH_JOBS_PATH": str(batch_dir / "batch_jobs.json"),
+        "BATCH_CACHE_KEYS_PATH": str(batch_dir / "batch_cache_keys.json"),
+        "USE_RESPONSE_CACHE": False, "_response_cache": None, "client": client,
+    }.items():
+        monkeypatch.setattr(gd, key, value)
+
+    df = pd.DataFrame({"product_id": ["1001", "1002"], "name": ["핸드크림", "텀블러"],
+                       "category": ["뷰티", "리빙"], "features": ["", ""], "description": ""})
+
+    def run():
+        rows = ((idx, row, None) for idx, row in df.iterrows())
+        result_log = ResultLog(str(tmp_path / "description_log.jsonl"))
+        metrics = PipelineMetrics()
+        try:
+            gd.generate_all_batch(df, rows, "상품명: {name}\n카테고리: {category}", result_log, metrics,
+                                  poll_interval=0)
+        finally:
+            result_log.close()
+            metrics.close()
+
+    run()
+    assert len(client.submitted) == 1
+    assert df["description"].tolist()[0].startswith("1001 설명") and df["description"].tolist()[1] == ""
+    assert pending_jobs(load_jobs(gd.BATCH_JOBS_PATH)) == []
+
+    # 모두 병합된 기록은 옮기고 새로 제출
+    run()
+    assert len(client.submitted) == 2
+    assert len([p for p in os.listdir(batch_dir) if p.startswith("batch_jobs_")]) == 1
+    assert [job["batch_id"] for job in load_jobs(gd.BATCH_JOBS_PATH)] == [client.submitted[1][0]]
+
+    # 병합 전에 중단된 기록이 있으면 제출 없이 폴링부터 이어감
+    jobs = load_jobs(gd.BATCH_JOBS_PATH)
+    with open(jobs[0]["input_path"], "rb") as f:
+        resubmitted = client.files.create(file=io.BytesIO(f.read()), purpose="batch")
+    jobs[0].update(batch_id=client.batches.create(resubmitted.id, "", "").id, merged=False)
+    save_jobs(gd.BATCH_JOBS_PATH, jobs)
+    submitted = len(client.submitted)
+    run()
+    assert len(client.submitted) == submitted
+    assert pending_jobs(load_jobs(gd.BATCH_JOBS_PATH)) == []
@@ -0,0 +1,220 @@
+import asyncio
+import json
+import threading
+import time
+
+import pandas as pd
+import pytest
+from PIL import Image
+
+pytest.importorskip("openai")
+pytest.importorskip("dotenv")
+pytest.importorskip("tiktoken")
+
+import generate_description as gd  # noqa: E402
+from crawl_state import PRODUCT_COLUMNS  # noqa: E402
+from rate_limiter import call_with_backoff  # noqa: E402
+
+PROMPT = "상품명: {name}\n카테고리: {category}\n상품 설명을 작성하세요."
+
+
+def completion(content):
+    return {
+        "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": gd.MODEL,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+    }
+
+
+class MockOpenAI:
+    """
+    /v1/chat/completions 스텁. 응답은 요청 내용(상품명, 이미지 수)으로만 결정되어 호출 순서와 무관.
+    상품명에 "재시도"가 있으면 첫 요청은 429(retry-after), "서버오류"면 첫 요청은 500, "거절"이면 항상 400
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.failed_once = set()
+        self._lock = threading.Lock()
+        server.route("POST", "/v1/chat/completions", self.handle)
+
+    @property
+    def base_url(self):
+        return self.server.url("/v1")
+
+    def reset(self):
+        self.failed_once.clear()
+
+    def _fail_once(self, name, marker):
+        with self._lock:
+            if marker in name and name not in self.failed_once:
+                self.failed_once.add(name)
+                return True
+        return False
+
+    def handle(self, request):
+        body = json.loads(request["body"])
+        content = body["messages"][0]["content"]
+        text = next(part["text"] for part in content if part["type"] == "text")
+        images = sum(1 for part in content if part["type"] == "image_url")
+        name = text.split("상품명: ")[1].splitlines()[0]
+        headers = {"Content-Type": "application/json"}
+        error = {"error": {"message": "mock error", "type": "mock", "code": None}}
+        if "거절" in name:
+            return 400, headers, json.dumps(error).encode()
+        if self._fail_once(name, "재시도"):
+            return 429, dict(headers, **{"retry-after": "0.1"}), json.dumps(error).encode()
+        if self._fail_once(name, "서버오류"):
+            return 500, headers, json.dumps(error).encode()
+        description = f"{name} 설명 (이미지 {images}장, max_tokens {body['max_tokens']})"
+        return 200, headers, json.dumps(completion(description), ensure_ascii=False).encode()
+
+
+@pytest.fixture
+def mock_openai(stub_server):
+    return MockOpenAI(stub_server)
+
+
+def write_dataset(out_dir):
+    # 이미지가 있는 상품 / 없는 상품 / 일시 오류 상품 / 항상 실패하는 상품
+    image_dir = out_dir / "images" / "1001"
+    image_dir.mkdir(parents=True)
+    Image.new("RGB", (600, 900), "white").save(image_dir / "detail1.jpg")
+    Image.new("RGB", (800, 800), "red").save(image_dir / "detail2.jpg")
+    rows = [
+        {"product_id": "1001", "name": "핸드크림 세트", "category": "뷰티",
+         "features": "images/1001/detail1.jpg; images/1001/detail2.jpg"},
+        {"product_id": "1002", "name": "텀블러", "category": "리빙", "features": ""},
+        {"product_id": "1003", "name": "재시도 초콜릿", "category": "식품", "features": ""},
+        {"product_id": "1004", "name": "서버오류 캔들", "category": "리빙", "features": ""},
+        {"product_id": "1005", "name": "거절 와인", "category": "식품", "features": ""},
+    ]
+    pd.DataFrame(rows).reindex(columns=PRODUCT_COLUMNS).to_csv(out_dir / "products.csv", index=False)
+
+
+def run_main(monkeypatch, tmp_path, mock_openai, mode):
+    # 모드별로 별도 dataset 폴더에서 main() 실행 후 최종 CSV 반환
+    out_dir = tmp_path / mode
+    out_dir.mkdir()
+    write_dataset(out_dir)
+    prompt_path = tmp_path / "prompt.txt"
+    prompt_path.write_text(PROMPT, encoding="utf-8")
+    mock_openai.reset()
+    values = {
+        "OUT_DIR": str(out_dir),
+        "CSV_PATH": str(out_dir / "products.csv"),
+        "OUTPUT_CSV_PATH": str(out_dir / "products_with_description.csv"),
+        "RESULT_LOG_PATH": str(out_dir / "description_log.jsonl"),
+        "FILE_HASH_INDEX_PATH": str(out_dir / "file_hashes.sqlite3"),
+        "METRICS_SPANS_PATH": str(out_dir / "metrics" / "description_spans.jsonl"),
+        "METRICS_SUMMARY_PATH": str(out_dir / "metrics" / "description_summary.json"),
+        "PROMPT_PATH": str(prompt_path),
+        "USE_ENCODE_CACHE": False, "USE_RESPONSE_CACHE": False, "USE_PREFETCH": False,
+        "START": 0, "END": None,
+        "_encode_cache": None, "_response_cache": None, "_file_hashes": None,
+        "api_key": "test-key",
+        "client": gd.OpenAI(api_key="test-key", base_url=mock_openai.base_url, max_retries=2),
+    }
+    for key, value in values.items():
+        monkeypatch.setattr(gd, key, value)
+    # generate_all_async는 AsyncOpenAI를 새로 만들므로 환경 변수로 주소 지정
+    monkeypatch.setenv("OPENAI_BASE_URL", mock_openai.base_url)
+    gd.main(mode=mode, concurrency=3)
+    return pd.read_csv(out_dir / "products_with_description.csv", dtype={"product_id": str}, keep_default_na=False)
+
+
+def test_async_and_sync_produce_same_rows(monkeypatch, tmp_path, mock_openai):
+    sync_df = run_main(monkeypatch, tmp_path, mock_openai, "sync")
+    async_df = run_main(monkeypatch, tmp_path, mock_openai, "async")
+
+    columns = ["product_id", "name", "category", "description"]
+    pd.testing.assert_frame_equal(sync_df[columns], async_df[columns])
+    descriptions = dict(zip(sync_df["product_id"], sync_df["description"]))
+    assert descriptions["1001"] == f"핸드크림 세트 설명 (이미지 2장, max_tokens {gd.MAX_TOKENS})"
+    assert descriptions["1003"].startswith("재시도 초콜릿 설명")
+    assert descriptions["1004"].startswith("서버오류 캔들 설명")
+    assert descriptions["1005"] == ""
+
+
+def test_async_backoff_against_mock_server(mock_openai):
+    # 429 응답의 retry-after 값을 그대로 대기 시간으로 사용
+    delays = []
+
+    async def run():
+        client = gd.AsyncOpenAI(api_key="test-key", base_url=mock_openai.base_url, max_retries=0)
+        messages = [{"role": "user", "content": [{"type": "text", "text": PROMPT.format(name="재시도 향수",
+                                                                                       category="뷰티")}]}]
+        try:
+            started = time.monotonic()
+            response = await call_with_backoff(
+                lambda: client.chat.completions.create(model=gd.MODEL, messages=messages, max_tokens=10),
+                on_retry=lambda attempt, delay, e: delays.append((attempt, delay, e.status_code)))
+            return response, time.monotonic() - started
+        finally:
+            await client.close()
+
+    response, elapsed = asyncio.run(run())
+    assert response.choices[0].message.content.startswith("재시도 향수 설명")
+    assert delays == [(1, 0.1, 429)]
+    assert elapsed >= 0.1
+
+
+def test_image_budget_defaults_to_input_limit(monkeypatch, tmp_path):
+    # 기본은 입력 한도 안에서 용량 제한만 적용, --image-token-budget을 주면 그 이하로 제한
+    tokens = gd.calculate_image_tokens(600, 900)
+    count = 20000 // tokens + 3
+    image_dir = tmp_path / "images" / "2001"
+    image_dir.mkdir(parents=True)
+    paths = []
+    for n in range(count):
+        Image.new("RGB", (600, 900), "white").save(image_dir / f"detail{n}.jpg")
+        paths.append(f"images/2001/detail{n}.jpg")
+    monkeypatch.setattr(gd, "OUT_DIR", str(tmp_path))
+
+    assert gd.IMAGE_TOKEN_BUDGET is None
+    assert gd.image_token_budget(500) == gd.MAX_INPUT_TOKENS - gd.MAX_TOKENS - 500
+    plan = gd.plan_row_images(paths, 500)
+    assert len(plan["images"]) == count and plan["max_size"] == gd.IMAGE_MAX_SIZE
+    assert plan["tokens"] > 20000
+
+    monkeypatch.setattr(gd, "IMAGE_TOKEN_BUDGET", 20000)
+    assert gd.image_token_budget(500) == 20000
+    capped = gd.plan_row_images(paths, 500)
+    assert capped["tokens"] <= 20000 and capped["max_size"] < gd.IMAGE_MAX_SIZE
+
+
+def test_prefetch_skips_rows_with_cached_response(monkeypatch, tmp_path):
+    from response_cache import ResponseCache
+
+    write_dataset(tmp_path)
+    monkeypatch.setattr(gd, "OUT_DIR", str(tmp_path))
+    monkeypatch.setattr(gd, "FILE_HASH_INDEX_PATH", str(tmp_path / "file_hashes.sqlite3"))
+    monkeypatch.setattr(gd, "_file_hashes", None)
+    row = {"name": "핸드크림 세트", "category": "뷰티", "features": "images/1001/detail1.jpg; images/1001/detail2.jpg"}
+    cache = ResponseCache(str(tmp_path / "response_cache.sqlite3"))
+    try:
+        paths, max_size = gd.row_image_jobs(row, PROMPT, cache)
+        assert len(paths) == 2 and max_size == gd.IMAGE_MAX_SIZE
+
+        cache.put(gd.description_cache_key(row["name"], row["category"], row["features"], PROMPT), gd.MODEL, "설명")
+        assert gd.row_image_jobs(row, PROMPT, cache) == ([], None)
+        assert cache.stats() == {"hits": 0, "misses": 0}
+    finally:
+        cache.close()
+        gd._file_hashes.close()
+
+
+def test_async_result_log_writes_off_event_loop(monkeypatch, tmp_path, mock_openai):
+    # 결과 로그 fsync가 이벤트 루프 스레드에서 실행되지 않음
+    from result_log import ResultLog
+
+    threads = []
+    real_append = ResultLog.append
+
+    def recording_append(self, product_id, description, mode=None):
+        threads.append(threading.current_thread() is threading.main_thread())
+        return real_append(self, product_id, description, mode)
+
+    monkeypatch.setattr(ResultLog, "append", recording_append)
+    run_main(monkeypatch, tmp_path, mock_openai, "async")
+    assert len(threads) == 5 and not any(threads)
@@ -0,0 +1,233 @@
+import hashlib
+import os
+import sqlite3
+import threading
+
+import pytest
+
+import image_downloader
+from image_cache import ImageFetchCache
+from image_downloader import ImageDownloader, image_columns
+
+
+def image_body(name, size=4096):
+    # 이름마다 다른 고정 payload
+    seed = hashlib.sha256(name.encode()).digest()
+    return (seed * (size // len(seed) + 1))[:size]
+
+
+def image_handler(body):
+    def handler(request):
+        return 200, {"Content-Type": "image/jpeg"}, body
+    return handler
+
+
+def serve_image(server, path, body):
+    server.route("GET", path, image_handler(body))
+
+
+def download_all(downloader, product_id, images):
+    done = threading.Event()
+    collected = {}
+
+    def on_complete(results):
+        collected["results"] = results
+        done.set()
+
+    downloader.submit(product_id, images, on_complete)
+    assert done.wait(10)
+    return collected["results"]
+
+
+def test_pooled_concurrent_downloads(stub_server, slow, tmp_path):
+    images = []
+    for n in range(12):
+        path = f"/img/p1_detail{n}.jpg"
+        stub_server.route("GET", path, slow(image_handler(image_body(path)), 0.1))
+        images.append((f"detail{n}", stub_server.url(path)))
+
+    downloader = ImageDownloader(str(tmp_path), max_workers=4, per_host_limit=4)
+    try:
+        results = download_all(downloader, "p1", images)
+    finally:
+        downloader.close()
+
+    assert [r["img_name"] for r in results] == [name for name, _ in images]
+    for name, url in images:
+        path = tmp_path / "images" / "p1" / f"{name}.jpg"
+        assert path.read_bytes() == image_body(url[len(stub_server.base_url):])
+    # 여러 요청이 동시에 처리되고, 커넥션은 풀 크기 이하로 재사용됨
+    assert stub_server.max_in_flight > 1
+    assert len({r["client"] for r in stub_server.requests}) <= 4
+    columns = image_columns(results)
+    assert columns["detail_image_count"] == 12
+    assert columns["features"].split("; ")[0] == "images/p1/detail0.jpg"
+
+
+def test_per_host_limit(stub_server, slow, tmp_path):
+    images = []
+    for n in range(8):
+        path = f"/img/limit{n}.jpg"
+        stub_server.route("GET", path, slow(image_handler(image_body(path)), 0.15))
+        images.append((f"detail{n}", stub_server.url(path)))
+
+    downloader = ImageDownloader(str(tmp_path), max_workers=8, per_host_limit=2)
+    try:
+        results = download_all(downloader, "p2", images)
+    finally:
+        downloader.close()
+
+    assert all(r["rel_path"] for r in results)
+    assert stub_server.max_in_flight == 2
+
+
+def test_streams_to_temp_file_then_replaces(stub_server, tmp_path, monkeypatch):
+    body = image_body("/img/stream.jpg", 300 * 1024)
+    serve_image(stub_server, "/img/stream.jpg", body)
+    replaced = []
+    real_replace = os.replace
+
+    def recording_replace(src, dst):
+        # 이동 직전 임시 파일에 전체 내용이 있고, 대상 파일은 아직 없음
+        replaced.append((src, dst, os.path.getsize(src), os.path.exists(dst)))
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(image_downloader.os, "replace", recording_replace)
+    save_path = tmp_path / "images" / "p3" / "main.jpg"
+    save_path.parent.mkdir(parents=True)
+    downloader = ImageDownloader(str(tmp_path), max_workers=1)
+    try:
+        result = downloader.download(stub_server.url("/img/stream.jpg"), str(save_path))
+    finally:
+        downloader.close()
+
+    assert result["rel_path"] == "images/p3/main.jpg"
+    assert result["sha256"] == hashlib.sha256(body).hexdigest()
+    assert len(replaced) == 1
+    src, dst, size, dst_existed = replaced[0]
+    assert os.path.dirname(src) == str(save_path.parent)
+    assert os.path.basename(src).startswith(".download-") and src.endswith(".part")
+    assert dst == str(save_path) and size == len(body) and not dst_existed
+    assert save_path.read_bytes() == body
+    assert not [p for p in os.listdir(save_path.parent) if p.endswith(".part")]
+
+
+@pytest.mark.parametrize("with_length", [True, False])
+def test_rejects_images_above_max_size(stub_server, tmp_path, with_length):
+    body = image_body("/img/big.jpg", 64 * 1024)
+
+    def handler(request):
+        # Content-Length 없이 연결 종료로 끝나는 응답은 수신 중에 크기 초과를 확인
+        headers = {} if with_length else {"Connection": "close"}
+        return 200, headers, body
+
+    stub_server.route("GET", "/img/big.jpg", handler)
+    save_path = tmp_path / "images" / "p4" / "main.jpg"
+    save_path.parent.mkdir(parents=True)
+    save_path.write_bytes(b"previous")
+    downloader = ImageDownloader(str(tmp_path), max_workers=1, max_bytes=16 * 1024)
+    try:
+        with pytest.raises(ValueError, match="크기 초과"):
+            downloader.download(stub_server.url("/img/big.jpg"), str(save_path))
+        assert downloader.stats.summary()["failed"] == 1
+    finally:
+        downloader.close()
+
+    # 기존 파일은 그대로, 임시 파일은 남지 않음
+    assert save_path.read_bytes() == b"previous"
+    assert os.listdir(save_path.parent) == ["main.jpg"]
+
+
+def test_etag_revalidation(stub_server, tmp_path):
+    state = {"body": image_body("v1"), "etag": '"v1"'}
+
+    def handler(request):
+        headers = {"ETag": state["etag"]}
+        if request["headers"].get("If-None-Match") == state["etag"]:
+            return 304, headers, b""
+        return 200, headers, state["body"]
+
+    stub_server.route("GET", "/img/etag.jpg", handler)
+    url = stub_server.url("/img/etag.jpg")
+    save_path = tmp_path / "images" / "p5" / "main.jpg"
+    save_path.parent.mkdir(parents=True)
+    cache = ImageFetchCache(str(tmp_path / "image_cache.sqlite3"))
+    downloader = ImageDownloader(str(tmp_path), max_workers=1, cache=cache)
+    try:
+        first = downloader.download(url, str(save_path))
+        assert first["cache"] == "miss" and first["etag"] == '"v1"'
+        assert "If-None-Match" not in stub_server.requests[0]["headers"]
+        mtime = os.stat(save_path).st_mtime_ns
+
+        # 같은 ETag -> 304, 파일은 건드리지 않음
+        second = downloader.download(url, str(save_path))
+        assert second["cache"] == "not_modified"
+        assert stub_server.requests[1]["headers"]["If-None-Match"] == '"v1"'
+        assert os.stat(save_path).st_mtime_ns == mtime
+
+        # ETag만 바뀌고 내용이 같으면 해시 비교로 기존 파일 유지
+        state["etag"] = '"v1-gzip"'
+        third = downloader.download(url, str(save_path))
+        assert third["cache"] == "hash_match" and third["etag"] == '"v1-gzip"'
+        assert os.stat(save_path).st_mtime_ns == mtime
+
+        # 내용이 바뀌면 새로 저장
+        state.update(body=image_body("v2"), etag='"v2"')
+        fourth = downloader.download(url, str(save_path))
+        assert fourth["cache"] == "miss"
+        assert save_path.read_bytes() == image_body("v2")
+        assert cache.get(url)["etag"] == '"v2"'
+        summary = downloader.stats.summary()
+        assert summary["cache_not_modified"] == 1 and summary["cache_hash_match"] == 1
+    finally:
+        downloader.close()
+        cache.close()
+
+
+def test_shared_url_revalidates_per_product(stub_server, tmp_path):
+    # 여러 상품이 같은 배너 URL을 각자 폴더에 저장해도 다음 실행에서 모두 304
+    body = image_body("/img/banner.jpg")
+
+    def handler(request):
+        if request["headers"].get("If-None-Match") == '"banner"':
+            return 304, {"ETag": '"banner"'}, b""
+        return 200, {"ETag": '"banner"'}, body
+
+    stub_server.route("GET", "/img/banner.jpg", handler)
+    url = stub_server.url("/img/banner.jpg")
+    cache = ImageFetchCache(str(tmp_path / "image_cache.sqlite3"))
+    products = ["p6", "p7", "p8"]
+    for product_id in products:
+        (tmp_path / "images" / product_id).mkdir(parents=True)
+    downloader = ImageDownloader(str(tmp_path), max_workers=1, cache=cache)
+    try:
+        first = [downloader.download(url, str(tmp_path / "images" / pid / "banner.jpg")) for pid in products]
+        second = [downloader.download(url, str(tmp_path / "images" / pid / "banner.jpg")) for pid in products]
+    finally:
+        downloader.close()
+        cache.close()
+
+    assert [r["cache"] for r in first] == ["miss"] * 3
+    assert [r["cache"] for r in second] == ["not_modified"] * 3
+    assert [r["headers"].get("If-None-Match") for r in stub_server.requests[3:]] == ['"banner"'] * 3
+
+
+def test_cache_drops_url_only_schema(tmp_path):
+    path = str(tmp_path / "image_cache.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE image_cache (url TEXT PRIMARY KEY, rel_path TEXT, etag TEXT, last_modified TEXT, "
+                 "sha256 TEXT, size INTEGER, updated_at TEXT NOT NULL)")
+    conn.execute("INSERT INTO image_cache VALUES ('u', 'images/p1/a.jpg', '\"e\"', NULL, 'x', 1, 't')")
+    conn.commit()
+    conn.close()
+
+    cache = ImageFetchCache(path)
+    try:
+        assert cache.get("u") is None
+        cache.put("u", "images/p1/a.jpg", '"e1"', None, "x", 1)
+        cache.put("u", "images/p2/a.jpg", '"e2"', None, "x", 1)
+        assert cache.get("u", "images/p1/a.jpg")["etag"] == '"e1"'
+        assert cache.get("u", "images/p2/a.jpg")["etag"] == '"e2"'
+        assert cache.get("u")["rel_path"] == "images/p2/a.jpg"
+    finally:
+        cache.close()
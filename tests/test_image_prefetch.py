@@ -0,0 +1,48 @@
+import asyncio
+import base64
+import io
+
+from PIL import Image
+
+from image_prefetch import ImagePrefetcher
+
+
+def token_count(width, height):
+    return width * height // 1000
+
+
+def test_prefetch_from_worker_thread_uses_spawned_pool(tmp_path):
+    # async 모드처럼 asyncio.to_thread 스레드에서 next(rows)를 호출해도 spawn 워커로 인코딩
+    paths = []
+    for n, size in enumerate([(1200, 800), (300, 300), (800, 1600)]):
+        path = tmp_path / f"detail{n}.png"
+        Image.new("RGB", size, "blue").save(path)
+        paths.append(str(path))
+    rows = [(0, {"paths": paths[:2]}), (1, {"paths": []}), (2, {"paths": paths[2:]})]
+    prefetcher = ImagePrefetcher(token_count, 85, workers=2, window=2)
+
+    async def run():
+        iterator = prefetcher.iterate(rows, lambda row: (row["paths"], 512))
+        collected = []
+        while True:
+            item = await asyncio.to_thread(next, iterator, None)
+            if item is None:
+                return collected
+            collected.append(item)
+
+    try:
+        assert prefetcher.pool._mp_context.get_start_method() == "spawn"
+        collected = asyncio.run(run())
+    finally:
+        prefetcher.close()
+
+    assert [idx for idx, _, _ in collected] == [0, 1, 2]
+    assert collected[1][2] == {}
+    encoded = {**collected[0][2], **collected[2][2]}
+    sizes = {}
+    for path in paths:
+        data, tokens, nbytes = encoded[path]
+        with Image.open(io.BytesIO(base64.b64decode(data))) as img:
+            sizes[path] = img.size
+        assert tokens == token_count(*img.size) and nbytes == len(base64.b64decode(data))
+    assert [sizes[p] for p in paths] == [(512, 341), (300, 300), (256, 512)]
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from product_store import ORDER_COLUMN, load_products, read_products_csv, write_products_parquet
+
+pytest.importorskip("pyarrow")
+
+
+def crawled_products():
+    # 크롤링 순서대로 category가 섞여 있는 데이터
+    return pd.DataFrame({
+        "product_id": ["105", "101", "104", "102", "103"],
+        "name": ["캔들", "핸드크림", "초콜릿", "텀블러", "향수"],
+        "category": ["리빙", "뷰티", "식품", "리빙", "뷰티"],
+        "price": [12000, 9000, 15000, 23000, 41000],
+        "features": ["images/105/detail1.jpg", "", "images/104/detail1.jpg; images/104/detail2.jpg", "", ""],
+    })
+
+
+def test_parquet_keeps_crawl_order(tmp_path):
+    df = crawled_products()
+    csv_path = str(tmp_path / "products.csv")
+    parquet_path = str(tmp_path / "products_parquet")
+    df.to_csv(csv_path, index=False)
+    assert write_products_parquet(df, parquet_path)
+
+    from_csv = read_products_csv(csv_path)
+    from_parquet = load_products(parquet_path)
+    assert from_parquet["product_id"].tolist() == from_csv["product_id"].tolist()
+    assert ORDER_COLUMN not in from_parquet.columns
+    # iloc[START:END] 범위가 CSV와 같은 상품을 가리킴
+    assert from_parquet.iloc[1:3]["product_id"].tolist() == ["101", "104"]
+
+    subset = load_products(parquet_path, columns=["product_id", "name"])
+    assert subset.columns.tolist() == ["product_id", "name"]
+    assert subset["product_id"].tolist() == from_csv["product_id"].tolist()
+
+    filtered = load_products(parquet_path, columns=["product_id"], filters=[("category", "in", ["리빙", "식품"])])
+    assert filtered["product_id"].tolist() == ["105", "104", "102"]
+
+
+def test_rewrite_keeps_loaded_order(tmp_path):
+    # Parquet에서 읽은 순서 그대로 다시 저장하면 순서 유지
+    parquet_path = str(tmp_path / "products_parquet")
+    write_products_parquet(crawled_products(), parquet_path)
+    df = load_products(parquet_path)
+    df["description"] = [f"{name} 설명" for name in df["name"]]
+    write_products_parquet(df, parquet_path)
+    assert load_products(parquet_path)["product_id"].tolist() == ["105", "101", "104", "102", "103"]
@@ -0,0 +1,139 @@
+import asyncio
+import time
+
+import pytest
+
+import rate_limiter
+from rate_limiter import RateLimiter, TokenBucket, call_with_backoff, retry_after_seconds
+
+
+class FakeResponse:
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+
+class FakeAPIError(Exception):
+    # openai.APIStatusError와 같은 속성(status_code, response.headers)만 흉내
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = FakeResponse(headers)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # 백오프 대기 시간만 기록하고 실제로는 기다리지 않음
+    recorded = []
+
+    async def fake_sleep(delay):
+        recorded.append(delay)
+
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", fake_sleep)
+    return recorded
+
+
+def test_token_bucket_waits_for_refill():
+    async def run():
+        # 초당 20개, 용량 2 -> 처음 2개는 바로, 3번째는 약 0.05초 후
+        bucket = TokenBucket(rate_per_min=20 * 60, capacity=2)
+        started = time.monotonic()
+        await bucket.acquire()
+        await bucket.acquire()
+        burst = time.monotonic() - started
+        await bucket.acquire()
+        return burst, time.monotonic() - started
+
+    burst, total = asyncio.run(run())
+    assert burst < 0.02
+    assert 0.04 <= total < 0.5
+
+
+def test_token_bucket_caps_oversized_request():
+    async def run():
+        bucket = TokenBucket(rate_per_min=60, capacity=5)
+        await asyncio.wait_for(bucket.acquire(50), timeout=1)
+        return bucket.tokens
+
+    assert asyncio.run(run()) < 1
+
+
+def test_rate_limiter_enforces_rpm_and_tpm():
+    async def run(limiter, calls, tokens):
+        started = time.monotonic()
+        for _ in range(calls):
+            await limiter.acquire(tokens)
+        return time.monotonic() - started
+
+    # RPM 기준: 분당 1200건(용량 1200) -> 3건은 바로
+    assert asyncio.run(run(RateLimiter(1200, 10 ** 6), 3, 10)) < 0.05
+    # TPM 기준: 분당 6000토큰(초당 100), 요청당 3000토큰 -> 3번째 요청은 약 30초 대기 (0.2초 안에 끝나지 않음)
+    limiter = RateLimiter(1200, 6000)
+
+    async def third_blocks():
+        await limiter.acquire(3000)
+        await limiter.acquire(3000)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(limiter.acquire(3000), timeout=0.2)
+
+    asyncio.run(third_blocks())
+
+
+def test_backoff_honours_retry_after(sleeps):
+    attempts = []
+
+    async def make_call():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise FakeAPIError(429, {"retry-after": "2.5"})
+        return "ok"
+
+    retries = []
+    result = asyncio.run(call_with_backoff(make_call, base_delay=1.0,
+                                           on_retry=lambda n, delay, e: retries.append((n, delay))))
+    assert result == "ok"
+    assert sleeps == [2.5, 2.5]
+    assert retries == [(1, 2.5), (2, 2.5)]
+
+
+def test_backoff_is_exponential_for_5xx(sleeps):
+    attempts = []
+
+    async def make_call():
+        attempts.append(1)
+        if len(attempts) <= 4:
+            raise FakeAPIError(503)
+        return "ok"
+
+    assert asyncio.run(call_with_backoff(make_call, base_delay=1.0, max_delay=5.0)) == "ok"
+    assert len(sleeps) == 4
+    for attempt, delay in enumerate(sleeps):
+        # 지터 0.5~1.0배, max_delay 상한
+        expected = min(5.0, 2 ** attempt)
+        assert expected * 0.5 <= delay <= expected
+
+
+def test_backoff_does_not_retry_client_errors(sleeps):
+    async def make_call():
+        raise FakeAPIError(400)
+
+    with pytest.raises(FakeAPIError):
+        asyncio.run(call_with_backoff(make_call))
+    assert sleeps == []
+
+
+def test_backoff_gives_up_after_max_retries(sleeps):
+    calls = []
+
+    async def make_call():
+        calls.append(1)
+        raise FakeAPIError(500)
+
+    with pytest.raises(FakeAPIError):
+        asyncio.run(call_with_backoff(make_call, max_retries=2))
+    assert len(calls) == 3 and len(sleeps) == 2
+
+
+def test_retry_after_header_parsing():
+    assert retry_after_seconds(FakeAPIError(429, {"retry-after": "3"})) == 3.0
+    assert retry_after_seconds(FakeAPIError(429, {"retry-after": "soon"})) is None
+    assert retry_after_seconds(FakeAPIError(429)) is None
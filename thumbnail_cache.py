@@ -0,0 +1,160 @@
+import argparse
+import collections
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, features
+
+from product_store import dataset_base_dir, feature_list, load_products
+
+
+DEFAULT_THUMB_DIR = os.path.join("dataset", "thumbnails")
+# 시각화 화면에서 쓰는 크기 (가로, 세로 최대)
+CARD_SIZE = (300, 300)
+MODAL_MAIN_SIZE = (400, 500)
+MODAL_DETAIL_SIZE = (250, 300)
+THUMB_SIZES = [CARD_SIZE, MODAL_MAIN_SIZE, MODAL_DETAIL_SIZE]
+THUMB_QUALITY = 80
+MEMORY_ITEMS = 512
+BUILD_WORKERS = max(1, os.cpu_count() or 1)
+
+
+def default_format():
+    return "WEBP" if features.check("webp") else "JPEG"
+
+
+def thumb_key(full_path, size, fmt):
+    # 원본이 바뀌면(mtime/크기) 키가 달라져 새로 생성
+    st = os.stat(full_path)
+    raw = f"{os.path.abspath(full_path)}|{st.st_mtime_ns}|{st.st_size}|{size[0]}x{size[1]}|{fmt}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def build_thumbnail(src_path, dst_path, size, fmt, quality=THUMB_QUALITY):
+    # 프로세스 풀에서도 실행되므로 모듈 최상위 함수로 유지
+    with Image.open(src_path) as img:
+        # JPEG는 draft로 디코딩 단계에서 먼저 줄여서 읽음
+        img.draft("RGB", (size[0] * 2, size[1] * 2))
+        img = img.convert("RGB")
+        img.thumbnail(size, Image.Resampling.LANCZOS)
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        tmp_path = f"{dst_path}.{os.getpid()}.tmp"
+        img.save(tmp_path, format=fmt, quality=quality)
+    os.replace(tmp_path, dst_path)
+    return dst_path
+
+
+class ThumbnailCache:
+    """
+    시각화용 썸네일 캐시.
+
+    - 디스크: cache_dir/<키 앞 2자리>/<키>.webp (키 = 원본 경로 + mtime + 크기 + 썸네일 크기 + 포맷)
+    - 메모리: 최근 사용한 썸네일 바이트 LRU (memory_items개)
+    get()은 썸네일 바이트를 반환하므로 st.image에 원본 디코딩 없이 바로 전달 가능
+    """
+
+    def __init__(self, cache_dir=DEFAULT_THUMB_DIR, fmt=None, quality=THUMB_QUALITY, memory_items=MEMORY_ITEMS):
+        self.cache_dir = cache_dir
+        self.fmt = fmt or default_format()
+        self.ext = ".webp" if self.fmt == "WEBP" else ".jpg"
+        self.quality = quality
+        self.memory_items = memory_items
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "built": 0}
+
+    def thumb_path(self, full_path, size):
+        key = thumb_key(full_path, size, self.fmt)
+        return os.path.join(self.cache_dir, key[:2], key + self.ext)
+
+    def _remember(self, key, data):
+        with self._lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def get(self, full_path, size):
+        # 원본이 없거나 읽을 수 없으면 예외 발생 (호출하는 쪽에서 placeholder 처리)
+        dst_path = self.thumb_path(full_path, size)
+        with self._lock:
+            data = self._memory.get(dst_path)
+            if data is not None:
+                self._memory.move_to_end(dst_path)
+                self.stats["memory_hits"] += 1
+                return data
+        if os.path.exists(dst_path):
+            self.stats["disk_hits"] += 1
+        else:
+            build_thumbnail(full_path, dst_path, size, self.fmt, self.quality)
+            self.stats["built"] += 1
+        with open(dst_path, "rb") as f:
+            data = f.read()
+        self._remember(dst_path, data)
+        return data
+
+    def prebuild(self, full_paths, sizes=THUMB_SIZES, workers=BUILD_WORKERS):
+        """
+        아직 없는 썸네일만 프로세스 풀에서 병렬 생성.
+        반환: {"total", "built", "skipped", "failed", "sec"}
+        """
+        started = time.monotonic()
+        jobs = []
+        skipped = 0
+        for full_path in dict.fromkeys(full_paths):
+            if not os.path.exists(full_path):
+                continue
+            for size in sizes:
+                dst_path = self.thumb_path(full_path, size)
+                if os.path.exists(dst_path):
+                    skipped += 1
+                else:
+                    jobs.append((full_path, dst_path, size))
+        built = 0
+        failed = 0
+        if jobs:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(build_thumbnail, src, dst, size, self.fmt, self.quality)
+                           for src, dst, size in jobs]
+                for future in futures:
+                    try:
+                        future.result()
+                        built += 1
+                    except Exception:
+                        failed += 1
+        self.stats["built"] += built
+        return {"total": len(jobs) + skipped, "built": built, "skipped": skipped, "failed": failed,
+                "sec": round(time.monotonic() - started, 2)}
+
+
+def dataset_image_paths(df, base_dir):
+    # image_path + features(세미콜론 구분 문자열 또는 리스트)의 전체 경로 목록
+    paths = []
+    for column in ("image_path", "features"):
+        if column not in df.columns:
+            continue
+        for value in df[column].dropna():
+            paths.extend(os.path.join(base_dir, p) for p in feature_list(value))
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="시각화용 썸네일 미리 생성")
+    parser.add_argument("csv", nargs="?", default=os.path.join("dataset", "products.csv"),
+                        help="products.csv 또는 분할 Parquet 폴더(products_parquet)")
+    parser.add_argument("--cache-dir", default=DEFAULT_THUMB_DIR)
+    parser.add_argument("--workers", type=int, default=BUILD_WORKERS)
+    args = parser.parse_args()
+
+    df = load_products(args.csv, columns=["image_path", "features"])
+    cache = ThumbnailCache(args.cache_dir)
+    result = cache.prebuild(dataset_image_paths(df, dataset_base_dir(args.csv)), workers=args.workers)
+    print(f"[INFO] 썸네일 {result['total']}개 중 생성 {result['built']}개, 기존 {result['skipped']}개, "
+          f"실패 {result['failed']}개 ({result['sec']}초, 포맷 {cache.fmt})")
+
+
+if __name__ == "__main__":
+    main()
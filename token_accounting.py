@@ -0,0 +1,121 @@
+import functools
+import string
+
+import tiktoken
+
+
+# 모델별 100만 토큰당 가격 (USD, 입력/출력). 요금 변경 시 여기만 수정
+PRICES_PER_1M = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding(model):
+    # encoding_for_model은 호출마다 모델 이름 매핑을 다시 찾으므로 모델별로 한 번만 로드
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(model, text):
+    return len(get_encoding(model).encode(text))
+
+
+class PromptTokenCounter:
+    """
+    프롬프트 템플릿의 고정 부분 토큰 수를 한 번만 계산해 두고,
+    행마다 {name}/{category} 등 치환 값만 토큰화해서 더함.
+
+    경계에서 토큰이 합쳐지는 경우가 있어 전체를 한 번에 토큰화한 값과 몇 토큰 차이날 수 있음 (예측용)
+    """
+
+    def __init__(self, model, template):
+        self.model = model
+        self.encoding = get_encoding(model)
+        self.fields = []
+        static_text = []
+        for literal, field_name, _, _ in string.Formatter().parse(template):
+            static_text.append(literal)
+            if field_name is not None:
+                self.fields.append(field_name)
+        self.static_tokens = len(self.encoding.encode("".join(static_text)))
+        self._value_cache = {}
+
+    def _value_tokens(self, value):
+        value = str(value)
+        count = self._value_cache.get(value)
+        if count is None:
+            count = len(self.encoding.encode(value))
+            # 카테고리처럼 반복되는 값만 의미가 있으므로 크기 제한
+            if len(self._value_cache) < 10000:
+                self._value_cache[value] = count
+        return count
+
+    def count(self, **values):
+        return self.static_tokens + sum(self._value_tokens(values[field]) for field in self.fields)
+
+
+def estimate_cost(model, input_tokens, output_tokens):
+    prices = PRICES_PER_1M.get(model)
+    if prices is None:
+        return None
+    return input_tokens / 1_000_000 * prices[0] + output_tokens / 1_000_000 * prices[1]
+
+
+class UsageEstimate:
+    # dry-run 집계: 행별 입력 토큰(텍스트/이미지)과 출력 상한으로 전체 토큰/비용 예측
+
+    def __init__(self, model, max_output_tokens):
+        self.model = model
+        self.max_output_tokens = max_output_tokens
+        self.rows = 0
+        self.text_tokens = 0
+        self.image_tokens = 0
+        self.images = 0
+        self.dropped_images = 0
+        self.request_bytes = 0
+        self.by_group = {}
+
+    def add(self, text_tokens, image_tokens, images, dropped_images=0, request_bytes=0, group=None):
+        self.rows += 1
+        self.text_tokens += text_tokens
+        self.image_tokens += image_tokens
+        self.images += images
+        self.dropped_images += dropped_images
+        self.request_bytes += request_bytes
+        if group is not None:
+            g = self.by_group.setdefault(group, {"rows": 0, "input_tokens": 0})
+            g["rows"] += 1
+            g["input_tokens"] += text_tokens + image_tokens
+
+    def summary(self):
+        input_tokens = self.text_tokens + self.image_tokens
+        output_tokens = self.rows * self.max_output_tokens
+        return {
+            "model": self.model,
+            "rows": self.rows,
+            "text_tokens": self.text_tokens,
+            "image_tokens": self.image_tokens,
+            "input_tokens": input_tokens,
+            "max_output_tokens": output_tokens,
+            "images": self.images,
+            "dropped_images": self.dropped_images,
+            "request_mb": round(self.request_bytes / (1024 * 1024), 1),
+            "max_cost_usd": estimate_cost(self.model, input_tokens, output_tokens),
+            "by_group": self.by_group,
+        }
+
+    def report(self):
+        s = self.summary()
+        print(f"[INFO] 예상 사용량 ({s['model']}, {s['rows']:,}행)")
+        print(f"   - 입력 토큰: {s['input_tokens']:,} (텍스트 {s['text_tokens']:,} / 이미지 {s['image_tokens']:,})")
+        print(f"   - 출력 토큰 상한: {s['max_output_tokens']:,}")
+        print(f"   - 이미지: {s['images']:,}장 포함, {s['dropped_images']:,}장 제외, 예상 전송량 {s['request_mb']:,} MB")
+        if s["max_cost_usd"] is not None:
+            print(f"   - 예상 비용 상한: ${s['max_cost_usd']:,.4f}")
+        for group, g in sorted(s["by_group"].items(), key=lambda item: -item[1]["input_tokens"]):
+            print(f"   - {group}: {g['rows']:,}행, 입력 토큰 {g['input_tokens']:,}")
+        return s